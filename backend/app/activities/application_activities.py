@@ -0,0 +1,140 @@
+from temporalio import activity
+from temporalio.exceptions import ApplicationError
+from datetime import timedelta
+import os
+import logging
+
+from app.models.database import (
+    get_db,
+    update_application_state,
+    archive_applications_batch,
+    ensure_application_partitions,
+    reindex_archived_search_batch,
+    save_cover_letters,
+    schedule_application_deadline,
+    process_due_reminders,
+    process_due_archivals,
+)
+
+logger = logging.getLogger(__name__)
+
+# Applications moved to the cold archive per transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "200"))
+
+# Applications handled per deadline scheduler transaction
+DEADLINE_BATCH_SIZE = int(os.getenv("DEADLINE_BATCH_SIZE", "500"))
+
+
+@activity.defn
+def sync_application_state(state: dict) -> bool:
+    """Mirror the workflow's state snapshot into the applications table"""
+    try:
+        applied = update_application_state(get_db(), state)
+        if not applied:
+            logger.info(
+                f"Skipped stale state v{state['state_version']} for application "
+                f"{state['application_id']}"
+            )
+        return applied
+    except Exception as e:
+        logger.error(f"Failed to sync application state: {str(e)}")
+        raise ApplicationError(f"State sync error: {str(e)}", non_retryable=False)
+
+
+@activity.defn
+def archive_applications() -> dict:
+    """Pre-create upcoming partitions and compress ARCHIVED blobs into cold storage"""
+    try:
+        db = get_db()
+        for message in ensure_application_partitions(db):
+            logger.warning(message)
+
+        archived = 0
+        while True:
+            batch = archive_applications_batch(db, ARCHIVE_BATCH_SIZE)
+            archived += batch
+            activity.heartbeat(archived)
+            if batch < ARCHIVE_BATCH_SIZE:
+                break
+
+        # Search vectors cleared by migration 14; a no-op once all are rebuilt
+        reindexed = 0
+        while True:
+            batch = reindex_archived_search_batch(db, ARCHIVE_BATCH_SIZE)
+            reindexed += batch
+            activity.heartbeat(archived + reindexed)
+            if batch < ARCHIVE_BATCH_SIZE:
+                break
+
+        logger.info(
+            f"Archived {archived} applications, reindexed {reindexed} for search"
+        )
+        return {"archived": archived, "reindexed": reindexed}
+    except Exception as e:
+        logger.error(f"Failed to archive applications: {str(e)}")
+        raise ApplicationError(f"Archive error: {str(e)}", non_retryable=False)
+
+
+@activity.defn
+def store_cover_letters(payload: dict) -> int:
+    """Persist generated candidates as cover letter versions; returns the current one"""
+    try:
+        return save_cover_letters(
+            get_db(),
+            payload["application_id"],
+            payload["candidates"],
+            payload["source"],
+            payload["run_key"],
+        )
+    except Exception as e:
+        logger.error(f"Failed to store cover letters: {str(e)}")
+        raise ApplicationError(
+            f"Cover letter store error: {str(e)}", non_retryable=False
+        )
+
+
+@activity.defn
+def hand_off_deadline(payload: dict) -> bool:
+    """Record the reminder and auto-archive due dates for the deadline scheduler"""
+    try:
+        schedule_application_deadline(
+            get_db(),
+            payload["application_id"],
+            timedelta(seconds=payload["grace_period_seconds"]),
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to schedule deadline: {str(e)}")
+        raise ApplicationError(
+            f"Deadline schedule error: {str(e)}", non_retryable=False
+        )
+
+
+@activity.defn
+def process_due_deadlines() -> dict:
+    """Queue reminders and auto-archive applications whose due dates passed"""
+    try:
+        db = get_db()
+        totals = {"reminded": 0, "archived": 0, "handled": 0}
+        for process, key in (
+            (process_due_reminders, "reminded"),
+            (process_due_archivals, "archived"),
+        ):
+            while True:
+                handled, changed = process(db, DEADLINE_BATCH_SIZE)
+                totals["handled"] += handled
+                totals[key] += changed
+                activity.heartbeat(totals)
+                if handled < DEADLINE_BATCH_SIZE:
+                    break
+
+        logger.info(
+            f"Deadline scheduler queued {totals['reminded']} reminders and "
+            f"archived {totals['archived']} applications"
+        )
+        return totals
+    except Exception as e:
+        logger.error(f"Failed to process due deadlines: {str(e)}")
+        raise ApplicationError(
+            f"Deadline scheduler error: {str(e)}", non_retryable=False
+        )
@@ -0,0 +1,88 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from temporalio import activity
+
+from app.models.application import GenerationRun
+from app.models.database import get_db, save_generation_run
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M (prompt, completion) tokens; override with LLM_PRICING="model=in/out,..."
+DEFAULT_PRICING: Dict[str, Tuple[float, float]] = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-flash-8b": (0.0375, 0.15),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+
+def load_pricing() -> Dict[str, Tuple[float, float]]:
+    pricing = dict(DEFAULT_PRICING)
+    for entry in filter(None, os.getenv("LLM_PRICING", "").split(",")):
+        model, _, prices = entry.partition("=")
+        prompt_price, _, completion_price = prices.partition("/")
+        pricing[model.strip()] = (float(prompt_price), float(completion_price))
+    return pricing
+
+
+PRICING = load_pricing()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+class RunRecorder:
+    """Mutable handle the generation code fills in while the call is running"""
+
+    def __init__(self, run: GenerationRun):
+        self.run = run
+
+    def set_usage(self, usage_metadata: Optional[Any]):
+        if usage_metadata is None:
+            return
+        self.run.prompt_tokens = getattr(usage_metadata, "prompt_token_count", 0) or 0
+        self.run.completion_tokens = (
+            getattr(usage_metadata, "candidates_token_count", 0) or 0
+        )
+
+    def set_cache_hit(self, cache_hit: bool = True):
+        self.run.cache_hit = cache_hit
+
+
+@contextmanager
+def track_generation(
+    application_data: Dict[str, Any], path: str, model: str, prompt_version: str
+):
+    """Write one generation_runs row per attempt, whatever the outcome"""
+    recorder = RunRecorder(
+        GenerationRun(
+            application_id=application_data.get("id", ""),
+            path=path,
+            model=model,
+            prompt_version=prompt_version,
+            attempt=activity.info().attempt if activity.in_activity() else 1,
+        )
+    )
+    start = time.perf_counter()
+    try:
+        yield recorder
+    except Exception as e:
+        recorder.run.outcome = "error"
+        recorder.run.error = str(e)[:1000]
+        raise
+    finally:
+        run = recorder.run
+        run.latency_ms = int((time.perf_counter() - start) * 1000)
+        run.cost_usd = estimate_cost(
+            run.model, run.prompt_tokens, run.completion_tokens
+        )
+        try:
+            save_generation_run(get_db(), run)
+        except Exception as e:
+            # The ledger must never fail a generation
+            logger.warning(f"Failed to record generation run: {e}")
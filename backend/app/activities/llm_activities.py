@@ -1,81 +1,157 @@
 import os
-import google.generativeai as genai
+import threading
+from datetime import datetime, timezone
 from temporalio import activity
 from temporalio.exceptions import ApplicationError
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-# DSPy imports
-try:
-    from app.dspy_modules import get_cover_letter_optimizer
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
-    logging.warning("DSPy not available, falling back to direct Gemini API")
+from app.llm_stack import get_dspy_cover_letter, get_genai
+from app.models.application import ResumeProfile
+from app.observability import GENERATION_QUEUE_WAIT, observe_llm, record_llm_usage
+from app.activities.generation_ledger import track_generation
+from app.activities.model_routing import route
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_MODEL = "gemini-1.5-flash"
 
-def generate_cover_letter_dspy(application_data: Dict[str, Any]) -> str:
-    """Generate cover letter using DSPy-optimized prompts"""
-    try:
-        # Extract fields from application data
-        company = application_data.get("company", "")
-        role = application_data.get("role", "")
-        job_description = application_data.get("job_description", "")
-        resume = application_data.get("resume", "")
-        application_id = application_data.get("id", "")
-        
-        # Get the DSPy optimizer
-        optimizer = get_cover_letter_optimizer()
-        
+# Bump whenever the signature or fallback prompt changes so the ledger can
+# compare prompt versions
+PROMPT_VERSION = "v2-resume-profile"
+
+# Candidates sampled per generation call (Gemini allows up to 8)
+COVER_LETTER_CANDIDATES = int(os.getenv("COVER_LETTER_CANDIDATES", "3"))
+
+
+def get_resume_context(application_data: Dict[str, Any]) -> str:
+    """Use the precomputed resume profile when present, else the raw resume"""
+    profile_data = application_data.get("resume_profile")
+    if profile_data:
+        return ResumeProfile(**profile_data).to_prompt()
+    return application_data.get("resume", "")
+
+
+# Guards one-time DSPy setup between the pre-warm thread and activities
+_optimizer_lock = threading.Lock()
+
+
+def get_ready_optimizer():
+    """The DSPy optimizer with its model configured and program compiled or loaded"""
+    optimizer = get_dspy_cover_letter().get_cover_letter_optimizer()
+    
+    with _optimizer_lock:
         # Setup model if not already done
-        if not hasattr(optimizer, 'generator') or not optimizer.generator:
+        if not optimizer.generator:
             api_key = os.getenv("GEMINI_API_KEY")
             if not api_key:
                 raise ApplicationError("GEMINI_API_KEY not found", non_retryable=True)
             
             optimizer.setup_model(api_key)
             
-            # Try to optimize with sample examples
+            # Prefer a program compiled offline; else optimize with sample examples
             try:
-                optimizer.optimize_with_examples()
+                program_path = os.getenv("DSPY_PROGRAM_PATH")
+                if program_path:
+                    optimizer.load_optimized(program_path)
+                else:
+                    optimizer.optimize_with_examples()
                 logger.info("DSPy optimizer setup and optimized successfully")
             except Exception as e:
                 logger.warning(f"DSPy optimization failed, using base generator: {e}")
+    
+    return optimizer
+
+
+def prewarm_llm_stack():
+    """Import the LLM clients and ready the DSPy program before the first task"""
+    get_genai()
+    from app.dspy_modules.scoring import score_cover_letters  # noqa: F401 (numpy)
+
+    if get_dspy_cover_letter() is not None and os.getenv("GEMINI_API_KEY"):
+        get_ready_optimizer()
+
+
+def release_prompt_cache():
+    """Delete cached prompt prefixes instead of leaving them billed until expiry"""
+    cover_letter = get_dspy_cover_letter()
+    if cover_letter is None:
+        return
+    for lm in cover_letter.get_cover_letter_optimizer().lms.values():
+        if lm.prefix_cache is not None:
+            lm.prefix_cache.release()
+
+
+def generate_candidates_dspy(
+    application_data: Dict[str, Any],
+    candidate_count: int,
+    model_name: Optional[str] = None,
+) -> List[str]:
+    """Generate cover letters using DSPy-optimized prompts, all from one LM call"""
+    try:
+        # Extract fields from application data
+        company = application_data.get("company", "")
+        role = application_data.get("role", "")
+        job_description = application_data.get("job_description", "")
+        resume_profile = get_resume_context(application_data)
+        application_id = application_data.get("id", "")
         
-        # Generate cover letter
-        cover_letter = optimizer.generate_cover_letter(
-            company=company,
-            role=role,
-            job_description=job_description,
-            resume=resume
-        )
+        optimizer = get_ready_optimizer()
+        model_name = model_name or optimizer.model_name
+        
+        # Token counts come from every request the program makes on this thread
+        collect_usage = get_dspy_cover_letter().collect_usage
+        with track_generation(
+            application_data, "dspy", model_name, PROMPT_VERSION
+        ) as run, observe_llm("dspy"), collect_usage() as usage:
+            cover_letters = optimizer.generate_cover_letter_candidates(
+                company=company,
+                role=role,
+                job_description=job_description,
+                resume_profile=resume_profile,
+                n=candidate_count,
+                model_name=model_name,
+            )
+            run.set_usage(usage)
+            if not cover_letters:
+                raise ApplicationError("Empty response from DSPy", non_retryable=False)
         
         logger.info(
-            f"Generated cover letter for application {application_id} using DSPy"
+            f"Generated {len(cover_letters)} cover letter(s) for application "
+            f"{application_id} using DSPy on {model_name}"
         )
-        return cover_letter
+        return cover_letters
         
     except Exception as e:
         logger.error(f"DSPy cover letter generation failed: {str(e)}")
         raise ApplicationError(f"DSPy generation error: {str(e)}", non_retryable=False)
 
 
-def generate_cover_letter_fallback(application_data: Dict[str, Any]) -> str:
+def generate_cover_letter_dspy(application_data: Dict[str, Any]) -> str:
+    """Generate cover letter using DSPy-optimized prompts"""
+    return generate_candidates_dspy(application_data, 1)[0]
+
+
+def generate_candidates_fallback(
+    application_data: Dict[str, Any],
+    candidate_count: int,
+    model_name: str = FALLBACK_MODEL,
+) -> List[str]:
     """Fallback cover letter generation using direct Gemini API"""
     try:
         # Configure Gemini with optimized settings
+        genai = get_genai()
         genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
         # Use Gemini Flash with optimized configuration
         model = genai.GenerativeModel(
-            "gemini-1.5-flash",
+            model_name,
             generation_config={
                 "temperature": 0.7,
                 "top_p": 0.9,
                 "top_k": 40,
                 "max_output_tokens": 800,  # Limit output for efficiency
+                "candidate_count": candidate_count,
             },
         )
 
@@ -83,7 +159,7 @@ def generate_cover_letter_fallback(application_data: Dict[str, Any]) -> str:
         company = application_data.get("company", "")
         role = application_data.get("role", "")
         job_description = application_data.get("job_description", "")
-        resume = application_data.get("resume", "")
+        resume_profile = get_resume_context(application_data)
         application_id = application_data.get("id", "")
 
         # Build optimized prompt for Gemini Flash
@@ -93,7 +169,7 @@ def generate_cover_letter_fallback(application_data: Dict[str, Any]) -> str:
         Company: {company}
         Position: {role}
         Job Description: {job_description}
-        My Background: {resume}
+        My Background: {resume_profile}
         
         Requirements:
         - Show enthusiasm for the role and company
@@ -105,39 +181,117 @@ def generate_cover_letter_fallback(application_data: Dict[str, Any]) -> str:
         """
 
         # Generate content with error handling
-        response = model.generate_content(prompt)
-
-        if not response.text:
-            raise ApplicationError(
-                "Empty response from Gemini Flash", non_retryable=False
-            )
+        with track_generation(
+            application_data, "fallback", model_name, PROMPT_VERSION
+        ) as run, observe_llm("fallback"):
+            response = model.generate_content(prompt)
+            usage = getattr(response, "usage_metadata", None)
+            record_llm_usage("fallback", usage)
+            run.set_usage(usage)
 
-        cover_letter = response.text.strip()
+            cover_letters = [
+                "".join(part.text for part in candidate.content.parts).strip()
+                for candidate in response.candidates
+            ]
+            cover_letters = [letter for letter in cover_letters if letter]
+            if not cover_letters:
+                raise ApplicationError(
+                    "Empty response from Gemini Flash", non_retryable=False
+                )
 
         logger.info(
-            f"Generated cover letter for application {application_id} "
-            f"using fallback Gemini Flash"
+            f"Generated {len(cover_letters)} cover letter(s) for application "
+            f"{application_id} using fallback {model_name}"
         )
-        return cover_letter
+        return cover_letters
 
     except Exception as e:
         logger.error(f"Failed to generate cover letter with Gemini Flash: {str(e)}")
         raise ApplicationError(f"Gemini Flash API error: {str(e)}", non_retryable=False)
 
 
-@activity.defn
-def generate_cover_letter(application_data: Dict[str, Any]) -> str:
-    """Generate cover letter using DSPy if available, fallback to direct API"""
+def generate_cover_letter_fallback(application_data: Dict[str, Any]) -> str:
+    """Fallback cover letter generation using direct Gemini API"""
+    return generate_candidates_fallback(application_data, 1)[0]
+
+
+def rank_candidates(
+    application_data: Dict[str, Any], cover_letters: List[str]
+) -> List[Dict[str, Any]]:
+    """Score candidates locally with the quality metric, best first"""
+    from app.dspy_modules.scoring import score_cover_letters
+
+    count = len(cover_letters)
+    scores = score_cover_letters(
+        cover_letters,
+        [application_data.get("company", "")] * count,
+        [application_data.get("role", "")] * count,
+    ).total.tolist()
+
+    ranked = sorted(zip(scores, cover_letters), key=lambda pair: pair[0], reverse=True)
+    return [
+        {"cover_letter": letter, "score": round(score, 4)} for score, letter in ranked
+    ]
+
+
+def generate_ranked(
+    application_data: Dict[str, Any], candidate_count: int, model: str
+) -> List[Dict[str, Any]]:
+    """Candidates from one model tier, DSPy first, scored best first"""
     application_id = application_data.get("id", "")
-    
-    # Try DSPy first if available
-    if DSPY_AVAILABLE:
+
+    cover_letters = None
+    if get_dspy_cover_letter() is not None:
         try:
-            logger.info(f"Attempting DSPy generation for application {application_id}")
-            return generate_cover_letter_dspy(application_data)
+            cover_letters = generate_candidates_dspy(
+                application_data, candidate_count, model
+            )
         except Exception as e:
             logger.warning(f"DSPy generation failed for application {application_id}: {e}")
             logger.info("Falling back to direct Gemini API")
-    
-    # Fallback to direct API
-    return generate_cover_letter_fallback(application_data)
+    if cover_letters is None:
+        cover_letters = generate_candidates_fallback(
+            application_data, candidate_count, model
+        )
+
+    return rank_candidates(application_data, cover_letters)
+
+
+def generate_routed(
+    application_data: Dict[str, Any], candidate_count: int
+) -> List[Dict[str, Any]]:
+    """Candidates from the cheapest model tier that passes the quality bar"""
+    input_chars = len(application_data.get("job_description", "")) + len(
+        get_resume_context(application_data)
+    )
+    ranked = route(
+        lambda model: generate_ranked(application_data, candidate_count, model),
+        input_chars,
+    )
+    return ranked[:candidate_count]
+
+
+@activity.defn
+def generate_cover_letter(application_data: Dict[str, Any]) -> str:
+    """Generate cover letter using DSPy if available, fallback to direct API"""
+    # DSPy first, then the direct API, on each model tier the router tries
+    return generate_routed(application_data, 1)[0]["cover_letter"]
+
+
+@activity.defn
+def generate_cover_letter_candidates(application_data: Dict[str, Any]) -> dict:
+    """Sample several cover letters in one LLM call and keep them all, best first.
+
+    Returns {"cover_letter", "score", "alternates": [{"cover_letter", "score"}]}.
+    """
+    candidate_count = application_data.get("candidate_count") or COVER_LETTER_CANDIDATES
+    if application_data.get("queued_at") and activity.info().attempt == 1:
+        waited = datetime.now(timezone.utc) - datetime.fromisoformat(
+            application_data["queued_at"]
+        )
+        GENERATION_QUEUE_WAIT.labels(application_data["generation_lane"]).observe(
+            waited.total_seconds()
+        )
+
+    best, *alternates = generate_routed(application_data, candidate_count)
+    return {**best, "alternates": alternates}
@@ -0,0 +1,92 @@
+"""
+Tiered model routing for cover letter generation.
+
+MODEL_TIERS lists models from cheapest to strongest. A generation starts on
+the first tier, its candidates are scored locally with the quality metric,
+and it moves to the next tier only when the best score is below
+ROUTER_MIN_SCORE or the tier fails. Inputs longer than
+ROUTER_COMPLEX_INPUT_CHARS start on the second tier. With a single tier (the
+default) every generation goes to that model, as before routing existed.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.observability import (
+    LLM_TIER_ESCALATIONS,
+    LLM_TIER_LATENCY,
+    LLM_TIER_REQUESTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_tiers() -> List[str]:
+    tiers = os.getenv("MODEL_TIERS", "gemini-1.5-flash").split(",")
+    return [tier.strip() for tier in tiers if tier.strip()]
+
+
+MODEL_TIERS = load_tiers()
+ROUTER_MIN_SCORE = float(os.getenv("ROUTER_MIN_SCORE", "0.7"))
+ROUTER_COMPLEX_INPUT_CHARS = int(os.getenv("ROUTER_COMPLEX_INPUT_CHARS", "8000"))
+
+
+def starting_tier(input_chars: int, tiers: List[str]) -> int:
+    """Long inputs skip the cheapest tier"""
+    if len(tiers) > 1 and input_chars > ROUTER_COMPLEX_INPUT_CHARS:
+        return 1
+    return 0
+
+
+def route(
+    generate: Callable[[str], List[Dict[str, Any]]],
+    input_chars: int,
+    tiers: Optional[List[str]] = None,
+    min_score: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Ranked candidates ({"cover_letter", "score"}, best first) from the
+    cheapest tier that passes, plus those of any tier escalated from.
+
+    `generate(model)` returns one tier's candidates ranked best first.
+    """
+    tiers = tiers or MODEL_TIERS
+    min_score = ROUTER_MIN_SCORE if min_score is None else min_score
+    start = starting_tier(input_chars, tiers)
+    if start:
+        LLM_TIER_ESCALATIONS.labels(tiers[0], "complex_input").inc()
+
+    candidates: List[Dict[str, Any]] = []
+    served_by = None
+    for index in range(start, len(tiers)):
+        tier = tiers[index]
+        last = index == len(tiers) - 1
+        started = time.perf_counter()
+        try:
+            ranked = generate(tier)
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            LLM_TIER_LATENCY.labels(tier, "error").observe(elapsed)
+            # Keep the weaker letters over failing the whole generation
+            if last and not candidates:
+                raise
+            logger.warning(f"Model tier {tier} failed: {e}")
+            if not last:
+                LLM_TIER_ESCALATIONS.labels(tier, "error").inc()
+            continue
+
+        served_by = tier
+        candidates = sorted(
+            candidates + ranked, key=lambda candidate: candidate["score"], reverse=True
+        )
+        best = ranked[0]["score"]
+        outcome = "accepted" if best >= min_score or last else "escalated"
+        LLM_TIER_LATENCY.labels(tier, outcome).observe(time.perf_counter() - started)
+        if outcome == "accepted":
+            break
+        LLM_TIER_ESCALATIONS.labels(tier, "low_score").inc()
+        logger.info(f"Best {tier} score {best:.2f} below {min_score}, escalating")
+
+    LLM_TIER_REQUESTS.labels(served_by).inc()
+    return candidates
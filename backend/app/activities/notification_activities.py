@@ -1,13 +1,26 @@
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import groupby
+from operator import itemgetter
 from temporalio import activity
 from temporalio.exceptions import ApplicationError
 import logging
+from typing import List
+
+from app.models.database import (
+    get_db,
+    queue_reminder,
+    get_due_reminders,
+    mark_reminders_sent,
+)
+from app.notifications.digest import build_reminder_digest
+from app.notifications.smtp import get_smtp_pool
 
 logger = logging.getLogger(__name__)
 
+# Reminders fetched per digest pass
+DIGEST_BATCH_SIZE = int(os.getenv("DIGEST_BATCH_SIZE", "500"))
+
 @activity.defn
 def send_reminder_notification(notification_data: dict) -> bool:
     """Send reminder notification via email"""
@@ -50,4 +63,80 @@ def send_reminder_notification(notification_data: dict) -> bool:
         raise ApplicationError(
             f"Notification error: {str(e)}",
             non_retryable=False
-        )
\ No newline at end of file
+        )
+
+
+@activity.defn
+def queue_reminder_notification(notification_data: dict) -> bool:
+    """Queue a reminder for the next per-user digest instead of emailing now"""
+    try:
+        queue_reminder(get_db(), notification_data)
+        logger.info(
+            f"Queued reminder for {notification_data['user_email']} "
+            f"(application {notification_data['application_id']})"
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to queue reminder notification: {str(e)}")
+        raise ApplicationError(f"Notification error: {str(e)}", non_retryable=False)
+
+
+def _deliver_digest(user_email: str, reminders: List[dict]) -> List[int]:
+    message = build_reminder_digest(user_email, reminders)
+    pool = get_smtp_pool()
+    if pool:
+        pool.send(message)
+    else:
+        # No SMTP configured (local/demo): log instead of sending
+        logger.info(f"Digest for {user_email}: {message.get_content()}")
+    return [reminder["id"] for reminder in reminders]
+
+
+@activity.defn
+def send_reminder_digests(batch_size: int = DIGEST_BATCH_SIZE) -> dict:
+    """Group all due reminders per user and deliver one digest email each"""
+    db = get_db()
+    pool = get_smtp_pool()
+    digests_sent = 0
+    failed = 0
+
+    while True:
+        rows = get_due_reminders(db, batch_size)
+        groups = [
+            (user_email, list(reminders))
+            for user_email, reminders in groupby(rows, key=itemgetter("user_email"))
+        ]
+        # A full batch may have cut the last user's reminders in half; leave
+        # them for the next pass so that user still gets a single digest.
+        # A user filling a whole batch alone gets all their reminders now.
+        if len(rows) == batch_size and len(groups) > 1:
+            groups.pop()
+        elif len(rows) == batch_size and len(groups) == 1:
+            user_email = groups[0][0]
+            groups = [(user_email, get_due_reminders(db, None, user_email))]
+        if not groups:
+            break
+
+        with ThreadPoolExecutor(max_workers=pool.size if pool else 1) as executor:
+            futures = {
+                executor.submit(_deliver_digest, user_email, reminders): user_email
+                for user_email, reminders in groups
+            }
+            sent_ids = []
+            for future in as_completed(futures):
+                try:
+                    sent_ids.extend(future.result())
+                    digests_sent += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Failed to send digest to {futures[future]}: {e}")
+
+        if sent_ids:
+            mark_reminders_sent(db, sent_ids)
+        activity.heartbeat(digests_sent)
+
+        if len(rows) < batch_size or not sent_ids:
+            break
+
+    logger.info(f"Sent {digests_sent} reminder digests ({failed} failed)")
+    return {"digests_sent": digests_sent, "failed": failed}
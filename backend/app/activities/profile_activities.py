@@ -0,0 +1,137 @@
+import os
+import re
+import json
+import hashlib
+from collections import Counter
+from temporalio import activity
+from temporalio.exceptions import ApplicationError
+import logging
+from typing import Dict, Any, List
+
+from app.llm_stack import get_genai
+from app.models.application import ResumeProfile
+from app.models.database import get_db, get_resume_profile, save_resume_profile
+from app.observability import observe_llm, record_llm_usage
+from app.activities.generation_ledger import RunRecorder, track_generation
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODEL = "gemini-1.5-flash"
+PROFILE_PROMPT_VERSION = "profile-v1"
+
+# Number of keywords kept in the profile's keyword vector
+MAX_KEYWORDS = 25
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "have", "in", "is", "it", "of", "on", "or", "that", "the", "to", "was",
+    "were", "with", "years", "year", "experience", "my", "i", "me", "our",
+    "we", "will", "this", "over", "into", "using", "used",
+}
+
+
+def compute_resume_hash(resume: str) -> str:
+    """Hash a resume after whitespace normalization so trivial edits still hit"""
+    normalized = " ".join(resume.split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def extract_keywords(text: str, limit: int = MAX_KEYWORDS) -> Dict[str, float]:
+    """Build a normalized term-frequency keyword vector for a resume"""
+    tokens = [
+        token
+        for token in re.findall(r"[a-z][a-z0-9+#.\-]*[a-z0-9+#]|[a-z]", text.lower())
+        if token not in STOPWORDS and len(token) > 1
+    ]
+    counts = Counter(tokens).most_common(limit)
+    if not counts:
+        return {}
+    top = counts[0][1]
+    return {token: round(count / top, 3) for token, count in counts}
+
+
+def _as_list(value: Any) -> List[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def extract_profile_with_gemini(
+    resume: str, run: RunRecorder
+) -> Dict[str, List[str]]:
+    """Ask Gemini for skills, roles and achievements as structured JSON"""
+    genai = get_genai()
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+    model = genai.GenerativeModel(
+        PROFILE_MODEL,
+        generation_config={
+            "temperature": 0.0,
+            "max_output_tokens": 600,
+            "response_mime_type": "application/json",
+        },
+    )
+
+    prompt = f"""
+    Extract a compact profile from this resume as JSON with exactly these keys:
+    - "skills": list of short skill names (max 20)
+    - "roles": list of "Title at Company (years)" entries (max 8)
+    - "achievements": list of one-line quantified achievements (max 8)
+
+    Resume:
+    {resume}
+    """
+
+    with observe_llm("profile"):
+        response = model.generate_content(prompt)
+    usage = getattr(response, "usage_metadata", None)
+    record_llm_usage("profile", usage)
+    run.set_usage(usage)
+
+    if not response.text:
+        raise ApplicationError("Empty response from Gemini Flash", non_retryable=False)
+
+    data = json.loads(response.text)
+    return {
+        "skills": _as_list(data.get("skills")),
+        "roles": _as_list(data.get("roles")),
+        "achievements": _as_list(data.get("achievements")),
+    }
+
+
+@activity.defn
+def extract_resume_profile(application_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the cached profile for this resume, extracting it on first use"""
+    resume = application_data.get("resume", "")
+    resume_hash = compute_resume_hash(resume)
+    db = get_db()
+
+    with track_generation(
+        application_data, "profile", PROFILE_MODEL, PROFILE_PROMPT_VERSION
+    ) as run:
+        profile = get_resume_profile(db, resume_hash)
+        if profile:
+            run.set_cache_hit()
+            logger.info(f"Resume profile cache hit for {resume_hash[:12]}")
+            return profile.model_dump()
+
+        try:
+            extracted = extract_profile_with_gemini(resume, run)
+        except Exception as e:
+            logger.error(f"Failed to extract resume profile: {str(e)}")
+            raise ApplicationError(
+                f"Profile extraction error: {str(e)}", non_retryable=False
+            )
+
+    profile = ResumeProfile(
+        resume_hash=resume_hash,
+        keywords=extract_keywords(resume),
+        **extracted,
+    )
+    save_resume_profile(db, profile)
+
+    logger.info(
+        f"Extracted resume profile {resume_hash[:12]} for application "
+        f"{application_data.get('id', '')}"
+    )
+    return profile.model_dump()
@@ -0,0 +1,175 @@
+"""
+Admission control for new applications.
+
+Before create_application inserts anything it reads these signals:
+
+- backlog: activity tasks waiting on the job-applications task queue
+- backlog_age: how long the oldest of them has waited
+- queued_generations: generations waiting at GenerationSchedulerWorkflow
+  (FAIR_SCHEDULING only)
+- pool_saturation: connections of the API's DB pool (DB_POOL_MAX_CONNECTIONS)
+  in use or waited for, as a fraction of the pool; above 1 means requests
+  are queueing for a connection
+- db_latency: smoothed latency of short database queries, which shows an
+  overloaded database however the connections are held; exports, listings
+  and batch jobs are left out, as they are slow by size rather than load
+
+Each signal's pressure is its value over its limit, and the highest one
+decides. At 1 or below the application is admitted. Up to
+ADMISSION_REJECT_PRESSURE it is admitted deferred: lowest workflow priority
+and the bulk generation lane. Beyond that the API answers 429 with a
+Retry-After estimating when the signal drops back under its limit. Task-queue
+and scheduler readings are refreshed at most every ADMISSION_REFRESH_SECONDS
+and ignored when unavailable, so admission fails open.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional
+
+from temporalio.client import Client
+
+from app.models.database import get_db
+from app.observability import (
+    ADMISSION_DECISIONS,
+    ADMISSION_PRESSURE,
+    recent_query_seconds,
+)
+from app.scaling import describe_task_queue
+from app.workflows.generation_scheduler import (
+    GenerationSchedulerWorkflow,
+    GENERATION_SCHEDULER_ID,
+)
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "false").lower() == "true"
+ADMISSION_MAX_BACKLOG = int(os.getenv("ADMISSION_MAX_BACKLOG", "200"))
+ADMISSION_MAX_BACKLOG_AGE_SECONDS = float(
+    os.getenv("ADMISSION_MAX_BACKLOG_AGE_SECONDS", "60")
+)
+ADMISSION_MAX_QUEUED_GENERATIONS = int(
+    os.getenv("ADMISSION_MAX_QUEUED_GENERATIONS", "100")
+)
+ADMISSION_MAX_DB_QUERY_SECONDS = float(
+    os.getenv("ADMISSION_MAX_DB_QUERY_SECONDS", "0.5")
+)
+ADMISSION_MAX_POOL_SATURATION = float(
+    os.getenv("ADMISSION_MAX_POOL_SATURATION", "0.8")
+)
+# Pressure above 1 and up to this defers; above it rejects (1 never defers)
+ADMISSION_REJECT_PRESSURE = float(os.getenv("ADMISSION_REJECT_PRESSURE", "2"))
+ADMISSION_REFRESH_SECONDS = float(os.getenv("ADMISSION_REFRESH_SECONDS", "2"))
+ADMISSION_MAX_RETRY_AFTER_SECONDS = int(
+    os.getenv("ADMISSION_MAX_RETRY_AFTER_SECONDS", "300")
+)
+
+ADMIT = "admit"
+DEFER = "defer"
+REJECT = "reject"
+
+# Temporal priority keys run from 1 (highest) to 5; unset means 3
+DEFERRED_PRIORITY_KEY = 5
+
+
+@dataclass
+class Decision:
+    action: str
+    signal: Optional[str] = None
+    pressure: float = 0.0
+    retry_after: int = 0
+
+
+class AdmissionController:
+    """Admission decisions from cached task-queue and scheduler readings"""
+
+    def __init__(self, fair_scheduling: bool = False):
+        self.fair_scheduling = fair_scheduling
+        self._readings: Dict[str, float] = {}
+        self._dispatch_rate = 0.0
+        self._refreshed = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def decide(self, client: Client) -> Decision:
+        await self._refresh(client)
+        readings = {
+            **self._readings,
+            "db_latency": recent_query_seconds(),
+            "pool_saturation": get_db().pool_saturation(),
+        }
+        limits = {
+            "backlog": ADMISSION_MAX_BACKLOG,
+            "backlog_age": ADMISSION_MAX_BACKLOG_AGE_SECONDS,
+            "queued_generations": ADMISSION_MAX_QUEUED_GENERATIONS,
+            "db_latency": ADMISSION_MAX_DB_QUERY_SECONDS,
+            "pool_saturation": ADMISSION_MAX_POOL_SATURATION,
+        }
+        pressures = {
+            signal: value / limits[signal] for signal, value in readings.items()
+        }
+        for signal, pressure in pressures.items():
+            ADMISSION_PRESSURE.labels(signal).set(pressure)
+
+        signal = max(pressures, key=pressures.get)
+        pressure = pressures[signal]
+        if pressure <= 1:
+            decision = Decision(ADMIT, signal, pressure)
+        elif pressure <= ADMISSION_REJECT_PRESSURE:
+            decision = Decision(DEFER, signal, pressure)
+        else:
+            excess = readings[signal] - limits[signal]
+            decision = Decision(
+                REJECT, signal, pressure, self._retry_after(signal, excess)
+            )
+        ADMISSION_DECISIONS.labels(decision.action, signal).inc()
+        return decision
+
+    def _retry_after(self, signal: str, excess: float) -> int:
+        """Seconds until `signal` is estimated to be back under its limit"""
+        if signal in ("backlog", "queued_generations"):
+            # Drains at the current dispatch rate; stalled means wait longest
+            seconds = (
+                excess / self._dispatch_rate
+                if self._dispatch_rate > 0
+                else ADMISSION_MAX_RETRY_AFTER_SECONDS
+            )
+        elif signal == "backlog_age":
+            seconds = excess
+        else:
+            seconds = ADMISSION_REFRESH_SECONDS
+        return max(1, min(ADMISSION_MAX_RETRY_AFTER_SECONDS, math.ceil(seconds)))
+
+    async def _refresh(self, client: Client):
+        if time.monotonic() - self._refreshed < ADMISSION_REFRESH_SECONDS:
+            return
+        async with self._lock:
+            if time.monotonic() - self._refreshed < ADMISSION_REFRESH_SECONDS:
+                return
+            readings: Dict[str, float] = {}
+            timeout = timedelta(seconds=ADMISSION_REFRESH_SECONDS)
+            try:
+                queues = await describe_task_queue(client, timeout=timeout)
+                activity = queues["activity"]
+                readings["backlog"] = activity["backlog"]
+                readings["backlog_age"] = activity["backlog_age_seconds"]
+                self._dispatch_rate = activity["tasks_dispatch_rate"]
+            except Exception as e:
+                logger.warning(f"Task-queue backlog unavailable for admission: {e}")
+            if self.fair_scheduling:
+                try:
+                    snapshot = await asyncio.wait_for(
+                        client.get_workflow_handle(GENERATION_SCHEDULER_ID).query(
+                            GenerationSchedulerWorkflow.snapshot
+                        ),
+                        ADMISSION_REFRESH_SECONDS,
+                    )
+                    readings["queued_generations"] = sum(snapshot["queued"].values())
+                except Exception as e:
+                    logger.warning(f"Generation queue unavailable for admission: {e}")
+            self._readings = readings
+            self._refreshed = time.monotonic()
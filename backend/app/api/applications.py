@@ -1,47 +1,249 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from temporalio.client import Client
-from typing import List
+from temporalio.common import Priority
+from temporalio.exceptions import WorkflowAlreadyStartedError
+from temporalio.service import RPCError, RPCStatusCode
+from typing import List, Literal, Optional
+import asyncio
+import hashlib
+import itertools
+import os
+import psycopg2
 import uuid
-from datetime import timedelta
+from datetime import datetime, timedelta
 import logging
 
 from app.models.application import (
+    ApplicationFilters,
+    ApplicationWorkflowInput,
+    CoverLetterCandidate,
+    CoverLetterCandidates,
+    CoverLetterVersion,
     JobApplication,
     ApplicationCreate,
     ApplicationResponse,
     ApplicationStatus,
     StatusUpdate,
+    GenerationRun,
+    RegenerateRequest,
 )
 from app.workflows.job_application import JobApplicationWorkflow
+from app.workflows.cover_letter import CoverLetterWorkflow
+from app.workflows.generation_scheduler import BULK_LANE, INTERACTIVE_LANE
+from app.admission import (
+    ADMISSION_CONTROL,
+    DEFER,
+    DEFERRED_PRIORITY_KEY,
+    REJECT,
+    AdmissionController,
+)
+from app.change_feed import ANY_APPLICATION, wait_for_change
+from app.export import MEDIA_TYPES, ExportBusy, export_chunks
+from app.serialization import FAST_JSON, json_response
 from app.models.database import (
     get_db,
     save_application,
     get_application,
     get_all_applications,
+    get_application_version,
+    get_application_versions,
+    get_generation_runs,
+    get_current_cover_letter,
+    get_resume_upload,
+    get_cover_letter_version,
+    get_cover_letter_versions,
+    set_current_cover_letter,
+    set_scheduled_application_status,
 )
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Upper bound for ?wait= long-poll requests
+LONG_POLL_MAX_SECONDS = float(os.getenv("LONG_POLL_MAX_SECONDS", "60"))
+
+# New applications close their workflow after the cover letter and leave the
+# reminder and auto-archive to the deadline scheduler
+DEADLINE_SCHEDULER = os.getenv("DEADLINE_SCHEDULER", "false").lower() == "true"
+
+# Generation waits for a slot from GenerationSchedulerWorkflow, which shares
+# them fairly between users
+FAIR_SCHEDULING = os.getenv("FAIR_SCHEDULING", "false").lower() == "true"
+
+admission = AdmissionController(fair_scheduling=FAIR_SCHEDULING)
+
+# Stored cover letter versions never change
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
 
 async def get_temporal_client(request: Request) -> Client:
     return request.app.state.temporal_client
 
 
+def application_filters(
+    user_email: Optional[str] = None,
+    status: Optional[ApplicationStatus] = None,
+    company: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    q: Optional[str] = Query(
+        None, description="Full-text search over company, role and job description"
+    ),
+    sort: Literal["newest", "oldest", "company", "relevance"] = "newest",
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+) -> ApplicationFilters:
+    return ApplicationFilters(
+        user_email=user_email,
+        status=status,
+        company=company,
+        created_from=created_from,
+        created_to=created_to,
+        q=q,
+        sort=sort,
+        limit=limit,
+        offset=offset,
+    )
+
+
+def _etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """Weak If-None-Match comparison"""
+    header = request.headers.get("if-none-match")
+    if not etag or not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+
+def _set_etag(response: Response, etag: Optional[str]):
+    response.headers["Cache-Control"] = "no-cache"
+    if etag:
+        response.headers["ETag"] = etag
+
+
+def _application_etag(application: JobApplication) -> Optional[str]:
+    # Version 0 means the workflow never synced its state (pre state-sync
+    # workflows), so only a live Temporal query is authoritative
+    if not application.state_version:
+        return None
+    return f'W/"{application.id}:{application.state_version}"'
+
+
+def _list_etag(versions: List[tuple]) -> Optional[str]:
+    if any(version == 0 for _, version in versions):
+        return None
+    digest = hashlib.sha1(
+        ",".join(f"{app_id}:{version}" for app_id, version in versions).encode()
+    ).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+async def _build_response(
+    client: Client, application: JobApplication
+) -> ApplicationResponse:
+    """Serve synced state from the database, querying Temporal only for legacy rows"""
+    if application.state_version:
+        return ApplicationResponse(
+            id=application.id,
+            workflow_id=f"job-app-{application.id}",
+            status=application.status,
+            company=application.company,
+            role=application.role,
+            cover_letter_available=application.cover_letter_available,
+            reminder_sent=application.reminder_sent,
+            created_at=application.created_at,
+        )
+
+    try:
+        handle = client.get_workflow_handle(f"job-app-{application.id}")
+        status = await handle.query(JobApplicationWorkflow.get_current_status)
+
+        return ApplicationResponse(
+            id=application.id,
+            workflow_id=f"job-app-{application.id}",
+            status=ApplicationStatus(status["status"]),
+            company=application.company,
+            role=application.role,
+            cover_letter_available=status["cover_letter_available"],
+            reminder_sent=status["reminder_sent"],
+            created_at=application.created_at,
+        )
+    except Exception as e:
+        logger.error(f"Error querying workflow {application.id}: {str(e)}")
+        # Return application with basic info if workflow query fails
+        return ApplicationResponse(
+            id=application.id,
+            workflow_id=f"job-app-{application.id}",
+            status=ApplicationStatus.SUBMITTED,
+            company=application.company,
+            role=application.role,
+            created_at=application.created_at,
+        )
+
+
+def _workflow_data(application: JobApplication) -> ApplicationWorkflowInput:
+    """Serializable workflow input for an application"""
+    workflow_data = ApplicationWorkflowInput.from_application(application)
+    if FAIR_SCHEDULING:
+        # The scheduler moves users with other generations pending to bulk
+        workflow_data.generation_lane = INTERACTIVE_LANE
+    return workflow_data
+
+
+def _cover_letter_etag(stored: CoverLetterVersion) -> str:
+    return f'W/"cover-letter:{stored.application_id}:v{stored.version}"'
+
+
 @router.post("/", response_model=ApplicationResponse)
 async def create_application(
     application_data: ApplicationCreate,
+    response: Response,
     client: Client = Depends(get_temporal_client),
     db=Depends(get_db),
 ):
-    """Create new job application and start workflow"""
+    """Create new job application and start workflow
+
+    With ADMISSION_CONTROL, overload defers the generation or answers 429.
+    """
+    deferred = False
+    if ADMISSION_CONTROL:
+        decision = await admission.decide(client)
+        if decision.action == REJECT:
+            logger.warning(
+                f"Rejected new application: {decision.signal} pressure "
+                f"{decision.pressure:.2f}, retry after {decision.retry_after}s"
+            )
+            raise HTTPException(
+                status_code=429,
+                detail=f"Overloaded ({decision.signal}), retry later",
+                headers={"Retry-After": str(decision.retry_after)},
+            )
+        deferred = decision.action == DEFER
+        response.headers["X-Admission"] = decision.action
+
+    resume = application_data.resume
+    if resume is None:
+        upload = get_resume_upload(db, application_data.resume_file_hash)
+        if upload is None:
+            raise HTTPException(status_code=404, detail="Uploaded resume not found")
+        resume = upload.text
+
     # Create application instance
     application = JobApplication(
         id=str(uuid.uuid4()),
         company=application_data.company,
         role=application_data.role,
         job_description=application_data.job_description,
-        resume=application_data.resume,
+        resume=resume,
         user_email=application_data.user_email,
         deadline_duration=timedelta(weeks=application_data.deadline_weeks),
     )
@@ -50,23 +252,21 @@ async def create_application(
     save_application(db, application)
 
     # Start Temporal workflow with serializable data
-    workflow_data = {
-        "id": application.id,
-        "company": application.company,
-        "role": application.role,
-        "job_description": application.job_description,
-        "resume": application.resume,
-        "user_email": application.user_email,
-        "deadline_duration_seconds": int(application.deadline_duration.total_seconds()),
-        "created_at": application.created_at.isoformat(),
-        "status": application.status.value,
-    }
-
+    workflow_data = _workflow_data(application)
+    workflow_data.scheduled_deadline = DEADLINE_SCHEDULER
+    if deferred and workflow_data.generation_lane:
+        workflow_data.generation_lane = BULK_LANE
     handle = await client.start_workflow(
         JobApplicationWorkflow.run,
         workflow_data,
         id=f"job-app-{application.id}",
         task_queue="job-applications",
+        # Activities inherit the workflow's priority
+        priority=(
+            Priority(priority_key=DEFERRED_PRIORITY_KEY)
+            if deferred
+            else Priority.default
+        ),
     )
 
     return ApplicationResponse(
@@ -81,57 +281,107 @@ async def create_application(
 
 @router.get("/", response_model=List[ApplicationResponse])
 async def list_applications(
-    client: Client = Depends(get_temporal_client), db=Depends(get_db)
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, le=LONG_POLL_MAX_SECONDS),
+    filters: ApplicationFilters = Depends(application_filters),
+    client: Client = Depends(get_temporal_client),
+    db=Depends(get_db),
 ):
-    """List all job applications with current status"""
-    applications = get_all_applications(db)
-    responses = []
+    """List job applications with current status.
 
-    for app in applications:
-        try:
-            handle = client.get_workflow_handle(f"job-app-{app.id}")
-            status = await handle.query(JobApplicationWorkflow.get_current_status)
-
-            responses.append(
-                ApplicationResponse(
-                    id=app.id,
-                    workflow_id=f"job-app-{app.id}",
-                    status=ApplicationStatus(status["status"]),
-                    company=app.company,
-                    role=app.role,
-                    cover_letter_available=status["cover_letter_available"],
-                    reminder_sent=status["reminder_sent"],
-                    created_at=app.created_at,
-                )
-            )
-        except Exception as e:
-            logger.error(f"Error querying workflow {app.id}: {str(e)}")
-            # Return application with basic info if workflow query fails
-            responses.append(
-                ApplicationResponse(
-                    id=app.id,
-                    workflow_id=f"job-app-{app.id}",
-                    status=ApplicationStatus.SUBMITTED,
-                    company=app.company,
-                    role=app.role,
-                    created_at=app.created_at,
-                )
-            )
+    Filter by user, status, company and created_at range, or full-text
+    search with ?q=. Supports If-None-Match (304 when nothing changed) and
+    ?wait=N to hold the request until any application's state changes.
+    """
+    etag = _list_etag(get_application_versions(db, filters))
 
+    if wait and _etag_matches(request, etag):
+        with request.app.state.change_feed.subscribe(ANY_APPLICATION) as waiter:
+            if _list_etag(get_application_versions(db, filters)) == etag:
+                await wait_for_change(waiter, wait)
+        etag = _list_etag(get_application_versions(db, filters))
+
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    applications = get_all_applications(db, filters)
+    _set_etag(response, etag)
+    responses = [await _build_response(client, app) for app in applications]
+    if FAST_JSON:
+        return json_response(
+            responses, List[ApplicationResponse], headers=dict(response.headers)
+        )
     return responses
 
 
+@router.get("/export")
+async def export_applications(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    include_cover_letters: bool = False,
+    filters: ApplicationFilters = Depends(application_filters),
+):
+    """Stream matching applications as NDJSON or CSV, with full job
+    descriptions and resumes and, optionally, the current cover letter.
+
+    Takes the listing's filters; without ?limit= every match is exported.
+    """
+    chunks = export_chunks(format, filters, include_cover_letters)
+    # Run the query before answering, so failures are a status code rather
+    # than a truncated 200
+    try:
+        first = await asyncio.to_thread(next, chunks)
+    except ExportBusy as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "30"}
+        )
+    except psycopg2.Error as e:
+        logger.error(f"Export failed: {e}")
+        raise HTTPException(status_code=503, detail="Export unavailable")
+
+    return StreamingResponse(
+        itertools.chain([first], chunks),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="applications.{format}"'
+        },
+    )
+
+
 @router.get("/{application_id}", response_model=ApplicationResponse)
 async def get_application_detail(
     application_id: str,
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, le=LONG_POLL_MAX_SECONDS),
     client: Client = Depends(get_temporal_client),
     db=Depends(get_db),
 ):
-    """Get specific application details"""
+    """Get specific application details.
+
+    Supports If-None-Match (304 when unchanged) and ?wait=N to hold the
+    request until the application's workflow state version changes.
+    """
     application = get_application(db, application_id)
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
 
+    etag = _application_etag(application)
+    if wait and _etag_matches(request, etag):
+        with request.app.state.change_feed.subscribe(application_id) as waiter:
+            current = get_application_version(db, application_id)
+            if current == application.state_version:
+                await wait_for_change(waiter, wait)
+        application = get_application(db, application_id)
+        etag = _application_etag(application)
+
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    _set_etag(response, etag)
+    if application.state_version:
+        return await _build_response(client, application)
+
     try:
         handle = client.get_workflow_handle(f"job-app-{application_id}")
         status = await handle.query(JobApplicationWorkflow.get_current_status)
@@ -174,16 +424,41 @@ async def update_application_status(
     application_id: str,
     status_update: StatusUpdate,
     client: Client = Depends(get_temporal_client),
+    db=Depends(get_db),
 ):
-    """Update application status via Temporal signal"""
+    """Update application status via Temporal signal, or in the database once
+    the workflow has handed its deadline to the scheduler"""
+    try:
+        status = ApplicationStatus(status_update.status)
+    except ValueError:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown status {status_update.status}"
+        )
+
     try:
+        if set_scheduled_application_status(db, application_id, status.value):
+            return {"message": "Status updated successfully"}
+
         handle = client.get_workflow_handle(f"job-app-{application_id}")
         await handle.signal(
             JobApplicationWorkflow.update_status,
-            ApplicationStatus(status_update.status),
+            status,
         )
 
         return {"message": "Status updated successfully"}
+    except RPCError as e:
+        if e.status != RPCStatusCode.NOT_FOUND:
+            logger.error(f"Error updating status for {application_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        # The workflow closed since the check, typically right after handing
+        # off its deadline: the database owns the status now
+        if set_scheduled_application_status(db, application_id, status.value):
+            return {"message": "Status updated successfully"}
+        if get_application_version(db, application_id) is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        raise HTTPException(
+            status_code=409, detail="Application workflow is no longer running"
+        )
     except Exception as e:
         logger.error(f"Error updating status for {application_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -191,9 +466,33 @@ async def update_application_status(
 
 @router.get("/{application_id}/cover-letter")
 async def get_cover_letter(
-    application_id: str, client: Client = Depends(get_temporal_client)
+    application_id: str,
+    request: Request,
+    response: Response,
+    client: Client = Depends(get_temporal_client),
+    db=Depends(get_db),
 ):
-    """Get generated cover letter"""
+    """Get the current cover letter, from the database when stored there"""
+    stored = get_current_cover_letter(db, application_id)
+    if stored:
+        etag = _cover_letter_etag(stored)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        _set_etag(response, etag)
+        return {
+            "cover_letter": stored.cover_letter,
+            "version": stored.version,
+            "score": stored.score,
+        }
+
+    # Letters generated before cover_letters existed live in workflow state.
+    # They only change with that state, so its version is a valid validator
+    # and a match skips the Temporal query entirely
+    version = get_application_version(db, application_id)
+    etag = f'W/"cover-letter:{application_id}:{version}"' if version else None
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
     try:
         handle = client.get_workflow_handle(f"job-app-{application_id}")
         cover_letter = await handle.query(JobApplicationWorkflow.get_cover_letter)
@@ -203,7 +502,182 @@ async def get_cover_letter(
                 status_code=404, detail="Cover letter not yet generated"
             )
 
+        _set_etag(response, etag)
         return {"cover_letter": cover_letter}
     except Exception as e:
         logger.error(f"Error getting cover letter for {application_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _stored_candidates(db, application_id: str) -> Optional[CoverLetterCandidates]:
+    """Current letter plus every other stored version (newest first) as alternates"""
+    versions = get_cover_letter_versions(db, application_id)
+    current = next((v for v in versions if v.is_current), None)
+    if not current:
+        return None
+
+    return CoverLetterCandidates(
+        cover_letter=current.cover_letter,
+        score=current.score,
+        version=current.version,
+        alternates=[
+            CoverLetterCandidate(
+                cover_letter=v.cover_letter, score=v.score, version=v.version
+            )
+            for v in versions
+            if not v.is_current
+        ],
+    )
+
+
+@router.get(
+    "/{application_id}/cover-letter/versions", response_model=List[CoverLetterVersion]
+)
+async def list_cover_letter_versions(application_id: str, db=Depends(get_db)):
+    """Every stored cover letter version, newest first"""
+    return get_cover_letter_versions(db, application_id)
+
+
+@router.get(
+    "/{application_id}/cover-letter/versions/{version}",
+    response_model=CoverLetterVersion,
+)
+async def get_cover_letter_version_detail(
+    application_id: str,
+    version: int,
+    request: Request,
+    response: Response,
+    db=Depends(get_db),
+):
+    """One stored version; immutable, so clients may cache it indefinitely"""
+    stored = get_cover_letter_version(db, application_id, version)
+    if not stored:
+        raise HTTPException(status_code=404, detail="Cover letter version not found")
+
+    etag = _cover_letter_etag(stored)
+    if _etag_matches(request, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+        )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return stored
+
+
+@router.post("/{application_id}/cover-letter/versions/{version}/select")
+async def select_cover_letter_version(
+    application_id: str, version: int, db=Depends(get_db)
+):
+    """Make a stored version the current cover letter"""
+    if not set_current_cover_letter(db, application_id, version):
+        raise HTTPException(status_code=404, detail="Cover letter version not found")
+    return {"message": "Cover letter version selected", "version": version}
+
+
+@router.post("/{application_id}/cover-letter/regenerate", status_code=202)
+async def regenerate_cover_letter(
+    application_id: str,
+    request_data: Optional[RegenerateRequest] = None,
+    client: Client = Depends(get_temporal_client),
+    db=Depends(get_db),
+):
+    """Generate new cover letter versions in a separate lightweight workflow"""
+    application = get_application(db, application_id)
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    workflow_data = _workflow_data(application)
+    if request_data and request_data.candidate_count:
+        workflow_data.candidate_count = request_data.candidate_count
+
+    try:
+        handle = await client.start_workflow(
+            CoverLetterWorkflow.run,
+            workflow_data,
+            id=f"cover-letter-{application_id}",
+            task_queue="job-applications",
+        )
+    except WorkflowAlreadyStartedError:
+        raise HTTPException(
+            status_code=409, detail="Cover letter regeneration already in progress"
+        )
+
+    return {"message": "Cover letter regeneration started", "workflow_id": handle.id}
+
+
+@router.get(
+    "/{application_id}/cover-letter/alternates", response_model=CoverLetterCandidates
+)
+async def get_cover_letter_alternates(
+    application_id: str,
+    client: Client = Depends(get_temporal_client),
+    db=Depends(get_db),
+):
+    """Current cover letter with its score, plus the alternates to switch to"""
+    stored = _stored_candidates(db, application_id)
+    if stored:
+        return stored
+
+    try:
+        handle = client.get_workflow_handle(f"job-app-{application_id}")
+        candidates = await handle.query(
+            JobApplicationWorkflow.get_cover_letter_candidates
+        )
+    except Exception as e:
+        logger.error(f"Error getting alternates for {application_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not candidates["cover_letter"]:
+        raise HTTPException(status_code=404, detail="Cover letter not yet generated")
+    return candidates
+
+
+@router.post(
+    "/{application_id}/cover-letter/alternates/{index}/select",
+    response_model=CoverLetterCandidate,
+)
+async def select_cover_letter_alternate(
+    application_id: str,
+    index: int,
+    client: Client = Depends(get_temporal_client),
+    db=Depends(get_db),
+):
+    """Make an alternate the current cover letter, without another LLM call"""
+    stored = _stored_candidates(db, application_id)
+    if stored:
+        if not 0 <= index < len(stored.alternates):
+            raise HTTPException(status_code=404, detail="Alternate not found")
+        selected = stored.alternates[index]
+        set_current_cover_letter(db, application_id, selected.version)
+        return selected
+
+    try:
+        handle = client.get_workflow_handle(f"job-app-{application_id}")
+        candidates = await handle.query(
+            JobApplicationWorkflow.get_cover_letter_candidates
+        )
+    except Exception as e:
+        logger.error(f"Error getting alternates for {application_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not 0 <= index < len(candidates["alternates"]):
+        raise HTTPException(status_code=404, detail="Alternate not found")
+
+    try:
+        await handle.signal(JobApplicationWorkflow.select_alternate, index)
+    except Exception as e:
+        logger.error(f"Error selecting alternate for {application_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return candidates["alternates"][index]
+
+
+@router.get("/{application_id}/generation-runs", response_model=List[GenerationRun])
+async def list_generation_runs(application_id: str, db=Depends(get_db)):
+    """LLM attempts made for this application, with tokens, latency and cost"""
+    application = get_application(db, application_id)
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    return get_generation_runs(db, application_id)
@@ -1,9 +1,142 @@
-from fastapi import APIRouter, Depends, Request
-from temporalio.client import Client
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from temporalio.api.workflowservice.v1 import GetSystemInfoRequest
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Tuple
+import asyncio
+import logging
 import os
+import time
 
+from app.models.database import get_db
+from app.scaling import (
+    describe_generation_queue,
+    describe_task_queue,
+    recommend_replicas,
+)
+from app.workflows.generation_scheduler import (
+    GenerationSchedulerWorkflow,
+    GENERATION_SCHEDULER_ID,
+)
+
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Probe results are reused for this long so load balancer traffic never
+# reaches Temporal or Postgres more than once per TTL
+HEALTH_CACHE_TTL_SECONDS = float(os.getenv("HEALTH_CACHE_TTL_SECONDS", "5"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+
+FAIR_SCHEDULING = os.getenv("FAIR_SCHEDULING", "false").lower() == "true"
+
+TEMPORAL_UNHEALTHY = {"status": "unhealthy", "temporal": "disconnected"}
+TASK_QUEUE_UNAVAILABLE = {"status": "unhealthy", "task_queue": "unavailable"}
+DATABASE_UNHEALTHY = {"status": "unhealthy", "database": "disconnected"}
+GENERATION_QUEUE_UNAVAILABLE = {"status": "unhealthy", "scheduler": "unavailable"}
+
+_cache: Dict[str, Tuple[float, dict]] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def _cached(
+    name: str, check: Callable[[], Awaitable[dict]], unhealthy: dict
+) -> dict:
+    """Run a dependency check at most once per TTL, coalescing concurrent probes"""
+    cached = _cache.get(name)
+    if cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL_SECONDS:
+        return cached[1]
+
+    lock = _locks.setdefault(name, asyncio.Lock())
+    async with lock:
+        cached = _cache.get(name)
+        if cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL_SECONDS:
+            return cached[1]
+
+        try:
+            result = await asyncio.wait_for(check(), HEALTH_CHECK_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            result = {**unhealthy, "error": "Health check timed out"}
+        except Exception as e:
+            result = {**unhealthy, "error": str(e)}
+
+        _cache[name] = (time.monotonic(), result)
+        return result
+
+
+async def check_temporal(request: Request) -> dict:
+    """Single GetSystemInfo RPC instead of a namespace-wide visibility scan"""
+    client = getattr(request.app.state, "temporal_client", None)
+    if client is None:
+        return {**TEMPORAL_UNHEALTHY, "error": "No Temporal client configured"}
+
+    await client.workflow_service.get_system_info(
+        GetSystemInfoRequest(),
+        timeout=timedelta(seconds=HEALTH_CHECK_TIMEOUT_SECONDS),
+    )
+    return {"status": "healthy", "temporal": "connected"}
+
+
+async def check_database() -> dict:
+    """SELECT 1 on a pooled connection, run off the event loop"""
+    # Gives up with the probe's timeout, so the thread is not left waiting
+    # on a saturated pool after wait_for abandons it
+    connected = await asyncio.to_thread(get_db().ping, HEALTH_CHECK_TIMEOUT_SECONDS)
+    if connected:
+        return {"status": "healthy", "database": "connected"}
+    return DATABASE_UNHEALTHY
+
+
+async def check_task_queue(request: Request) -> dict:
+    """Task-queue backlog per type plus the worker replica recommendation
+
+    With FAIR_SCHEDULING the generations queued at the scheduler count too;
+    if the scheduler cannot be queried the recommendation goes without them.
+    """
+    client = getattr(request.app.state, "temporal_client", None)
+    if client is None:
+        return {**TASK_QUEUE_UNAVAILABLE, "error": "No Temporal client configured"}
+
+    timeout = timedelta(seconds=HEALTH_CHECK_TIMEOUT_SECONDS)
+    queues = await describe_task_queue(client, timeout=timeout)
+    generations = None
+    if FAIR_SCHEDULING:
+        try:
+            generations = await describe_generation_queue(client, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Generation queue unavailable for scaling: {e}")
+    return {
+        "status": "healthy",
+        "queues": queues,
+        "generations": generations,
+        "scaling": recommend_replicas(queues, generations),
+    }
+
+
+async def check_generation_queue(request: Request) -> dict:
+    """Slots in use and per-user queue depth from the generation scheduler"""
+    client = getattr(request.app.state, "temporal_client", None)
+    if client is None:
+        return {
+            **GENERATION_QUEUE_UNAVAILABLE,
+            "error": "No Temporal client configured",
+        }
+
+    snapshot = await client.get_workflow_handle(GENERATION_SCHEDULER_ID).query(
+        GenerationSchedulerWorkflow.snapshot
+    )
+    return {"status": "healthy", **snapshot}
+
+
+async def temporal_status(request: Request) -> dict:
+    return await _cached(
+        "temporal", lambda: check_temporal(request), TEMPORAL_UNHEALTHY
+    )
+
+
+async def database_status() -> dict:
+    return await _cached("database", check_database, DATABASE_UNHEALTHY)
+
+
 @router.get("/")
 async def health_check():
     """Basic health check endpoint"""
@@ -13,16 +146,60 @@ async def health_check():
         "app_version": os.getenv("APP_VERSION", "1.0.0")
     }
 
+
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and serving, no dependency checks"""
+    return {"status": "healthy"}
+
+
+@router.get("/ready")
+async def readiness(request: Request):
+    """Readiness probe: Temporal and Postgres reachable (cached for a short TTL)"""
+    temporal, database = await asyncio.gather(
+        temporal_status(request), database_status()
+    )
+    ready = temporal["status"] == "healthy" and database["status"] == "healthy"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "healthy" if ready else "unhealthy",
+            "checks": {"temporal": temporal, "database": database},
+        },
+    )
+
+
 @router.get("/temporal")
 async def temporal_health(request: Request):
     """Check Temporal connection health"""
-    try:
-        client = getattr(request.app.state, 'temporal_client', None)
-        if client is None:
-            return {"status": "unhealthy", "temporal": "disconnected", "error": "No Temporal client configured"}
-        
-        # Simple connection test
-        await client.list_workflows()
-        return {"status": "healthy", "temporal": "connected"}
-    except Exception as e:
-        return {"status": "unhealthy", "temporal": "disconnected", "error": str(e)}
\ No newline at end of file
+    return await temporal_status(request)
+
+
+@router.get("/database")
+async def database_health():
+    """Check database connection health"""
+    return await database_status()
+
+
+@router.get("/task-queue")
+async def task_queue_backlog(request: Request):
+    """Task-queue backlog and desired worker replicas, for autoscalers"""
+    result = await _cached(
+        "task_queue", lambda: check_task_queue(request), TASK_QUEUE_UNAVAILABLE
+    )
+    return JSONResponse(
+        status_code=200 if result["status"] == "healthy" else 503, content=result
+    )
+
+
+@router.get("/generation-queue")
+async def generation_queue(request: Request):
+    """Fair-scheduling queue per lane and per user (FAIR_SCHEDULING=true)"""
+    result = await _cached(
+        "generation_queue",
+        lambda: check_generation_queue(request),
+        GENERATION_QUEUE_UNAVAILABLE,
+    )
+    return JSONResponse(
+        status_code=200 if result["status"] == "healthy" else 503, content=result
+    )
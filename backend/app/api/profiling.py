@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
+
+from app.profiling import (
+    PROFILE_MAX_SECONDS,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    PROFILING_TOKEN,
+    SLOW_CAPTURE,
+    ProfilerBusy,
+    collapsed,
+    memory_snapshot,
+    sample_stacks,
+    token_valid,
+)
+
+
+def require_profiling_token(
+    x_profiling_token: Optional[str] = Header(None),
+):
+    """The admin surface is off (404) without PROFILING_TOKEN configured"""
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not token_valid(x_profiling_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_token)])
+
+
+@router.get("/cpu", response_class=PlainTextResponse)
+async def cpu_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(PROFILE_SAMPLE_INTERVAL_MS, ge=1, le=1000),
+):
+    """Sampled stacks of every thread in this process, as collapsed stacks"""
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return collapsed(stacks)
+
+
+@router.get("/memory")
+async def memory_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    limit: int = Query(25, ge=1, le=500),
+):
+    """Allocations that grew during the window, by source line"""
+    try:
+        return await asyncio.to_thread(memory_snapshot, seconds, limit)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/slow")
+async def slow_captures():
+    """Profiles captured for slow requests, newest first"""
+    return SLOW_CAPTURE.list()
+
+
+@router.get("/slow/{capture_id}", response_class=PlainTextResponse)
+async def slow_capture(capture_id: int):
+    """One slow request's profile as collapsed stacks"""
+    capture = SLOW_CAPTURE.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Capture not found or evicted")
+    return collapsed(capture["stacks"])
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+import asyncio
+import hashlib
+import logging
+
+from app.models.application import ResumeUpload
+from app.models.database import get_db, get_resume_upload, save_resume_upload
+from app.resume_parsing import (
+    RESUME_UPLOAD_MAX_BYTES,
+    ParserBusy,
+    ResumeParser,
+    UnsupportedResume,
+    detect_kind,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+parser = ResumeParser()
+
+
+@router.post("/", response_model=ResumeUpload)
+async def upload_resume(file: UploadFile = File(...), db=Depends(get_db)):
+    """Upload a PDF, DOCX or text resume and get its normalized text.
+
+    Files are keyed by sha256, so a file uploaded before (by anyone) is not
+    parsed again. Pass the returned file_hash as resume_file_hash when
+    creating applications to reuse the text.
+    """
+    data = await file.read(RESUME_UPLOAD_MAX_BYTES + 1)
+    if len(data) > RESUME_UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Resume files are limited to {RESUME_UPLOAD_MAX_BYTES} bytes",
+        )
+    file_hash = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+
+    stored = get_resume_upload(db, file_hash)
+    if stored is not None:
+        return stored
+
+    try:
+        kind = detect_kind(file.filename, data)
+        text = await parser.parse(file_hash, data, kind)
+    except UnsupportedResume as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ParserBusy as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "5"}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=422, detail="Resume took too long to parse")
+    except Exception as e:
+        logger.warning(f"Failed to parse resume {file.filename}: {e}")
+        raise HTTPException(status_code=422, detail="Could not read the resume file")
+    if not text:
+        # Typically a scanned PDF without a text layer
+        raise HTTPException(status_code=422, detail="No text found in the resume file")
+
+    upload = ResumeUpload(
+        file_hash=file_hash,
+        filename=file.filename,
+        content_type=file.content_type,
+        size_bytes=len(data),
+        text=text,
+    )
+    save_resume_upload(db, upload)
+    return upload
+
+
+@router.get("/{file_hash}", response_model=ResumeUpload)
+async def get_resume(file_hash: str, db=Depends(get_db)):
+    """Text of a previously uploaded resume"""
+    stored = get_resume_upload(db, file_hash)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return stored
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+
+from app.models.application import GenerationGroupBy, GenerationStats
+from app.models.database import get_db, get_generation_stats
+
+router = APIRouter()
+
+
+@router.get("/generation", response_model=List[GenerationStats])
+async def generation_stats(
+    group_by: GenerationGroupBy = "day",
+    days: int = Query(30, ge=1, le=365),
+    db=Depends(get_db),
+):
+    """p50/p95 latency, tokens and spend of LLM generations by day, model or path"""
+    return get_generation_stats(db, group_by, days)
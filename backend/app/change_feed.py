@@ -0,0 +1,165 @@
+"""
+LISTEN/NOTIFY change feed that wakes long-polling requests when an
+application's workflow state version changes.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional, Set
+
+from app.models.database import CHANGE_CHANNEL, Database
+from app.profiling import SLOW_CAPTURE
+
+logger = logging.getLogger(__name__)
+
+# Subscription key that is woken by a change to any application
+ANY_APPLICATION = "*"
+
+# Delay before re-opening a lost LISTEN connection, doubled per failed attempt
+RECONNECT_INITIAL_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 30.0
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.listener: Optional[Database] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fileno: Optional[int] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._waiters: Dict[str, Set[asyncio.Future]] = defaultdict(set)
+
+    def start(self):
+        """Open a dedicated autocommit connection and LISTEN on the event loop.
+
+        If the database is unreachable, keeps retrying in the background;
+        long polls run to their timeout meanwhile.
+        """
+        self.loop = asyncio.get_running_loop()
+        try:
+            self._attach(self._open_listener())
+        except Exception as e:
+            logger.warning(f"Change feed unavailable: {e}")
+            self._schedule_reconnect()
+
+    def stop(self):
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        self._drop_listener()
+        for waiters in self._waiters.values():
+            for waiter in waiters:
+                waiter.cancel()
+        self._waiters.clear()
+
+    @staticmethod
+    def _open_listener(max_retries: int = 3) -> Database:
+        listener = Database()
+        listener.connect(max_retries=max_retries)
+        try:
+            listener.conn.autocommit = True
+            with listener.conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANGE_CHANNEL}")
+        except Exception:
+            listener.close()
+            raise
+        return listener
+
+    def _attach(self, listener: Database):
+        self.listener = listener
+        self._fileno = listener.conn.fileno()
+        self.loop.add_reader(self._fileno, self._on_readable)
+        logger.info(f"Listening for application changes on {CHANGE_CHANNEL}")
+
+    def _drop_listener(self):
+        if self._fileno is not None:
+            self.loop.remove_reader(self._fileno)
+            self._fileno = None
+        if self.listener is not None:
+            try:
+                self.listener.close()
+            except Exception:
+                pass
+            self.listener = None
+
+    def _on_readable(self):
+        conn = self.listener.conn
+        try:
+            conn.poll()
+        except Exception as e:
+            logger.error(f"Change feed connection failed: {e}")
+            self._drop_listener()
+            # Changes are missed until the feed is back: have every waiter
+            # re-check now instead of sitting out its timeout
+            self._wake_all()
+            self._schedule_reconnect()
+            return
+
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            self._wake(notify.payload)
+            self._wake(ANY_APPLICATION)
+
+    def _schedule_reconnect(self):
+        if self._reconnect is None or self._reconnect.done():
+            self._reconnect = self.loop.create_task(self._reconnect_with_backoff())
+
+    async def _reconnect_with_backoff(self):
+        delay = RECONNECT_INITIAL_SECONDS
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                # Off the loop: connect() blocks, and backing off is done here
+                listener = await asyncio.to_thread(self._open_listener, 1)
+            except Exception as e:
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+                logger.warning(
+                    f"Change feed reconnect failed, retrying in {delay:g}s: {e}"
+                )
+                continue
+            self._attach(listener)
+            # Changes made while disconnected were never notified
+            self._wake_all()
+            return
+
+    def _wake(self, key: str):
+        for waiter in self._waiters.pop(key, ()):
+            if not waiter.done():
+                waiter.set_result(True)
+
+    def _wake_all(self):
+        for key in list(self._waiters):
+            self._wake(key)
+
+    @contextmanager
+    def subscribe(self, key: str):
+        """Future resolved on the next change to `key`.
+
+        Subscribe *before* re-checking the version so a change landing in
+        between is not missed.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[key].add(waiter)
+        try:
+            yield waiter
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+
+async def wait_for_change(waiter: asyncio.Future, timeout: float) -> bool:
+    """True if a change arrived before the timeout
+
+    The wait is parked time for slow-request capture, so long polls are only
+    captured when they are slow outside of it.
+    """
+    try:
+        with SLOW_CAPTURE.parked():
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
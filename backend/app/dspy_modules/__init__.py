@@ -1,19 +1,24 @@
 """
 DSPy modules for systematic prompt optimization.
+
+Exports resolve lazily, so importing a light submodule such as
+app.dspy_modules.scoring does not load DSPy.
 """
 
-from .cover_letter import (
-    CoverLetterSignature,
-    CoverLetterGenerator, 
-    CoverLetterOptimizer,
-    cover_letter_quality_metric,
-    get_cover_letter_optimizer
-)
+import importlib
+
+_EXPORTS = {
+    "CoverLetterSignature": ".cover_letter",
+    "CoverLetterGenerator": ".cover_letter",
+    "CoverLetterOptimizer": ".cover_letter",
+    "cover_letter_quality_metric": ".cover_letter",
+    "get_cover_letter_optimizer": ".cover_letter",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    "CoverLetterSignature",
-    "CoverLetterGenerator",
-    "CoverLetterOptimizer", 
-    "cover_letter_quality_metric",
-    "get_cover_letter_optimizer"
-]
\ No newline at end of file
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
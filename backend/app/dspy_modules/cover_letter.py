@@ -3,11 +3,60 @@ DSPy module for cover letter generation with systematic prompt optimization.
 """
 
 import dspy
-from typing import Dict, Any
+from dsp.modules.google import BLOCK_ONLY_HIGH
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Dict, Any, Iterator, List, Optional
 import logging
+import threading
+
+from app.llm_stack import get_genai
+from app.observability import record_llm_usage
+from .prompt_cache import (
+    PROMPT_PREFIX_CACHE,
+    PromptPrefixCache,
+    program_version,
+    split_prompt,
+)
+from .scoring import PROFESSIONAL_PHRASES, letter_features
 
 logger = logging.getLogger(__name__)
 
+USAGE_FIELDS = (
+    "prompt_token_count",
+    "candidates_token_count",
+    "cached_content_token_count",
+)
+
+# Per thread: LMs are shared by every activity thread, so their history
+# interleaves requests of concurrent generations
+_usage = threading.local()
+
+
+@contextmanager
+def collect_usage() -> Iterator[SimpleNamespace]:
+    """Token counts summed over the Gemini requests this thread makes in the block.
+
+    Yields a usage_metadata-like namespace, filled in as requests complete.
+    """
+    total = SimpleNamespace(**dict.fromkeys(USAGE_FIELDS, 0))
+    outer = getattr(_usage, "total", None)
+    _usage.total = total
+    try:
+        yield total
+    finally:
+        _usage.total = outer
+
+
+def _record_usage(usage_metadata: Optional[Any]):
+    record_llm_usage("dspy", usage_metadata)
+    total = getattr(_usage, "total", None)
+    if total is None or usage_metadata is None:
+        return
+    for field in USAGE_FIELDS:
+        added = getattr(usage_metadata, field, 0) or 0
+        setattr(total, field, getattr(total, field) + added)
+
 
 class CoverLetterSignature(dspy.Signature):
     """Generate a professional cover letter that matches job requirements and showcases relevant experience."""
@@ -15,13 +64,76 @@ class CoverLetterSignature(dspy.Signature):
     company: str = dspy.InputField(desc="Company name applying to")
     role: str = dspy.InputField(desc="Job position title")
     job_description: str = dspy.InputField(desc="Job requirements and responsibilities")
-    resume: str = dspy.InputField(desc="Candidate's background, skills, and experience")
+    resume_profile: str = dspy.InputField(desc="Compact candidate profile: skills, roles, achievements and keywords")
     
     cover_letter: str = dspy.OutputField(
         desc="Professional cover letter (300-400 words) showing enthusiasm, relevant experience, and fit for the role"
     )
 
 
+class GeminiLM(dspy.Google):
+    """Gemini client that returns all `n` completions from a single request.
+
+    With a prefix cache, the static prompt prefix (instructions and demos) is
+    served from Gemini context caching and only the current input is sent.
+    """
+    
+    def __init__(self, model: str, api_key: Optional[str] = None, safety_settings=BLOCK_ONLY_HIGH, prefix_cache: bool = PROMPT_PREFIX_CACHE, **kwargs):
+        super().__init__(model=model, api_key=api_key, safety_settings=safety_settings, **kwargs)
+        # Rebuilt from get_genai() so LLM_STUB also covers DSPy calls
+        self.genai = get_genai()
+        self.safety_settings = safety_settings
+        self.llm = self.genai.GenerativeModel(model_name=model, generation_config=self.config, safety_settings=safety_settings)
+        self.prefix_cache = PromptPrefixCache(self.genai, model) if prefix_cache else None
+    
+    def basic_request(self, prompt: str, **kwargs):
+        cached_content = None
+        if self.prefix_cache is not None:
+            prefix, suffix = split_prompt(prompt)
+            cached_content = self.prefix_cache.get(prefix)
+        if cached_content is None:
+            response = super().basic_request(prompt, **kwargs)
+            _record_usage(getattr(response, "usage_metadata", None))
+            return response
+        
+        # Same argument handling as dspy.Google.basic_request
+        raw_kwargs = kwargs
+        kwargs = {**self.kwargs, **kwargs}
+        n = kwargs.pop("n", None)
+        if n is not None and n > 1 and kwargs["temperature"] == 0.0:
+            kwargs["temperature"] = 0.7
+        
+        model = self.genai.GenerativeModel.from_cached_content(
+            cached_content,
+            generation_config=self.config,
+            safety_settings=self.safety_settings,
+        )
+        response = model.generate_content(suffix, generation_config=kwargs)
+        _record_usage(getattr(response, "usage_metadata", None))
+        
+        self.history.append({
+            "prompt": prompt,
+            "response": [response],
+            "kwargs": kwargs,
+            "raw_kwargs": raw_kwargs,
+        })
+        return response
+    
+    def __call__(self, prompt: str, only_completed: bool = True, return_sorted: bool = False, **kwargs):
+        assert only_completed, "for now"
+        assert return_sorted is False, "for now"
+        
+        # Gemini samples several candidates per call via candidate_count, where
+        # dspy.Google would issue one request per completion
+        n = kwargs.pop("n", 1)
+        response = self.request(prompt, candidate_count=n, **kwargs)
+        return [
+            candidate.content.parts[0].text
+            for candidate in response.candidates
+            if candidate.content.parts
+        ]
+
+
 class CoverLetterGenerator(dspy.Module):
     """DSPy module for generating optimized cover letters."""
     
@@ -29,13 +141,14 @@ class CoverLetterGenerator(dspy.Module):
         super().__init__()
         self.generate = dspy.ChainOfThought(CoverLetterSignature)
     
-    def forward(self, company: str, role: str, job_description: str, resume: str) -> dspy.Prediction:
+    def forward(self, company: str, role: str, job_description: str, resume_profile: str, config: Optional[dict] = None) -> dspy.Prediction:
         """Generate a cover letter using DSPy chain of thought reasoning."""
         return self.generate(
             company=company,
             role=role, 
             job_description=job_description,
-            resume=resume
+            resume_profile=resume_profile,
+            config=config or {}
         )
 
 
@@ -48,10 +161,16 @@ def cover_letter_quality_metric(example, prediction, trace=None) -> float:
     if not hasattr(prediction, 'cover_letter') or not prediction.cover_letter:
         return 0.0
     
-    cover_letter = prediction.cover_letter.strip()
+    # Lowercase, split and phrase-match the letter once (see scoring.py)
+    word_count, company_mentioned, role_mentioned, phrase_count, paragraph_count = (
+        letter_features(
+            prediction.cover_letter,
+            getattr(example, 'company', None),
+            getattr(example, 'role', None),
+        )
+    )
     
     # Word count check (300-400 words optimal)
-    word_count = len(cover_letter.split())
     if 300 <= word_count <= 400:
         word_score = 1.0
     elif word_count < 200:
@@ -62,21 +181,11 @@ def cover_letter_quality_metric(example, prediction, trace=None) -> float:
         # Gradually decrease score as we move away from optimal range
         word_score = max(0.6, 1 - abs(350 - word_count) / 200)
     
-    # Company and role mention check
-    company_mentioned = example.company.lower() in cover_letter.lower() if hasattr(example, 'company') else 0
-    role_mentioned = example.role.lower() in cover_letter.lower() if hasattr(example, 'role') else 0
-    
     # Professional language indicators
-    professional_phrases = [
-        "i am excited", "i am passionate", "i would like to", "i am writing to",
-        "i believe", "my experience", "i have", "i would bring", "thank you"
-    ]
-    professional_score = sum(1 for phrase in professional_phrases 
-                           if phrase in cover_letter.lower()) / len(professional_phrases)
+    professional_score = phrase_count / len(PROFESSIONAL_PHRASES)
     
     # Structure check (basic paragraph structure)
-    paragraphs = [p.strip() for p in cover_letter.split('\n\n') if p.strip()]
-    structure_score = min(1.0, len(paragraphs) / 3)  # Expect 3+ paragraphs
+    structure_score = min(1.0, paragraph_count / 3)  # Expect 3+ paragraphs
     
     # Combine scores
     total_score = (
@@ -95,6 +204,11 @@ class CoverLetterOptimizer:
     
     def __init__(self, model_name: str = "gemini-1.5-flash"):
         self.model_name = model_name
+        self.api_key = None
+        self.lm = None
+        # One LM per model tier the router sends requests to
+        self.lms: Dict[str, GeminiLM] = {}
+        self._lms_lock = threading.Lock()
         self.generator = None
         self.optimized_generator = None
     
@@ -102,17 +216,41 @@ class CoverLetterOptimizer:
         """Setup the language model for DSPy."""
         try:
             # Configure DSPy with Gemini
-            lm = dspy.Google(model=self.model_name, api_key=api_key)
-            dspy.settings.configure(lm=lm)
+            self.api_key = api_key
+            self.lm = GeminiLM(model=self.model_name, api_key=api_key)
+            self.lms = {self.model_name: self.lm}
+            dspy.settings.configure(lm=self.lm)
             
             # Initialize generator
             self.generator = CoverLetterGenerator()
+            self._bind_prefix_cache(self.generator)
             logger.info(f"DSPy configured with {self.model_name}")
             
         except Exception as e:
             logger.error(f"Failed to setup DSPy model: {e}")
             raise
     
+    def lm_for(self, model_name: Optional[str] = None) -> GeminiLM:
+        """The LM for `model_name` (default: the compiling model), created on first use."""
+        if model_name is None or model_name == self.model_name:
+            return self.lm
+        
+        with self._lms_lock:
+            lm = self.lms.get(model_name)
+            if lm is None:
+                lm = GeminiLM(model=model_name, api_key=self.api_key)
+                generator = self.optimized_generator or self.generator
+                if lm.prefix_cache is not None and generator is not None:
+                    lm.prefix_cache.bind(program_version(generator))
+                self.lms[model_name] = lm
+            return lm
+    
+    def _bind_prefix_cache(self, program: CoverLetterGenerator):
+        """Tie cached prompt prefixes to the program now serving requests."""
+        for lm in list(self.lms.values()):
+            if lm.prefix_cache is not None:
+                lm.prefix_cache.bind(program_version(program))
+    
     def create_training_examples(self) -> list:
         """Create sample training examples for optimization."""
         examples = [
@@ -120,7 +258,7 @@ class CoverLetterOptimizer:
                 company="TechCorp",
                 role="Software Engineer",
                 job_description="Develop scalable web applications using Python and React. 5+ years experience required.",
-                resume="Senior Software Engineer with 6 years experience in Python, React, and cloud technologies.",
+                resume_profile="Skills: Python, React, cloud technologies\nRoles: Senior Software Engineer (6 years)",
                 cover_letter="""Dear Hiring Manager,
 
 I am excited to apply for the Software Engineer position at TechCorp. With over 6 years of experience developing scalable web applications using Python and React, I am confident I would be a valuable addition to your team.
@@ -139,7 +277,7 @@ Best regards,
                 company="DataInc",
                 role="Data Scientist", 
                 job_description="Analyze large datasets and build ML models. PhD in Statistics or related field preferred.",
-                resume="PhD in Statistics with 4 years experience in machine learning and data analysis.",
+                resume_profile="Skills: statistics, machine learning, data analysis\nRoles: Data Scientist (4 years)\nAchievements: PhD in Statistics",
                 cover_letter="""Dear DataInc Hiring Team,
 
 I am writing to express my strong interest in the Data Scientist position at DataInc. With a PhD in Statistics and 4 years of hands-on experience in machine learning and data analysis, I am well-prepared to contribute to your data science initiatives.
@@ -178,6 +316,7 @@ Sincerely,
                 self.generator,
                 trainset=training_examples
             )
+            self._bind_prefix_cache(self.optimized_generator)
             
             logger.info("DSPy cover letter generator optimized successfully")
             return self.optimized_generator
@@ -187,7 +326,19 @@ Sincerely,
             # Return non-optimized generator as fallback
             return self.generator
     
-    def generate_cover_letter(self, company: str, role: str, job_description: str, resume: str) -> str:
+    def load_optimized(self, path: str) -> CoverLetterGenerator:
+        """Load a program compiled offline by app.dspy_modules.optimization."""
+        if not self.generator:
+            raise ValueError("Model must be setup first using setup_model()")
+        
+        program = CoverLetterGenerator()
+        program.load(path)
+        self.optimized_generator = program
+        self._bind_prefix_cache(program)
+        logger.info(f"Loaded optimized DSPy program from {path}")
+        return program
+    
+    def generate_cover_letter(self, company: str, role: str, job_description: str, resume_profile: str) -> str:
         """Generate a cover letter using the optimized or base generator."""
         generator = self.optimized_generator if self.optimized_generator else self.generator
         
@@ -199,7 +350,7 @@ Sincerely,
                 company=company,
                 role=role,
                 job_description=job_description,
-                resume=resume
+                resume_profile=resume_profile
             )
             
             return result.cover_letter
@@ -208,6 +359,33 @@ Sincerely,
             logger.error(f"DSPy cover letter generation failed: {e}")
             raise
 
+    
+    def generate_cover_letter_candidates(self, company: str, role: str, job_description: str, resume_profile: str, n: int, model_name: Optional[str] = None) -> List[str]:
+        """Sample `n` cover letters from one LM call (higher temperature when n > 1).
+        
+        `model_name` runs the same compiled program on another model tier.
+        """
+        generator = self.optimized_generator if self.optimized_generator else self.generator
+        
+        if not generator:
+            raise ValueError("Generator not initialized. Call setup_model() first.")
+        
+        try:
+            with dspy.context(lm=self.lm_for(model_name)):
+                result = generator(
+                    company=company,
+                    role=role,
+                    job_description=job_description,
+                    resume_profile=resume_profile,
+                    config={"n": n}
+                )
+            
+            return [letter for letter in result.completions.cover_letter if letter]
+            
+        except Exception as e:
+            logger.error(f"DSPy cover letter generation failed: {e}")
+            raise
+
 
 # Global optimizer instance
 _cover_letter_optimizer = None
@@ -0,0 +1,456 @@
+"""
+Offline optimization and evaluation sweep for the cover letter generator.
+
+Loads a dataset (JSONL file or the applications table), compiles one
+BootstrapFewShot program per demos configuration and scores each on a
+held-out split, running candidates and evaluations in parallel. Every LM
+call goes through an on-disk cache, so re-running a sweep only pays for
+prompts it has not seen before.
+
+    python -m app.dspy_modules.optimization --dataset examples.jsonl \\
+        --bootstrapped 0,2,4 --labeled 0,2 --workers 4 --eval-threads 8
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import dspy
+
+from .cover_letter import (
+    CoverLetterGenerator,
+    GeminiLM,
+    cover_letter_quality_metric,
+)
+from .scoring import score_batch
+
+logger = logging.getLogger(__name__)
+
+INPUT_FIELDS = ("company", "role", "job_description", "resume_profile")
+
+DEFAULT_CACHE_PATH = os.getenv("DSPY_CACHE_PATH", ".dspy_cache/lm_calls.sqlite")
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+
+class LMCache:
+    """SQLite-backed cache of LM completions, safe across threads and processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, completions TEXT NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(model: str, prompt: str, kwargs: dict) -> str:
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "kwargs": kwargs},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        row = (
+            self._connection()
+            .execute("SELECT completions FROM completions WHERE key = ?", (key,))
+            .fetchone()
+        )
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, completions: List[str]):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, completions) VALUES (?, ?)",
+                (key, json.dumps(completions)),
+            )
+
+
+class CachedGoogle(GeminiLM):
+    """Gemini client that answers repeated prompts from an LMCache"""
+
+    def __init__(self, model: str, api_key: str, cache: LMCache, **kwargs):
+        super().__init__(model=model, api_key=api_key, **kwargs)
+        self.model_name = model
+        self.cache = cache
+
+    def __call__(
+        self,
+        prompt: str,
+        only_completed: bool = True,
+        return_sorted: bool = False,
+        **kwargs,
+    ):
+        key = self.cache.key(self.model_name, prompt, {**self.kwargs, **kwargs})
+        completions = self.cache.get(key)
+        if completions is None:
+            completions = super().__call__(
+                prompt,
+                only_completed=only_completed,
+                return_sorted=return_sorted,
+                **kwargs,
+            )
+            self.cache.set(key, completions)
+        return completions
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    """One point of the prompt/demos search space"""
+
+    max_bootstrapped_demos: int
+    max_labeled_demos: int
+    metric_threshold: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        name = f"boot{self.max_bootstrapped_demos}-lab{self.max_labeled_demos}"
+        if self.metric_threshold is not None:
+            name += f"-thr{self.metric_threshold}"
+        return name
+
+
+def scrub(text: str) -> str:
+    """Strip e-mail addresses and phone numbers before text reaches the cache"""
+    return PHONE_PATTERN.sub("[phone]", EMAIL_PATTERN.sub("[email]", text))
+
+
+def make_example(record: Dict) -> dspy.Example:
+    fields = {
+        "company": record["company"],
+        "role": record["role"],
+        "job_description": scrub(record["job_description"]),
+        "resume_profile": scrub(record.get("resume_profile") or record["resume"]),
+    }
+    if record.get("cover_letter"):
+        fields["cover_letter"] = record["cover_letter"]
+    return dspy.Example(**fields).with_inputs(*INPUT_FIELDS)
+
+
+def load_jsonl_examples(path: str) -> List[dspy.Example]:
+    """One application per line: company, role, job_description, and
+    resume_profile or resume (cover_letter optional, used as a labeled demo)"""
+    with open(path) as f:
+        return [make_example(json.loads(line)) for line in f if line.strip()]
+
+
+def load_db_examples(limit: Optional[int] = None) -> List[dspy.Example]:
+    """Non-archived applications, using the cached resume profile when present"""
+    from app.activities.profile_activities import compute_resume_hash
+    from app.models.application import ApplicationFilters
+    from app.models.database import (
+        get_all_applications,
+        get_db,
+        get_resume_profiles,
+        init_db,
+    )
+
+    init_db()
+    db = get_db()
+    applications = [
+        application
+        for application in get_all_applications(db, ApplicationFilters(limit=limit))
+        if application.job_description and application.resume
+    ]
+    hashes = {app.id: compute_resume_hash(app.resume) for app in applications}
+    profiles = get_resume_profiles(db, list(set(hashes.values())))
+
+    examples = []
+    for application in applications:
+        profile = profiles.get(hashes[application.id])
+        examples.append(
+            make_example(
+                {
+                    "company": application.company,
+                    "role": application.role,
+                    "job_description": application.job_description,
+                    "resume": application.resume,
+                    "resume_profile": profile.to_prompt() if profile else None,
+                }
+            )
+        )
+    return examples
+
+
+def split_examples(
+    examples: List[dspy.Example], dev_fraction: float, seed: int
+) -> Tuple[List[dspy.Example], List[dspy.Example]]:
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    dev_size = max(1, int(len(shuffled) * dev_fraction))
+    return shuffled[dev_size:], shuffled[:dev_size]
+
+
+def configure_lm(model: str, api_key: str, cache_path: str) -> CachedGoogle:
+    lm = CachedGoogle(model=model, api_key=api_key, cache=LMCache(cache_path))
+    dspy.settings.configure(lm=lm)
+    return lm
+
+
+def compile_program(
+    config: SweepConfig, trainset: List[dspy.Example]
+) -> CoverLetterGenerator:
+    if not config.max_bootstrapped_demos and not config.max_labeled_demos:
+        return CoverLetterGenerator()
+
+    optimizer = dspy.BootstrapFewShot(
+        metric=cover_letter_quality_metric,
+        metric_threshold=config.metric_threshold,
+        max_bootstrapped_demos=config.max_bootstrapped_demos,
+        max_labeled_demos=config.max_labeled_demos,
+    )
+    return optimizer.compile(CoverLetterGenerator(), trainset=trainset)
+
+
+def evaluate_program(
+    program: CoverLetterGenerator, devset: List[dspy.Example], threads: int
+) -> List[float]:
+    """Generate for every dev example in parallel, then score them as one batch.
+
+    Failed generations score 0.
+    """
+
+    def predict(example: dspy.Example) -> Optional[dspy.Prediction]:
+        try:
+            return program(**example.inputs())
+        except Exception as e:
+            logger.warning(f"Evaluation failed for {example.company}: {e}")
+            return None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        predictions = list(pool.map(predict, devset))
+    return score_batch(list(zip(devset, predictions))).total.tolist()
+
+
+def run_candidate(
+    config: SweepConfig,
+    trainset: List[dspy.Example],
+    devset: List[dspy.Example],
+    eval_threads: int,
+) -> Dict:
+    result = {"name": config.name, **asdict(config)}
+    start = time.perf_counter()
+    try:
+        program = compile_program(config, trainset)
+        compiled = time.perf_counter()
+        scores = evaluate_program(program, devset, eval_threads)
+    except Exception as e:
+        logger.error(f"Candidate {config.name} failed: {e}")
+        result.update(error=str(e), score=0.0)
+        return result
+
+    result.update(
+        score=statistics.fmean(scores),
+        score_stdev=statistics.pstdev(scores),
+        score_min=min(scores),
+        demos=sum(len(predictor.demos) for predictor in program.predictors()),
+        compile_seconds=round(compiled - start, 2),
+        eval_seconds=round(time.perf_counter() - compiled, 2),
+    )
+    return result
+
+
+# Per-process state for the process pool
+_worker_lm: Optional[CachedGoogle] = None
+
+
+def _init_process_worker(model: str, api_key: str, cache_path: str):
+    global _worker_lm
+    _worker_lm = configure_lm(model, api_key, cache_path)
+
+
+def _run_candidate_in_process(*args) -> Dict:
+    result = run_candidate(*args)
+    result["cache_hits"] = _worker_lm.cache.hits
+    result["cache_misses"] = _worker_lm.cache.misses
+    return result
+
+
+def run_sweep(
+    configs: List[SweepConfig],
+    trainset: List[dspy.Example],
+    devset: List[dspy.Example],
+    model: str,
+    api_key: str,
+    cache_path: str,
+    workers: int = 4,
+    eval_threads: int = 8,
+    executor: str = "thread",
+) -> Dict:
+    """Evaluate every configuration and return a report sorted by score"""
+    start = time.perf_counter()
+    lm = configure_lm(model, api_key, cache_path)
+
+    if executor == "process":
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_process_worker,
+            initargs=(model, api_key, cache_path),
+        )
+        task = _run_candidate_in_process
+    else:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        task = run_candidate
+
+    results = []
+    with pool:
+        futures = [
+            pool.submit(task, config, trainset, devset, eval_threads)
+            for config in configs
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            logger.info(f"{result['name']}: score={result['score']:.4f}")
+            results.append(result)
+
+    results.sort(key=lambda result: result["score"], reverse=True)
+    cache_hits = lm.cache.hits + sum(r.get("cache_hits", 0) for r in results)
+    cache_misses = lm.cache.misses + sum(r.get("cache_misses", 0) for r in results)
+    return {
+        "model": model,
+        "train_size": len(trainset),
+        "dev_size": len(devset),
+        "executor": executor,
+        "workers": workers,
+        "eval_threads": eval_threads,
+        "elapsed_seconds": round(time.perf_counter() - start, 2),
+        "cache_hits": cache_hits,
+        "cache_misses": cache_misses,
+        "best": results[0]["name"] if results else None,
+        "results": results,
+    }
+
+
+def format_report(report: Dict) -> str:
+    lines = [
+        f"{'config':<28}{'score':>8}{'stdev':>8}{'min':>8}"
+        f"{'demos':>7}{'compile s':>11}{'eval s':>9}"
+    ]
+    for result in report["results"]:
+        if "error" in result:
+            lines.append(f"{result['name']:<28}  failed: {result['error']}")
+            continue
+        lines.append(
+            f"{result['name']:<28}{result['score']:>8.4f}{result['score_stdev']:>8.4f}"
+            f"{result['score_min']:>8.4f}{result['demos']:>7}"
+            f"{result['compile_seconds']:>11.1f}{result['eval_seconds']:>9.1f}"
+        )
+    lines.append(
+        f"\n{len(report['results'])} configs, train={report['train_size']} "
+        f"dev={report['dev_size']}, {report['elapsed_seconds']}s, "
+        f"LM cache {report['cache_hits']} hits / {report['cache_misses']} misses"
+    )
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dataset", help="JSONL file of applications")
+    source.add_argument(
+        "--from-db", action="store_true", help="Use applications from the database"
+    )
+    parser.add_argument("--limit", type=int, help="Maximum examples to load")
+    parser.add_argument("--dev-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bootstrapped", type=_int_list, default=[0, 2, 4])
+    parser.add_argument("--labeled", type=_int_list, default=[0, 2])
+    parser.add_argument(
+        "--thresholds",
+        type=lambda value: [float(item) for item in value.split(",")],
+        default=[None],
+        help="BootstrapFewShot metric thresholds to sweep",
+    )
+    parser.add_argument("--model", default="gemini-1.5-flash")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--eval-threads", type=int, default=8)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--report", default="dspy_sweep_report.json")
+    parser.add_argument("--save-best", help="Save the best compiled program here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        sys.exit("GEMINI_API_KEY not found")
+
+    if args.dataset:
+        examples = load_jsonl_examples(args.dataset)[: args.limit]
+    else:
+        examples = load_db_examples(args.limit)
+    if len(examples) < 2:
+        sys.exit("Need at least two examples to split into train and dev sets")
+    trainset, devset = split_examples(examples, args.dev_fraction, args.seed)
+
+    configs = [
+        SweepConfig(bootstrapped, labeled, threshold)
+        for bootstrapped, labeled, threshold in product(
+            args.bootstrapped, args.labeled, args.thresholds
+        )
+    ]
+    report = run_sweep(
+        configs,
+        trainset,
+        devset,
+        model=args.model,
+        api_key=api_key,
+        cache_path=args.cache,
+        workers=args.workers,
+        eval_threads=args.eval_threads,
+        executor=args.executor,
+    )
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(format_report(report))
+    print(f"Report written to {args.report}")
+
+    if args.save_best and report["best"]:
+        # Recompiling is cheap: every LM call of the winning run is cached
+        best = next(config for config in configs if config.name == report["best"])
+        compile_program(best, trainset).save(args.save_best)
+        print(f"Saved {best.name} to {args.save_best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Provider-side context caching for the static part of DSPy prompts.
+
+A compiled CoverLetterGenerator renders the signature instructions, the
+field format and every demo ahead of the application's own fields, so that
+prefix is identical across requests. PromptPrefixCache stores it once as
+Gemini cached content and requests send only the per-application suffix.
+
+Entries belong to one program version: binding a newly compiled or loaded
+program deletes the previous version's cached content instead of leaving it
+billed until its TTL runs out.
+
+Gemini only caches contents above a per-model minimum size (32,768 tokens
+on Gemini 1.5), against an explicitly versioned model. Smaller prefixes are
+sent in full without attempting to cache them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPT_PREFIX_CACHE = os.getenv("PROMPT_PREFIX_CACHE", "false").lower() == "true"
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+
+# DSPy separates the instructions, each demo and the current input with this
+SECTION_SEPARATOR = "\n\n---\n\n"
+
+# (explicit model version, minimum cacheable tokens) per model; override with
+# PROMPT_CACHE_MODELS="model=versioned-model/min_tokens,..."
+DEFAULT_CACHE_MODELS: Dict[str, Tuple[str, int]] = {
+    "gemini-1.5-flash": ("gemini-1.5-flash-001", 32768),
+    "gemini-1.5-flash-8b": ("gemini-1.5-flash-8b-001", 32768),
+    "gemini-1.5-pro": ("gemini-1.5-pro-001", 32768),
+}
+# Assumed for models missing from the table
+DEFAULT_CACHE_MIN_TOKENS = 32768
+
+MODEL_VERSION = re.compile(r"-\d{3}$")
+
+
+def load_cache_models() -> Dict[str, Tuple[str, int]]:
+    models = dict(DEFAULT_CACHE_MODELS)
+    for entry in filter(None, os.getenv("PROMPT_CACHE_MODELS", "").split(",")):
+        model, _, spec = entry.partition("=")
+        versioned, _, min_tokens = spec.partition("/")
+        models[model.strip()] = (
+            versioned.strip() or model.strip(),
+            int(min_tokens or DEFAULT_CACHE_MIN_TOKENS),
+        )
+    return models
+
+
+CACHE_MODELS = load_cache_models()
+
+
+def cache_model(model_name: str) -> Tuple[str, int]:
+    """(explicit model version, minimum cacheable tokens) for `model_name`.
+
+    Versioned names are kept as given; others map to their default version.
+    """
+    name = model_name.split("/")[-1]
+    base = MODEL_VERSION.sub("", name)
+    versioned, min_tokens = CACHE_MODELS.get(base, (name, DEFAULT_CACHE_MIN_TOKENS))
+    return (name if name != base else versioned), min_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (about four characters per token)"""
+    return len(text) // 4
+
+
+def split_prompt(prompt: str) -> Tuple[str, str]:
+    """(static prefix, per-request suffix); the suffix is the last section"""
+    prefix, separator, suffix = prompt.rpartition(SECTION_SEPARATOR)
+    if not separator:
+        return "", prompt
+    return prefix + separator, suffix
+
+
+def program_version(program: Any) -> str:
+    """Short hash of a DSPy program's instructions and demos"""
+    state = json.dumps(
+        [
+            (
+                name,
+                predictor.signature.instructions,
+                [demo.toDict() for demo in predictor.demos],
+            )
+            for name, predictor in program.named_predictors()
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(state.encode()).hexdigest()[:12]
+
+
+@dataclass
+class _Entry:
+    # None once ready: creation failed, skip until expires_at
+    cached_content: Optional[Any] = None
+    expires_at: float = 0.0
+    # Set when creation has finished, successfully or not
+    ready: threading.Event = field(default_factory=threading.Event)
+    refreshing: bool = False
+
+
+class PromptPrefixCache:
+    """Cached content per prompt prefix, scoped to the program version served"""
+
+    def __init__(
+        self,
+        genai: Any,
+        model_name: str,
+        ttl_seconds: int = PROMPT_CACHE_TTL_SECONDS,
+    ):
+        self.genai = genai
+        self.model_name = model_name
+        self.cache_model, self.min_tokens = cache_model(model_name)
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.program_version: Optional[str] = None
+        self._entries: Dict[str, _Entry] = {}
+        # Guards the entries only; API calls are made outside it
+        self._lock = threading.Lock()
+        self._reported_small = False
+
+    def bind(self, version: Optional[str]):
+        """Serve `version`, deleting cached content left by the previous one"""
+        with self._lock:
+            if version == self.program_version:
+                return
+            stale = [e.cached_content for e in self._entries.values()]
+            self._entries = {}
+            previous, self.program_version = self.program_version, version
+        self._delete(stale)
+        if previous:
+            logger.info(f"Prompt cache moved from program {previous} to {version}")
+
+    def release(self):
+        """Delete every cached prefix, e.g. on shutdown"""
+        self.bind(None)
+
+    def get(self, prefix: str) -> Optional[Any]:
+        """Cached content holding `prefix`, created or refreshed as needed.
+
+        Creation and refreshes are single-flight per prefix. Requests for a
+        prefix whose content is still being created send the full prompt
+        rather than wait for the API call.
+        """
+        if not prefix or self.program_version is None:
+            return None
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_tokens:
+            if not self._reported_small:
+                self._reported_small = True
+                logger.info(
+                    f"Prompt prefix of ~{tokens} tokens is below the "
+                    f"{self.min_tokens}-token caching minimum of "
+                    f"{self.cache_model}; sending full prompts"
+                )
+            return None
+
+        key = hashlib.sha256(prefix.encode()).hexdigest()
+        refresh = False
+        with self._lock:
+            version = self.program_version
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry.ready.is_set() and now >= entry.expires_at:
+                entry = None
+            if entry is None:
+                entry = _Entry()
+                self._entries[key] = entry
+            elif not entry.ready.is_set() or entry.cached_content is None:
+                return None
+            elif (
+                entry.expires_at - now < self.ttl.total_seconds() / 2
+                and not entry.refreshing
+            ):
+                entry.refreshing = refresh = True
+            else:
+                return entry.cached_content
+
+        if refresh:
+            self._refresh(entry)
+            return entry.cached_content
+        return self._create(key, entry, prefix, version)
+
+    def _create(
+        self, key: str, entry: _Entry, prefix: str, version: str
+    ) -> Optional[Any]:
+        try:
+            cached_content = self.genai.caching.CachedContent.create(
+                model=f"models/{self.cache_model}",
+                display_name=f"cover-letter-{version}",
+                contents=[prefix],
+                ttl=self.ttl,
+            )
+        except Exception as e:
+            logger.warning(f"Prompt prefix not cached, sending in full: {e}")
+            cached_content = None
+
+        with self._lock:
+            current = self._entries.get(key) is entry
+            if current:
+                entry.cached_content = cached_content
+                # After a failure: retry once this has passed
+                entry.expires_at = time.monotonic() + self.ttl.total_seconds()
+            entry.ready.set()
+        if not current:
+            # A new program version was bound meanwhile
+            self._delete([cached_content])
+            return None
+        return cached_content
+
+    def _refresh(self, entry: _Entry):
+        """Extend the TTL; on failure the content is used until it expires"""
+        try:
+            entry.cached_content.update(ttl=self.ttl)
+            expires_at = time.monotonic() + self.ttl.total_seconds()
+        except Exception as e:
+            logger.warning(f"Failed to extend cached prompt prefix: {e}")
+            expires_at = None
+        with self._lock:
+            if expires_at is not None:
+                entry.expires_at = expires_at
+            entry.refreshing = False
+
+    def _delete(self, cached_contents):
+        for cached_content in cached_contents:
+            if cached_content is None:
+                continue
+            try:
+                cached_content.delete()
+            except Exception as e:
+                # Expires on its own after the TTL
+                logger.warning(f"Failed to delete cached prompt prefix: {e}")
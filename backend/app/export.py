@@ -0,0 +1,97 @@
+"""
+Streaming export of applications as NDJSON or CSV.
+
+Rows come from stream_applications (a server-side cursor) one batch at a
+time and each batch is encoded into one chunk of the response body, so
+memory is bounded by EXPORT_BATCH_SIZE rows whatever the export size. Each
+running export holds its own database connection; at most
+EXPORT_MAX_CONCURRENT run per API process.
+"""
+
+import csv
+import io
+import os
+import threading
+from typing import Any, Dict, Iterator, List
+
+import orjson
+
+from app.models.application import ApplicationFilters
+from app.models.database import stream_applications
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "4"))
+
+EXPORT_FIELDS = [
+    "id",
+    "company",
+    "role",
+    "status",
+    "user_email",
+    "created_at",
+    "deadline_weeks",
+    "cover_letter_available",
+    "reminder_sent",
+    "job_description",
+    "resume",
+]
+COVER_LETTER_FIELDS = ["cover_letter_version", "cover_letter_score", "cover_letter"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+
+class ExportBusy(Exception):
+    """EXPORT_MAX_CONCURRENT exports are already running"""
+
+
+def _record(row: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    record = {field: row.get(field) for field in fields}
+    record["created_at"] = row["created_at"].isoformat()
+    record["deadline_weeks"] = row["deadline_duration"].days / 7
+    return record
+
+
+def _ndjson(records: List[Dict[str, Any]]) -> bytes:
+    return b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+
+def _csv(records: List[Dict[str, Any]], fields: List[str], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fields)
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue().encode("utf-8")
+
+
+def export_chunks(
+    format: str, filters: ApplicationFilters, include_cover_letters: bool
+) -> Iterator[bytes]:
+    """Encoded response chunks, one per batch.
+
+    The first chunk is produced only after the query has run (the CSV header
+    goes out with the first batch), so callers can pull it before committing
+    to a 200. Raises ExportBusy from that first pull.
+    """
+    if not _slots.acquire(blocking=False):
+        raise ExportBusy("Too many exports running, retry later")
+    try:
+        fields = EXPORT_FIELDS + (COVER_LETTER_FIELDS if include_cover_letters else [])
+        batches = stream_applications(
+            filters, include_cover_letters, EXPORT_BATCH_SIZE
+        )
+        first = True
+        for rows in batches:
+            records = [_record(row, fields) for row in rows]
+            if format == "csv":
+                yield _csv(records, fields, header=first)
+            else:
+                yield _ndjson(records)
+            first = False
+        if first:
+            # No rows: still a valid, header-only CSV or empty NDJSON
+            yield _csv([], fields, header=True) if format == "csv" else b""
+    finally:
+        _slots.release()
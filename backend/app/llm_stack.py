@@ -0,0 +1,43 @@
+"""
+Deferred imports of the LLM client stack.
+
+google.generativeai and DSPy (which pulls in litellm) take seconds to
+import, so they load on first use or in the worker's pre-warm step and
+never in the API process.
+"""
+
+import functools
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Serve every LLM call from app/llm_stub.py instead of Gemini
+LLM_STUB = os.getenv("LLM_STUB", "false").lower() == "true"
+
+
+@functools.lru_cache(maxsize=None)
+def get_genai():
+    if LLM_STUB:
+        from app import llm_stub
+
+        logger.warning("LLM_STUB is set: LLM calls return canned responses")
+        return llm_stub
+
+    import google.generativeai as genai
+
+    return genai
+
+
+@functools.lru_cache(maxsize=None)
+def get_dspy_cover_letter():
+    """app.dspy_modules.cover_letter, or None when DSPy is not installed
+    (or LLM_STUB is set, so generation takes the stubbed direct path)"""
+    if LLM_STUB:
+        return None
+    try:
+        from app.dspy_modules import cover_letter
+    except ImportError:
+        logger.warning("DSPy not available, falling back to direct Gemini API")
+        return None
+    return cover_letter
@@ -0,0 +1,269 @@
+"""
+Stand-in for google.generativeai used when LLM_STUB=true (load tests, local runs).
+
+Mimics the slice of the client the activities use: configure(),
+GenerativeModel(...).generate_content() with candidates, usage metadata
+and JSON mode, and context caching (caching.CachedContent and
+GenerativeModel.from_cached_content). Instead of calling Gemini it sleeps
+for a prefill time proportional to the input tokens, with cached tokens at
+LLM_STUB_CACHED_TOKEN_FRACTION of the cost, then for LLM_STUB_LATENCY_SECONDS
+(with +/-50% jitter). The worker, ledger and metrics run unchanged.
+
+LLM_STUB_MODELS="model=latency_factor/quality,..." gives models their own
+speed and quality: each candidate is a letter tailored to the company and
+role with probability `quality`, else a short generic one that scores low.
+"""
+
+import json
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+from app.dspy_modules.prompt_cache import MODEL_VERSION, cache_model
+
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("LLM_STUB_LATENCY_SECONDS", "1.0"))
+# Time to first token grows with the input that is not served from cache
+LLM_STUB_PREFILL_SECONDS_PER_1K_TOKENS = float(
+    os.getenv("LLM_STUB_PREFILL_SECONDS_PER_1K_TOKENS", "0.1")
+)
+# Cached input tokens cost this fraction of regular ones, in time and price
+LLM_STUB_CACHED_TOKEN_FRACTION = float(
+    os.getenv("LLM_STUB_CACHED_TOKEN_FRACTION", "0.25")
+)
+# Smaller cached contents are rejected, as Gemini does; unset (or 0) uses
+# the model's real minimum (see app/dspy_modules/prompt_cache.py)
+LLM_STUB_CACHE_MIN_TOKENS = int(os.getenv("LLM_STUB_CACHE_MIN_TOKENS") or "0")
+
+
+def load_model_profiles() -> Dict[str, Tuple[float, float]]:
+    profiles = {}
+    for entry in filter(None, os.getenv("LLM_STUB_MODELS", "").split(",")):
+        model, _, profile = entry.partition("=")
+        latency_factor, _, quality = profile.partition("/")
+        profiles[model.strip()] = (float(latency_factor), float(quality or 1))
+    return profiles
+
+
+# (latency factor, probability of a tailored letter); unlisted models get (1, 1)
+MODEL_PROFILES = load_model_profiles()
+
+STUB_LETTER = """Dear Hiring Manager,
+
+I am writing to express my interest in this role. I am excited about the
+opportunity and believe my experience is a strong match for the team.
+
+In my previous roles I have delivered measurable results, and I would bring
+the same focus on quality and ownership to this position.
+
+Thank you for your consideration.
+
+Sincerely,
+Applicant"""
+
+TAILORED_LETTER = """Dear {company} Hiring Team,
+
+I am writing to apply for the {role} position at {company}. I am excited
+about the chance to join a team whose work I have followed for years, and I
+believe my background makes me a strong fit for the responsibilities you
+describe. Over the past six years I have designed, built and operated
+production systems end to end, and I have learned to balance delivery speed
+with reliability, clear communication and careful engineering.
+
+In my most recent role I led the redesign of a customer-facing platform that
+served millions of requests per day. I have owned the architecture, mentored
+four engineers and worked closely with product and design partners to ship
+features on predictable timelines. My experience with Python services,
+relational databases and cloud infrastructure maps directly onto the stack
+in your job description, and I have a track record of cutting latency and
+operating costs while improving test coverage and on-call health.
+
+I am passionate about building tools that people enjoy using, and I would
+bring that same focus to {company}. I would like to contribute from the
+first weeks by learning your systems quickly, pairing with the team on
+existing priorities and proposing measured improvements where the data
+supports them. I believe strong engineering cultures come from shared
+ownership, and I have helped establish review practices, runbooks and
+design documents that made teams faster and calmer under pressure.
+
+What draws me to the {role} role is the combination of technical depth and
+direct impact on users. I would bring curiosity, pragmatism and a habit of
+writing things down so that decisions stay easy to revisit. My experience
+leading projects through ambiguity has taught me to ask good questions
+early, to measure outcomes and to keep stakeholders informed along the way.
+
+Thank you for considering my application. I would welcome the opportunity to
+discuss how my experience can help {company} reach its goals.
+
+Sincerely,
+Applicant"""
+
+DSPY_OUTPUT_FIELD = "Cover Letter:"
+STUB_REASONING = f" match the role to the candidate.\n\n{DSPY_OUTPUT_FIELD} "
+
+STUB_PROFILE = {
+    "skills": ["Python", "SQL", "APIs"],
+    "roles": ["Software Engineer at Example Corp (3 years)"],
+    "achievements": ["Cut API latency by 40%"],
+}
+
+
+def configure(**kwargs):
+    pass
+
+
+def count_tokens(text: str) -> int:
+    """Rough Gemini token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _config_dict(config: Any) -> Dict:
+    if config is None:
+        return {}
+    if isinstance(config, dict):
+        return config
+    return {k: v for k, v in vars(config).items() if v is not None}
+
+
+def _field(text: str, pattern: str) -> str:
+    # The last match is the current input rather than a demo
+    matches = re.findall(pattern + r":\s*(.+)", text)
+    return matches[-1].strip() if matches else "your company"
+
+
+def _letter(prompt: str, quality: float) -> str:
+    if random.random() >= quality:
+        return STUB_LETTER
+    return TAILORED_LETTER.format(
+        company=_field(prompt, "Company"), role=_field(prompt, "(?:Role|Position)")
+    )
+
+
+class CachedContent:
+    """In-memory stand-in for google.generativeai.caching.CachedContent"""
+
+    live: Dict[str, "CachedContent"] = {}
+
+    def __init__(self, model: str, display_name: Optional[str], text: str, ttl):
+        self.name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+        self.model = model
+        self.display_name = display_name
+        self.text = text
+        self.usage_metadata = SimpleNamespace(total_token_count=count_tokens(text))
+        self.update(ttl=ttl)
+
+    @classmethod
+    def create(
+        cls,
+        model: str,
+        *,
+        display_name: Optional[str] = None,
+        system_instruction: Any = None,
+        contents: Any = None,
+        ttl: Optional[timedelta] = None,
+        **kwargs,
+    ) -> "CachedContent":
+        versioned, min_tokens = cache_model(model)
+        if not MODEL_VERSION.search(model):
+            raise ValueError(
+                f"Model {model} does not support caching; use an explicit "
+                f"version such as {versioned}"
+            )
+        min_tokens = LLM_STUB_CACHE_MIN_TOKENS or min_tokens
+        text = str(system_instruction or "") + "".join(map(str, contents or []))
+        tokens = count_tokens(text)
+        if tokens < min_tokens:
+            raise ValueError(
+                f"Cached content is too small. total_token_count={tokens}, "
+                f"min_total_token_count={min_tokens}"
+            )
+        cached_content = cls(model, display_name, text, ttl)
+        cls.live[cached_content.name] = cached_content
+        return cached_content
+
+    def update(self, *, ttl: Optional[timedelta] = None, expire_time=None):
+        self.expire_time = expire_time or datetime.utcnow() + (
+            ttl or timedelta(hours=1)
+        )
+
+    def delete(self):
+        self.live.pop(self.name, None)
+
+
+caching = SimpleNamespace(CachedContent=CachedContent)
+
+
+class GenerativeModel:
+    def __init__(
+        self,
+        model_name: str,
+        generation_config: Any = None,
+        safety_settings: Any = None,
+    ):
+        self.model_name = model_name
+        self.generation_config = _config_dict(generation_config)
+        self.cached_content: Optional[CachedContent] = None
+
+    @classmethod
+    def from_cached_content(
+        cls,
+        cached_content: CachedContent,
+        generation_config: Any = None,
+        safety_settings: Any = None,
+    ) -> "GenerativeModel":
+        model = cls(cached_content.model, generation_config, safety_settings)
+        model.cached_content = cached_content
+        return model
+
+    def generate_content(
+        self, prompt: Any, generation_config: Any = None, **kwargs
+    ) -> SimpleNamespace:
+        config = {**self.generation_config, **_config_dict(generation_config)}
+        text = str(prompt)
+        prompt_tokens = count_tokens(text)
+        cached_tokens = 0
+        if self.cached_content is not None:
+            if self.cached_content.name not in CachedContent.live:
+                raise ValueError(f"{self.cached_content.name} not found")
+            cached_tokens = self.cached_content.usage_metadata.total_token_count
+            text = self.cached_content.text + text
+
+        # Cached content names a versioned model: match on the base name
+        base_model = MODEL_VERSION.sub("", self.model_name.split("/")[-1])
+        latency_factor, quality = MODEL_PROFILES.get(base_model, (1.0, 1.0))
+        prefill_tokens = prompt_tokens + cached_tokens * LLM_STUB_CACHED_TOKEN_FRACTION
+        time.sleep(
+            latency_factor
+            * (
+                prefill_tokens / 1000 * LLM_STUB_PREFILL_SECONDS_PER_1K_TOKENS
+                + LLM_STUB_LATENCY_SECONDS * random.uniform(0.5, 1.5)
+            )
+        )
+
+        if config.get("response_mime_type") == "application/json":
+            texts = [json.dumps(STUB_PROFILE)]
+        else:
+            # DSPy prompts end mid-way through the reasoning field
+            lead = STUB_REASONING if DSPY_OUTPUT_FIELD in text else ""
+            texts = [
+                lead + _letter(text, quality) + f"\n\n(variant {i + 1})"
+                for i in range(config.get("candidate_count") or 1)
+            ]
+
+        candidates = [
+            SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+            for text in texts
+        ]
+        return SimpleNamespace(
+            text=texts[0],
+            candidates=candidates,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=prompt_tokens + cached_tokens,
+                cached_content_token_count=cached_tokens,
+                candidates_token_count=sum(count_tokens(text) for text in texts),
+            ),
+        )
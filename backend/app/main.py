@@ -1,16 +1,22 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from temporalio.client import Client
 import os
 import logging
 
-from app.api import applications, health
+from app.api import applications, health, profiling, resumes, usage
+from app.change_feed import ChangeFeed
 from app.models.database import init_db
+from app.observability import metrics_middleware, metrics_response, setup_tracing
+from app.serialization import FAST_JSON, FastJSONResponse
+from app.temporal_client import connect_temporal
 
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
+setup_tracing(os.getenv("APP_NAME", "cover-letter-api"))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -19,37 +25,26 @@ async def lifespan(app: FastAPI):
     init_db()
 
     # Connect to Temporal Cloud
-    from temporalio.client import TLSConfig
-
-    temporal_address = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
-    temporal_namespace = os.getenv("TEMPORAL_NAMESPACE", "default")
-    temporal_api_key = os.getenv("TEMPORAL_API_KEY")
-
-    if temporal_api_key:
-        # Temporal Cloud connection with API key via rpc_metadata
-        app.state.temporal_client = await Client.connect(
-            temporal_address,
-            namespace=temporal_namespace,
-            tls=TLSConfig(),
-            rpc_metadata={"authorization": f"Bearer {temporal_api_key}"},
-        )
-    else:
-        # Local Temporal connection
-        app.state.temporal_client = await Client.connect(
-            temporal_address, namespace=temporal_namespace
-        )
+    app.state.temporal_client = await connect_temporal()
 
     logger.info("Connected to Temporal")
+
+    # Wake long-polling requests on application state changes
+    app.state.change_feed = ChangeFeed()
+    app.state.change_feed.start()
+
     yield
 
     # Cleanup - Temporal client doesn't have a close method
-    pass
+    app.state.change_feed.stop()
+    resumes.parser.shutdown()
 
 
 app = FastAPI(
     title=os.getenv("APP_NAME", "RSA Global Cover Letter Builder"),
     version=os.getenv("APP_VERSION", "1.0.0"),
     lifespan=lifespan,
+    default_response_class=FastJSONResponse if FAST_JSON else JSONResponse,
 )
 
 # CORS for React frontend
@@ -59,10 +54,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After", "X-Admission"],
 )
 
+# Request latency histograms and server spans
+app.middleware("http")(metrics_middleware)
+
 # Include routers
 app.include_router(
     applications.router, prefix="/api/applications", tags=["applications"]
 )
 app.include_router(health.router, prefix="/api/health", tags=["health"])
+app.include_router(usage.router, prefix="/api/usage", tags=["usage"])
+app.include_router(resumes.router, prefix="/api/resumes", tags=["resumes"])
+app.include_router(
+    profiling.router, prefix="/api/admin/profiling", tags=["admin"]
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
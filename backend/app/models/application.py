@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Literal
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 
@@ -26,16 +27,79 @@ class JobApplication(BaseModel):
     deadline_duration: timedelta
     created_at: datetime = Field(default_factory=datetime.utcnow)
     status: ApplicationStatus = ApplicationStatus.SUBMITTED
+    cover_letter_available: bool = False
+    reminder_sent: bool = False
+    state_version: int = 0
 
 
-class ApplicationCreate(BaseModel):
+@dataclass
+class ApplicationWorkflowInput:
+    """Workflow input for an application.
+
+    Encodes to the same JSON object the workflows read as a dict, without a
+    pydantic round trip per start.
+    """
+
+    id: str
     company: str
     role: str
     job_description: str
     resume: str
     user_email: str
+    deadline_duration_seconds: int
+    created_at: str
+    status: str
+    candidate_count: Optional[int] = None
+    # Leave the reminder and auto-archive to DeadlineSchedulerWorkflow
+    scheduled_deadline: bool = False
+    # Lane requested from GenerationSchedulerWorkflow; None generates at once
+    generation_lane: Optional[str] = None
+
+    @classmethod
+    def from_application(cls, application: JobApplication) -> "ApplicationWorkflowInput":
+        return cls(
+            id=application.id,
+            company=application.company,
+            role=application.role,
+            job_description=application.job_description,
+            resume=application.resume,
+            user_email=application.user_email,
+            deadline_duration_seconds=int(application.deadline_duration.total_seconds()),
+            created_at=application.created_at.isoformat(),
+            status=application.status.value,
+        )
+
+
+class ApplicationCreate(BaseModel):
+    company: str
+    role: str
+    job_description: str
+    # Pasted text, or the file_hash of a resume uploaded to /api/resumes
+    resume: Optional[str] = None
+    resume_file_hash: Optional[str] = None
+    user_email: str
     deadline_weeks: int = 4
 
+    @model_validator(mode="after")
+    def require_resume(self) -> "ApplicationCreate":
+        if self.resume is None and self.resume_file_hash is None:
+            raise ValueError("Either resume or resume_file_hash is required")
+        return self
+
+
+class ApplicationFilters(BaseModel):
+    """Filters, search and paging accepted by the application listing"""
+
+    user_email: Optional[str] = None
+    status: Optional[ApplicationStatus] = None
+    company: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    q: Optional[str] = None
+    sort: Literal["newest", "oldest", "company", "relevance"] = "newest"
+    limit: Optional[int] = None
+    offset: int = 0
+
 
 class ApplicationResponse(BaseModel):
     model_config = {"arbitrary_types_allowed": True}
@@ -52,3 +116,97 @@ class ApplicationResponse(BaseModel):
 
 class StatusUpdate(BaseModel):
     status: str
+
+
+class CoverLetterCandidate(BaseModel):
+    """A generated cover letter and its local quality score"""
+
+    cover_letter: str
+    score: Optional[float] = None
+    version: Optional[int] = None
+
+
+class CoverLetterCandidates(CoverLetterCandidate):
+    """The current cover letter plus the alternates generated alongside it"""
+
+    alternates: List[CoverLetterCandidate] = []
+
+
+class CoverLetterVersion(BaseModel):
+    """One stored cover letter; versions of an application never change"""
+
+    application_id: str
+    version: int
+    cover_letter: str
+    score: Optional[float] = None
+    source: str
+    is_current: bool = False
+    created_at: Optional[datetime] = None
+
+
+class ResumeUpload(BaseModel):
+    """Normalized text extracted from an uploaded resume file, keyed by the
+    file's sha256 so the same file is parsed once"""
+
+    file_hash: str
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size_bytes: int
+    text: str
+    created_at: Optional[datetime] = None
+
+
+class RegenerateRequest(BaseModel):
+    candidate_count: Optional[int] = Field(None, ge=1, le=8)
+
+
+class ResumeProfile(BaseModel):
+    """Compact structured profile extracted once per distinct resume"""
+
+    resume_hash: str
+    skills: List[str] = []
+    roles: List[str] = []
+    achievements: List[str] = []
+    keywords: Dict[str, float] = {}
+
+    def to_prompt(self) -> str:
+        """Render the profile as compact text for LLM prompts"""
+        sections = [
+            ("Skills", ", ".join(self.skills)),
+            ("Roles", "; ".join(self.roles)),
+            ("Achievements", "; ".join(self.achievements)),
+            ("Keywords", ", ".join(self.keywords)),
+        ]
+        return "\n".join(f"{label}: {value}" for label, value in sections if value)
+
+
+class GenerationRun(BaseModel):
+    """One LLM generation attempt, as recorded in the generation_runs ledger"""
+
+    application_id: str
+    path: str
+    model: str
+    prompt_version: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: int = 0
+    cache_hit: bool = False
+    attempt: int = 1
+    outcome: str = "success"
+    error: Optional[str] = None
+    cost_usd: float = 0.0
+    created_at: Optional[datetime] = None
+
+
+class GenerationStats(BaseModel):
+    bucket: str
+    runs: int
+    successes: int
+    p50_latency_ms: float
+    p95_latency_ms: float
+    prompt_tokens: int
+    completion_tokens: int
+    cost_usd: float
+
+
+GenerationGroupBy = Literal["day", "model", "path"]
@@ -0,0 +1,706 @@
+"""
+Versioned, forward-only schema migrations.
+
+Each migration runs once and is recorded in schema_migrations. The runner
+holds a Postgres advisory lock, so the API and the worker starting together
+apply migrations exactly once. Migrations marked transactional=False run
+statement by statement in autocommit mode, which CREATE INDEX CONCURRENTLY
+requires so indexes can be built without blocking writes on a live table.
+
+Never edit a migration that has shipped; append a new one instead.
+
+Run standalone with: python -m app.models.migrations
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from typing import List
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant identifying the migration advisory lock
+MIGRATION_LOCK_ID = 727_001
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: List[str]
+    transactional: bool = True
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "create_applications",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS applications (
+                id VARCHAR PRIMARY KEY,
+                company VARCHAR NOT NULL,
+                role VARCHAR NOT NULL,
+                job_description TEXT NOT NULL,
+                resume TEXT NOT NULL,
+                user_email VARCHAR NOT NULL,
+                deadline_duration INTERVAL NOT NULL,
+                created_at TIMESTAMP DEFAULT NOW(),
+                status VARCHAR DEFAULT 'SUBMITTED'
+            )
+            """,
+        ],
+    ),
+    Migration(
+        2,
+        "create_resume_profiles",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS resume_profiles (
+                resume_hash VARCHAR PRIMARY KEY,
+                profile JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT NOW()
+            )
+            """,
+        ],
+    ),
+    Migration(
+        3,
+        "create_generation_runs",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS generation_runs (
+                id BIGSERIAL PRIMARY KEY,
+                application_id VARCHAR NOT NULL,
+                path VARCHAR NOT NULL,
+                model VARCHAR NOT NULL,
+                prompt_version VARCHAR NOT NULL,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                latency_ms INTEGER NOT NULL,
+                cache_hit BOOLEAN NOT NULL DEFAULT FALSE,
+                attempt INTEGER NOT NULL DEFAULT 1,
+                outcome VARCHAR NOT NULL,
+                error TEXT,
+                cost_usd NUMERIC(12, 6) NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_generation_runs_application
+            ON generation_runs (application_id, created_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_generation_runs_created_at
+            ON generation_runs (created_at)
+            """,
+        ],
+    ),
+    Migration(
+        4,
+        "create_reminders",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS reminders (
+                id BIGSERIAL PRIMARY KEY,
+                application_id VARCHAR NOT NULL,
+                user_email VARCHAR NOT NULL,
+                company VARCHAR NOT NULL,
+                role VARCHAR NOT NULL,
+                due_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                sent_at TIMESTAMP
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_reminders_pending
+            ON reminders (due_at, user_email) WHERE sent_at IS NULL
+            """,
+        ],
+    ),
+    Migration(
+        5,
+        "add_application_state_columns",
+        [
+            """
+            ALTER TABLE applications
+                ADD COLUMN IF NOT EXISTS cover_letter_available BOOLEAN NOT NULL DEFAULT FALSE,
+                ADD COLUMN IF NOT EXISTS reminder_sent BOOLEAN NOT NULL DEFAULT FALSE,
+                ADD COLUMN IF NOT EXISTS state_version INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW()
+            """,
+        ],
+    ),
+    Migration(
+        6,
+        "add_application_search_vector",
+        [
+            """
+            ALTER TABLE applications
+                ADD COLUMN IF NOT EXISTS search_vector tsvector
+                    GENERATED ALWAYS AS (
+                        to_tsvector('english', company || ' ' || role || ' ' || job_description)
+                    ) STORED
+            """,
+        ],
+    ),
+    Migration(
+        7,
+        "add_application_listing_indexes",
+        [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_applications_user_created ON applications (user_email, created_at DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_applications_status_created ON applications (status, created_at DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_applications_company ON applications (lower(company))",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_applications_created ON applications (created_at DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_applications_search ON applications USING GIN (search_vector)",
+        ],
+        transactional=False,
+    ),
+    Migration(
+        8,
+        "partition_applications_by_month",
+        [
+            # Partitioned tables need the partition key in the primary key, so
+            # the table is rebuilt. Online: the partitioned copy is built next
+            # to the live table, kept current by a trigger and backfilled in
+            # committed batches, and writers only wait for the final rename.
+            # Runs in autocommit; every step is skipped once applications is
+            # partitioned, so a failed run can simply be retried.
+            """
+            CREATE OR REPLACE FUNCTION ensure_application_partitions(
+                start_month DATE, end_month DATE, parent TEXT DEFAULT 'applications'
+            )
+            RETURNS void AS $$
+            DECLARE
+                month DATE := date_trunc('month', start_month);
+            BEGIN
+                WHILE month <= end_month LOOP
+                    EXECUTE format(
+                        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                        'applications_' || to_char(month, 'YYYY_MM'),
+                        parent,
+                        month,
+                        (month + interval '1 month')::date
+                    );
+                    month := (month + interval '1 month')::date;
+                END LOOP;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            DO $$
+            BEGIN
+                IF (SELECT relkind FROM pg_class WHERE oid = 'applications'::regclass) = 'p' THEN
+                    RETURN;
+                END IF;
+
+                -- created_at becomes NOT NULL and part of the key
+                UPDATE applications SET created_at = NOW() WHERE created_at IS NULL;
+
+                CREATE TABLE IF NOT EXISTS applications_partitioned (
+                    id VARCHAR NOT NULL,
+                    company VARCHAR NOT NULL,
+                    role VARCHAR NOT NULL,
+                    job_description TEXT NOT NULL,
+                    resume TEXT NOT NULL,
+                    user_email VARCHAR NOT NULL,
+                    deadline_duration INTERVAL NOT NULL,
+                    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    status VARCHAR DEFAULT 'SUBMITTED',
+                    cover_letter_available BOOLEAN NOT NULL DEFAULT FALSE,
+                    reminder_sent BOOLEAN NOT NULL DEFAULT FALSE,
+                    state_version INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    archived_at TIMESTAMP,
+                    search_vector tsvector GENERATED ALWAYS AS (
+                        to_tsvector('english', company || ' ' || role || ' ' || job_description)
+                    ) STORED,
+                    PRIMARY KEY (id, created_at)
+                ) PARTITION BY RANGE (created_at);
+                CREATE TABLE IF NOT EXISTS applications_default
+                    PARTITION OF applications_partitioned DEFAULT;
+                PERFORM ensure_application_partitions(
+                    COALESCE((SELECT MIN(created_at) FROM applications), NOW())::date,
+                    (NOW() + interval '3 months')::date,
+                    'applications_partitioned'
+                );
+
+                -- Built while empty; renamed to their final names at the swap
+                CREATE INDEX IF NOT EXISTS idx_applications_p_user_created
+                    ON applications_partitioned (user_email, created_at DESC);
+                CREATE INDEX IF NOT EXISTS idx_applications_p_status_created
+                    ON applications_partitioned (status, created_at DESC);
+                CREATE INDEX IF NOT EXISTS idx_applications_p_company
+                    ON applications_partitioned (lower(company));
+                CREATE INDEX IF NOT EXISTS idx_applications_p_created
+                    ON applications_partitioned (created_at DESC);
+                CREATE INDEX IF NOT EXISTS idx_applications_p_search
+                    ON applications_partitioned USING GIN (search_vector);
+                CREATE INDEX IF NOT EXISTS idx_applications_p_archivable
+                    ON applications_partitioned (updated_at)
+                    WHERE status = 'ARCHIVED' AND archived_at IS NULL;
+
+                -- Writes to the live table from here on reach the copy
+                CREATE OR REPLACE FUNCTION mirror_application() RETURNS trigger AS $fn$
+                BEGIN
+                    INSERT INTO applications_partitioned (
+                        id, company, role, job_description, resume, user_email,
+                        deadline_duration, created_at, status, cover_letter_available,
+                        reminder_sent, state_version, updated_at
+                    )
+                    VALUES (
+                        NEW.id, NEW.company, NEW.role, NEW.job_description, NEW.resume,
+                        NEW.user_email, NEW.deadline_duration, NEW.created_at, NEW.status,
+                        NEW.cover_letter_available, NEW.reminder_sent, NEW.state_version,
+                        NEW.updated_at
+                    )
+                    ON CONFLICT (id, created_at) DO UPDATE SET
+                        company = EXCLUDED.company,
+                        role = EXCLUDED.role,
+                        job_description = EXCLUDED.job_description,
+                        resume = EXCLUDED.resume,
+                        user_email = EXCLUDED.user_email,
+                        deadline_duration = EXCLUDED.deadline_duration,
+                        status = EXCLUDED.status,
+                        cover_letter_available = EXCLUDED.cover_letter_available,
+                        reminder_sent = EXCLUDED.reminder_sent,
+                        state_version = EXCLUDED.state_version,
+                        updated_at = EXCLUDED.updated_at;
+                    RETURN NULL;
+                END
+                $fn$ LANGUAGE plpgsql;
+                DROP TRIGGER IF EXISTS applications_mirror ON applications;
+                CREATE TRIGGER applications_mirror
+                    AFTER INSERT OR UPDATE ON applications
+                    FOR EACH ROW EXECUTE FUNCTION mirror_application();
+            END
+            $$
+            """,
+            # Copies rows the trigger has not, committing every batch_size;
+            # a row the trigger already wrote is newer and is kept
+            """
+            CREATE OR REPLACE PROCEDURE backfill_partitioned_applications(batch_size INTEGER)
+            AS $$
+            DECLARE
+                last_id VARCHAR := '';
+                copied INTEGER;
+            BEGIN
+                IF (SELECT relkind FROM pg_class WHERE oid = 'applications'::regclass) = 'p' THEN
+                    RETURN;
+                END IF;
+                LOOP
+                    WITH batch AS (
+                        SELECT * FROM applications
+                        WHERE id > last_id
+                        ORDER BY id
+                        LIMIT batch_size
+                    ), copy AS (
+                        INSERT INTO applications_partitioned (
+                            id, company, role, job_description, resume, user_email,
+                            deadline_duration, created_at, status, cover_letter_available,
+                            reminder_sent, state_version, updated_at
+                        )
+                        SELECT id, company, role, job_description, resume, user_email,
+                               deadline_duration, created_at, status,
+                               cover_letter_available, reminder_sent, state_version,
+                               updated_at
+                        FROM batch
+                        ON CONFLICT (id, created_at) DO NOTHING
+                    )
+                    SELECT COUNT(*), MAX(id) INTO copied, last_id FROM batch;
+                    EXIT WHEN copied = 0;
+                    COMMIT;
+                END LOOP;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            "CALL backfill_partitioned_applications(5000)",
+            # The only blocking step: the copy is complete, so swap the names
+            """
+            DO $$
+            BEGIN
+                IF (SELECT relkind FROM pg_class WHERE oid = 'applications'::regclass) = 'p' THEN
+                    RETURN;
+                END IF;
+                LOCK TABLE applications IN ACCESS EXCLUSIVE MODE;
+                DROP TABLE applications;
+                ALTER TABLE applications_partitioned RENAME TO applications;
+                ALTER INDEX idx_applications_p_user_created RENAME TO idx_applications_user_created;
+                ALTER INDEX idx_applications_p_status_created RENAME TO idx_applications_status_created;
+                ALTER INDEX idx_applications_p_company RENAME TO idx_applications_company;
+                ALTER INDEX idx_applications_p_created RENAME TO idx_applications_created;
+                ALTER INDEX idx_applications_p_search RENAME TO idx_applications_search;
+                ALTER INDEX idx_applications_p_archivable RENAME TO idx_applications_archivable;
+            END
+            $$
+            """,
+            "DROP PROCEDURE IF EXISTS backfill_partitioned_applications(INTEGER)",
+            "DROP FUNCTION IF EXISTS mirror_application()",
+        ],
+        transactional=False,
+    ),
+    Migration(
+        9,
+        "create_application_archive",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS application_archive (
+                id VARCHAR PRIMARY KEY,
+                created_at TIMESTAMP NOT NULL,
+                job_description_z BYTEA NOT NULL,
+                resume_z BYTEA NOT NULL,
+                archived_at TIMESTAMP DEFAULT NOW()
+            )
+            """,
+        ],
+    ),
+    Migration(
+        10,
+        "create_cover_letters",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS cover_letters (
+                id BIGSERIAL PRIMARY KEY,
+                application_id VARCHAR NOT NULL,
+                version INTEGER NOT NULL,
+                cover_letter TEXT NOT NULL,
+                score DOUBLE PRECISION,
+                source VARCHAR NOT NULL,
+                is_current BOOLEAN NOT NULL DEFAULT FALSE,
+                run_key VARCHAR,
+                created_at TIMESTAMP DEFAULT NOW(),
+                UNIQUE (application_id, version)
+            )
+            """,
+            # At most one current letter per application
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_cover_letters_current
+            ON cover_letters (application_id) WHERE is_current
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_cover_letters_run_key ON cover_letters (run_key)",
+        ],
+    ),
+    Migration(
+        11,
+        "add_application_deadline_columns",
+        [
+            # Set when a workflow hands its deadline to the scheduler and
+            # cleared once handled, so the partial indexes only hold pending rows
+            """
+            ALTER TABLE applications
+                ADD COLUMN IF NOT EXISTS reminder_due_at TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS archive_due_at TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS deadline_scheduled BOOLEAN NOT NULL DEFAULT FALSE
+            """,
+            # Partitioned tables cannot build indexes CONCURRENTLY
+            """
+            CREATE INDEX IF NOT EXISTS idx_applications_reminder_due
+            ON applications (reminder_due_at) WHERE reminder_due_at IS NOT NULL
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_applications_archive_due
+            ON applications (archive_due_at) WHERE archive_due_at IS NOT NULL
+            """,
+        ],
+    ),
+    Migration(
+        12,
+        "create_resume_uploads",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS resume_uploads (
+                file_hash VARCHAR PRIMARY KEY,
+                filename VARCHAR,
+                content_type VARCHAR,
+                size_bytes INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT NOW()
+            )
+            """,
+        ],
+    ),
+    Migration(
+        13,
+        "create_application_keys",
+        [
+            # The partitioned primary key (id, created_at) does not keep ids
+            # unique on its own. This table does, and maps each id to its
+            # partition key so lookups by id read a single partition.
+            """
+            CREATE TABLE IF NOT EXISTS application_keys (
+                id VARCHAR PRIMARY KEY,
+                created_at TIMESTAMP NOT NULL
+            )
+            """,
+            """
+            CREATE OR REPLACE FUNCTION register_application_key()
+            RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO application_keys (id, created_at)
+                VALUES (NEW.id, NEW.created_at);
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            # Holds off inserts until the backfill below commits, so none is missed
+            """
+            CREATE TRIGGER applications_register_key
+            AFTER INSERT ON applications
+            FOR EACH ROW EXECUTE FUNCTION register_application_key()
+            """,
+            """
+            INSERT INTO application_keys (id, created_at)
+            SELECT id, created_at FROM applications
+            """,
+        ],
+    ),
+    Migration(
+        14,
+        "maintain_application_search_vector",
+        [
+            # A generated vector was recomputed when archiving blanked
+            # job_description, dropping archived rows from full-text search.
+            # DROP EXPRESSION keeps the stored values without a rewrite.
+            "ALTER TABLE applications ALTER COLUMN search_vector DROP EXPRESSION",
+            """
+            CREATE OR REPLACE FUNCTION application_search_vector()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'UPDATE' AND NEW.archived_at IS NOT NULL THEN
+                    -- Archived text lives in application_archive; keep its vector
+                    NEW.search_vector := OLD.search_vector;
+                ELSE
+                    NEW.search_vector := to_tsvector(
+                        'english',
+                        NEW.company || ' ' || NEW.role || ' ' || NEW.job_description
+                    );
+                END IF;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER applications_search_vector
+            BEFORE INSERT OR UPDATE OF company, role, job_description ON applications
+            FOR EACH ROW EXECUTE FUNCTION application_search_vector()
+            """,
+            # Rows archived so far lost their job description terms; the
+            # archive activity rebuilds them from the compressed blobs
+            "UPDATE applications SET search_vector = NULL WHERE archived_at IS NOT NULL",
+            """
+            CREATE INDEX IF NOT EXISTS idx_applications_search_pending
+            ON applications (archived_at) WHERE search_vector IS NULL
+            """,
+        ],
+    ),
+    Migration(
+        15,
+        "partition_rows_from_default_partition",
+        [
+            # Rows for a month without a partition land in the DEFAULT one,
+            # after which CREATE TABLE ... PARTITION OF for that month fails.
+            # The month's rows are now copied into a standalone table, deleted
+            # from the default partition and the table attached in their place,
+            # all in the caller's transaction. A month that still fails is
+            # skipped with a message instead of failing the whole call; one
+            # message per month moved or skipped is returned.
+            "DROP FUNCTION IF EXISTS ensure_application_partitions(DATE, DATE, TEXT)",
+            """
+            CREATE FUNCTION ensure_application_partitions(
+                start_month DATE, end_month DATE, parent TEXT DEFAULT 'applications'
+            )
+            RETURNS SETOF TEXT AS $$
+            DECLARE
+                default_partition REGCLASS;
+                oldest_default TIMESTAMP;
+                month DATE;
+                next_month DATE;
+                partition TEXT;
+                moved BIGINT;
+                columns TEXT;
+            BEGIN
+                SELECT c.oid::regclass INTO default_partition
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = parent::regclass
+                  AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT';
+
+                -- Also partition months that have only reached the default
+                IF default_partition IS NOT NULL THEN
+                    EXECUTE format('SELECT MIN(created_at) FROM %s', default_partition)
+                        INTO oldest_default;
+                END IF;
+                month := date_trunc('month', LEAST(start_month, oldest_default::date));
+                SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO columns
+                FROM pg_attribute
+                WHERE attrelid = parent::regclass AND attnum > 0 AND NOT attisdropped;
+
+                WHILE month <= end_month LOOP
+                    next_month := (month + interval '1 month')::date;
+                    partition := 'applications_' || to_char(month, 'YYYY_MM');
+                    IF to_regclass(partition) IS NULL THEN
+                        BEGIN
+                            moved := 0;
+                            IF default_partition IS NOT NULL THEN
+                                EXECUTE format(
+                                    'SELECT COUNT(*) FROM %s WHERE created_at >= %L AND created_at < %L',
+                                    default_partition, month, next_month
+                                ) INTO moved;
+                            END IF;
+
+                            IF moved = 0 THEN
+                                EXECUTE format(
+                                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                                    partition, parent, month, next_month
+                                );
+                            ELSE
+                                -- LIKE copies no triggers, so rows keep their keys
+                                -- and search vectors; ATTACH reuses the indexes
+                                EXECUTE format(
+                                    'CREATE TABLE %I (LIKE %I INCLUDING ALL)',
+                                    partition, parent
+                                );
+                                EXECUTE format(
+                                    'INSERT INTO %I (%s) SELECT %s FROM %s WHERE created_at >= %L AND created_at < %L',
+                                    partition, columns, columns, default_partition, month, next_month
+                                );
+                                EXECUTE format(
+                                    'DELETE FROM %s WHERE created_at >= %L AND created_at < %L',
+                                    default_partition, month, next_month
+                                );
+                                EXECUTE format(
+                                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                                    parent, partition, month, next_month
+                                );
+                                RETURN NEXT format(
+                                    'Moved %s rows from %s into new partition %s',
+                                    moved, default_partition, partition
+                                );
+                            END IF;
+                        EXCEPTION WHEN OTHERS THEN
+                            RETURN NEXT format(
+                                'Skipped partition %s: %s', partition, SQLERRM
+                            );
+                        END;
+                    END IF;
+                    month := next_month;
+                END LOOP;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+        ],
+    ),
+]
+
+CONCURRENT_INDEX_NAME = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE,
+)
+
+
+def _drop_invalid_indexes(cur, migration: Migration):
+    """Drop INVALID leftovers of a previously failed concurrent build.
+
+    IF NOT EXISTS would otherwise skip them and leave an unusable index.
+    """
+    names = [
+        match.group(1)
+        for statement in migration.statements
+        for match in [CONCURRENT_INDEX_NAME.search(statement)]
+        if match
+    ]
+    if not names:
+        return
+
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid AND c.relname = ANY(%s)
+        """,
+        (names,),
+    )
+    for (name,) in cur.fetchall():
+        logger.warning(f"Dropping invalid index {name} left by a failed build")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def _apply(database: Database, migration: Migration):
+    conn = database.conn
+    if migration.transactional:
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                for statement in migration.statements:
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (migration.version, migration.name),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+    else:
+        with conn.cursor() as cur:
+            _drop_invalid_indexes(cur, migration)
+            for statement in migration.statements:
+                cur.execute(statement)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (migration.version, migration.name),
+            )
+
+
+def run_migrations(database: Database) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied"""
+    conn = database.conn
+    conn.rollback()
+    conn.autocommit = True
+    applied_now = []
+
+    try:
+        with conn.cursor() as cur:
+            # Blocks until any concurrently starting process has finished
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+            try:
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        name VARCHAR NOT NULL,
+                        applied_at TIMESTAMP DEFAULT NOW()
+                    )
+                    """
+                )
+                cur.execute("SELECT version FROM schema_migrations")
+                applied = {row[0] for row in cur.fetchall()}
+
+                for migration in MIGRATIONS:
+                    if migration.version in applied:
+                        continue
+                    logger.info(
+                        f"Applying migration {migration.version}: {migration.name}"
+                    )
+                    _apply(database, migration)
+                    applied_now.append(migration.version)
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+    finally:
+        conn.autocommit = False
+
+    if applied_now:
+        logger.info(f"Applied migrations: {applied_now}")
+    return applied_now
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    database = Database()
+    database.connect()
+    try:
+        run_migrations(database)
+    finally:
+        database.close()
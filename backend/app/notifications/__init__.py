@@ -0,0 +1 @@
+# Notification Delivery Package
\ No newline at end of file
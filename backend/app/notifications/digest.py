@@ -0,0 +1,40 @@
+import os
+from email.message import EmailMessage
+from typing import List
+
+
+def build_reminder_digest(user_email: str, reminders: List[dict]) -> EmailMessage:
+    """One follow-up email covering every reminder due for this user"""
+    count = len(reminders)
+    message = EmailMessage()
+    message["From"] = os.getenv("SMTP_FROM", "reminders@jobtracker.local")
+    message["To"] = user_email
+    if count == 1:
+        message["Subject"] = (
+            f"Reminder: Follow up on your application to {reminders[0]['company']}"
+        )
+    else:
+        message["Subject"] = f"Reminder: Follow up on {count} job applications"
+
+    lines = "\n".join(
+        f"- {reminder['role']} at {reminder['company']} "
+        f"(Application ID: {reminder['application_id']})"
+        for reminder in reminders
+    )
+    message.set_content(
+        f"""Dear Applicant,
+
+It's been a while since you submitted these applications, and you might want to follow up:
+
+{lines}
+
+Consider:
+- Sending a polite follow-up email
+- Connecting with the hiring manager on LinkedIn
+- Checking for any updates on the company's career page
+
+Best regards,
+Job Tracker MVP
+"""
+    )
+    return message
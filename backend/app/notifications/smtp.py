@@ -0,0 +1,205 @@
+"""
+Pooled, persistent SMTP delivery with command pipelining and a send-rate limit.
+"""
+
+import os
+import queue
+import smtplib
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from email import policy
+from email.message import EmailMessage
+from email.utils import getaddresses
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the pooled session is unusable (SMTPException subclasses
+# OSError, so OSError itself is too broad here)
+STALE_SESSION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting messages per second"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SMTPPool:
+    """Bounded pool of logged-in SMTP sessions reused across messages"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 2,
+        max_rate: float = 10.0,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(max_rate)
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.use_tls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.username:
+            smtp.login(self.username, self.password or "")
+        return smtp
+
+    def _acquire(self) -> smtplib.SMTP:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        return self._idle.get(timeout=self.timeout)
+
+    def _discard(self, smtp: smtplib.SMTP):
+        try:
+            smtp.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        smtp = self._acquire()
+        try:
+            yield smtp
+        except STALE_SESSION_ERRORS:
+            self._discard(smtp)
+            raise
+        except Exception:
+            self._idle.put(smtp)
+            raise
+        else:
+            self._idle.put(smtp)
+
+    def send(self, message: EmailMessage):
+        """Send one message, reconnecting once if the pooled session went stale"""
+        self.rate_limiter.acquire()
+        for attempt in range(2):
+            try:
+                with self.connection() as smtp:
+                    send_pipelined(smtp, message)
+                return
+            except STALE_SESSION_ERRORS:
+                if attempt == 1:
+                    raise
+                logger.info("SMTP session dropped, reconnecting")
+
+    def close(self):
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            with self._lock:
+                self._created -= 1
+
+
+def send_pipelined(smtp: smtplib.SMTP, message: EmailMessage):
+    """Send MAIL FROM and all RCPT TO commands in one write when PIPELINING is offered"""
+    if not smtp.has_extn("pipelining"):
+        smtp.send_message(message)
+        return
+
+    sender = getaddresses([message["From"]])[0][1]
+    recipients = [address for _, address in getaddresses(message.get_all("To", []))]
+
+    smtp.send(
+        f"MAIL FROM:<{sender}>\r\n"
+        + "".join(f"RCPT TO:<{recipient}>\r\n" for recipient in recipients)
+    )
+    code, response = smtp.getreply()
+    rcpt_replies = [smtp.getreply() for _ in recipients]
+    if code != 250:
+        smtp.rset()
+        raise smtplib.SMTPSenderRefused(code, response, sender)
+
+    refused = {
+        recipient: reply
+        for recipient, reply in zip(recipients, rcpt_replies)
+        if reply[0] not in (250, 251)
+    }
+    if len(refused) == len(recipients):
+        smtp.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    code, response = smtp.data(message.as_bytes(policy=policy.SMTP))
+    if code != 250:
+        smtp.rset()
+        raise smtplib.SMTPDataError(code, response)
+
+
+# Global pool instance (None when SMTP is not configured)
+_smtp_pool = None
+
+
+def get_smtp_pool() -> Optional[SMTPPool]:
+    """Get or create the process-wide SMTP pool from SMTP_* settings"""
+    global _smtp_pool
+
+    if _smtp_pool is None and os.getenv("SMTP_HOST"):
+        _smtp_pool = SMTPPool(
+            host=os.getenv("SMTP_HOST"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            username=os.getenv("SMTP_USERNAME"),
+            password=os.getenv("SMTP_PASSWORD"),
+            use_tls=os.getenv("SMTP_USE_TLS", "true").lower() == "true",
+            size=int(os.getenv("SMTP_POOL_SIZE", "2")),
+            max_rate=float(os.getenv("SMTP_MAX_RATE", "10")),
+        )
+
+    return _smtp_pool
@@ -0,0 +1,342 @@
+"""
+Prometheus metrics and OpenTelemetry tracing shared by the API and the worker.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
+from functools import wraps
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from opentelemetry import trace
+from opentelemetry.propagate import extract
+from temporalio import activity
+from temporalio.worker import (
+    ActivityInboundInterceptor,
+    ExecuteActivityInput,
+    Interceptor,
+)
+
+from app.profiling import SLOW_CAPTURE
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer("rsa-cover-letter-builder")
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route",
+    ["method", "route", "status"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Database query latency by operation",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_CONNECTED = Gauge("db_connected", "1 when the database connection is open")
+DB_RECONNECTS = Counter("db_reconnects_total", "Database reconnect attempts")
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "LLM call latency by generation path",
+    ["path", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM tokens by generation path", ["path", "kind"]
+)
+LLM_ERRORS = Counter("llm_errors_total", "Failed LLM calls", ["path"])
+GENERATION_QUEUE_WAIT = Histogram(
+    "generation_queue_wait_seconds",
+    "Time from requesting a generation slot to the generation starting",
+    ["lane"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 1800),
+)
+LLM_TIER_LATENCY = Histogram(
+    "llm_tier_duration_seconds",
+    "Generate-and-score time per model tier",
+    ["tier", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_TIER_REQUESTS = Counter(
+    "llm_tier_requests_total", "Generations served by each model tier", ["tier"]
+)
+LLM_TIER_ESCALATIONS = Counter(
+    "llm_tier_escalations_total",
+    "Generations passed on to the next model tier",
+    ["tier", "reason"],
+)
+ACTIVITY_SCHEDULE_TO_START = Histogram(
+    "activity_schedule_to_start_seconds",
+    "Time an activity task waited in the task queue",
+    ["activity_type"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+ACTIVITY_LATENCY = Histogram(
+    "activity_duration_seconds",
+    "Activity execution time",
+    ["activity_type", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+ACTIVITIES_IN_FLIGHT = Gauge(
+    "activities_in_flight", "Activities currently executing", ["activity_type"]
+)
+ACTIVITY_EXECUTOR_THREADS = Gauge(
+    "activity_executor_threads", "Threads in the sync activity executor"
+)
+ACTIVITY_EXECUTOR_BUSY = Gauge(
+    "activity_executor_busy_threads", "Executor threads running an activity"
+)
+ACTIVITY_EXECUTOR_QUEUED = Gauge(
+    "activity_executor_queued", "Activities waiting for a free executor thread"
+)
+ACTIVITY_EXECUTOR_UTILIZATION = Gauge(
+    "activity_executor_utilization", "Busy executor threads / total threads"
+)
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total",
+    "New applications admitted, deferred or rejected, by the signal deciding",
+    ["decision", "signal"],
+)
+ADMISSION_PRESSURE = Gauge(
+    "admission_pressure",
+    "Admission signal value over its limit (above 1 defers or rejects)",
+    ["signal"],
+)
+WORKER_STARTUP_SECONDS = Gauge(
+    "worker_startup_seconds",
+    "Seconds spent in each worker startup phase (phase=total is time to ready)",
+    ["phase"],
+)
+
+
+def setup_tracing(service_name: str):
+    """Export spans over OTLP when OTEL_EXPORTER_OTLP_ENDPOINT is configured"""
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+            OTLPSpanExporter,
+        )
+    except ImportError:
+        logger.warning("OpenTelemetry SDK/exporter not installed, tracing disabled")
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name})
+    )
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    logger.info(f"OpenTelemetry tracing enabled for {service_name}")
+
+
+def temporal_interceptors() -> list:
+    """Interceptors that carry trace context from the API into workflows and activities"""
+    from temporalio.contrib.opentelemetry import TracingInterceptor
+
+    return [TracingInterceptor()]
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Time every request by route template and wrap it in a server span
+
+    Requests slower than PROFILE_SLOW_THRESHOLD_SECONDS keep a profile.
+    """
+    start = time.perf_counter()
+    status = 500
+    with tracer.start_as_current_span(
+        f"{request.method} {request.url.path}",
+        context=extract(request.headers),
+        kind=trace.SpanKind.SERVER,
+    ) as span, SLOW_CAPTURE.track(
+        "request", f"{request.method} {request.url.path}"
+    ) as capture:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            span.update_name(f"{request.method} {route_path}")
+            span.set_attribute("http.status_code", status)
+            if capture is not None:
+                capture.name = f"{request.method} {route_path} {status}"
+            HTTP_REQUEST_LATENCY.labels(
+                request.method, route_path, str(status)
+            ).observe(time.perf_counter() - start)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+# Smoothed latency of short queries for admission control; decays while no
+# queries run
+DB_LATENCY_SMOOTHING = 0.2
+DB_LATENCY_HALF_LIFE_SECONDS = 10.0
+_db_latency = {"seconds": 0.0, "at": 0.0}
+
+
+@contextmanager
+def observe_query(operation: str, bulk: bool = False):
+    """Record how long a database operation took
+
+    Bulk operations (exports, listings, batch jobs) are slow by size, not by
+    load, so they stay out of the smoothed latency admission control reads.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        DB_QUERY_LATENCY.labels(operation).observe(elapsed)
+        if not bulk:
+            recent = recent_query_seconds()
+            _db_latency["seconds"] = recent + DB_LATENCY_SMOOTHING * (
+                elapsed - recent
+            )
+            _db_latency["at"] = time.monotonic()
+
+
+def recent_query_seconds() -> float:
+    """Exponentially smoothed latency of non-bulk queries in this process"""
+    idle = time.monotonic() - _db_latency["at"]
+    return _db_latency["seconds"] * 0.5 ** (idle / DB_LATENCY_HALF_LIFE_SECONDS)
+
+
+@contextmanager
+def observe_llm(path: str):
+    """Record latency and failures of one LLM call"""
+    start = time.perf_counter()
+    outcome = "success"
+    with tracer.start_as_current_span(f"llm.{path}"):
+        try:
+            yield
+        except Exception:
+            outcome = "error"
+            LLM_ERRORS.labels(path).inc()
+            raise
+        finally:
+            LLM_LATENCY.labels(path, outcome).observe(time.perf_counter() - start)
+
+
+def record_llm_usage(path: str, usage_metadata: Optional[Any]):
+    """Count prompt/completion tokens from a Gemini response's usage metadata
+
+    Prompt tokens include those served from context caching, which are also
+    counted as "cached".
+    """
+    if usage_metadata is None:
+        return
+    LLM_TOKENS.labels(path, "prompt").inc(
+        getattr(usage_metadata, "prompt_token_count", 0) or 0
+    )
+    LLM_TOKENS.labels(path, "cached").inc(
+        getattr(usage_metadata, "cached_content_token_count", 0) or 0
+    )
+    LLM_TOKENS.labels(path, "completion").inc(
+        getattr(usage_metadata, "candidates_token_count", 0) or 0
+    )
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor publishing busy and queued counts for autoscaling"""
+
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers)
+        self._counts_lock = threading.Lock()
+        self._busy = 0
+        self._queued = 0
+        ACTIVITY_EXECUTOR_THREADS.set(max_workers)
+
+    def _update(self, busy: int = 0, queued: int = 0):
+        with self._counts_lock:
+            self._busy += busy
+            self._queued += queued
+            ACTIVITY_EXECUTOR_BUSY.set(self._busy)
+            ACTIVITY_EXECUTOR_QUEUED.set(self._queued)
+            ACTIVITY_EXECUTOR_UTILIZATION.set(self._busy / self._max_workers)
+
+    def _run(self, fn, args, kwargs):
+        self._update(busy=1, queued=-1)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._update(busy=-1)
+
+    def submit(self, fn, /, *args, **kwargs):
+        self._update(queued=1)
+        try:
+            return super().submit(self._run, fn, args, kwargs)
+        except Exception:
+            self._update(queued=-1)
+            raise
+
+
+class ActivityMetricsInterceptor(Interceptor):
+    """Worker interceptor recording schedule-to-start, in-flight and execution latency
+
+    Activities slower than PROFILE_SLOW_THRESHOLD_SECONDS keep a profile.
+    """
+
+    def intercept_activity(
+        self, next: ActivityInboundInterceptor
+    ) -> ActivityInboundInterceptor:
+        return _ActivityMetricsInbound(next)
+
+
+class _ActivityMetricsInbound(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        info = activity.info()
+        ACTIVITY_SCHEDULE_TO_START.labels(info.activity_type).observe(
+            (info.started_time - info.current_attempt_scheduled_time).total_seconds()
+        )
+
+        in_flight = ACTIVITIES_IN_FLIGHT.labels(info.activity_type)
+        in_flight.inc()
+        start = time.perf_counter()
+        outcome = "success"
+        threaded = isinstance(input.executor, ThreadPoolExecutor)
+        with SLOW_CAPTURE.track(
+            "activity", info.activity_type, current_thread=not threaded
+        ) as capture:
+            if threaded and capture is not None:
+                input = replace(input, fn=_sampled(input.fn, capture))
+            try:
+                return await self.next.execute_activity(input)
+            except Exception:
+                outcome = "failure"
+                raise
+            finally:
+                in_flight.dec()
+                ACTIVITY_LATENCY.labels(info.activity_type, outcome).observe(
+                    time.perf_counter() - start
+                )
+
+
+def _sampled(fn, capture):
+    """Sync activity `fn` with its executor thread added to the capture"""
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        with SLOW_CAPTURE.attach(capture):
+            return fn(*args, **kwargs)
+
+    return run
@@ -0,0 +1,393 @@
+"""
+On-demand profiling and slow-operation capture for the API and the worker.
+
+- sample_stacks(): a time-bounded sampling CPU profile of every thread, read
+  from sys._current_frames(). It needs no profiler extension and costs
+  nothing outside the sampling window.
+- memory_snapshot(): the tracemalloc allocations that grew during a window.
+- SlowCapture: samples the threads of in-flight requests and activities and
+  keeps the profile of any that runs past PROFILE_SLOW_THRESHOLD_SECONDS in a
+  bounded ring buffer. Time spent parked (a long poll waiting for a change)
+  is not sampled and does not count towards the threshold.
+
+Profiles are collapsed stacks, one "outer;inner;leaf count" line per stack:
+the input format of flamegraph.pl, inferno and speedscope.
+
+The admin surface needs PROFILING_TOKEN, sent as the X-Profiling-Token
+header. The API serves it under /api/admin/profiling and the worker on
+WORKER_PROFILING_PORT. Without the token both stay disabled.
+"""
+
+import hmac
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10"))
+# 0 disables slow-operation capture
+PROFILE_SLOW_THRESHOLD_SECONDS = float(
+    os.getenv("PROFILE_SLOW_THRESHOLD_SECONDS", "0")
+)
+PROFILE_SLOW_CAPTURES = int(os.getenv("PROFILE_SLOW_CAPTURES", "50"))
+MEMORY_TRACE_FRAMES = int(os.getenv("PROFILE_MEMORY_TRACE_FRAMES", "10"))
+
+TOKEN_HEADER = "X-Profiling-Token"
+COLLAPSED_MEDIA_TYPE = "text/plain; charset=utf-8"
+
+
+class ProfilerBusy(Exception):
+    """Another on-demand profile is already running in this process"""
+
+
+# One on-demand profile at a time: tracemalloc is process-wide, and
+# concurrent samplers would only skew each other
+_on_demand = threading.Lock()
+
+
+def token_valid(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN) and hmac.compare_digest(
+        (token or "").encode(), PROFILING_TOKEN.encode()
+    )
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}"
+            f":{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def collapsed(stacks: Counter) -> str:
+    """Collapsed-stack text for flamegraph tools, hottest stacks first"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _clamp(seconds: float) -> float:
+    return min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+
+
+def sample_stacks(
+    seconds: float, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS
+) -> Counter:
+    """Stacks of every other thread, sampled for `seconds`, rooted at the
+    thread name. Blocks the calling thread for the duration."""
+    if not _on_demand.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        stacks: Counter = Counter()
+        own = threading.get_ident()
+        interval = max(interval_ms, 1) / 1000
+        deadline = time.monotonic() + _clamp(seconds)
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own:
+                    name = names.get(thread_id, str(thread_id))
+                    stacks[f"{name};{_collapse(frame)}"] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _on_demand.release()
+
+
+def memory_snapshot(seconds: float, limit: int = 25) -> Dict[str, Any]:
+    """Live allocations that grew during `seconds`, largest first, by line.
+
+    Tracing starts for the window unless it was already on (PYTHONTRACEMALLOC),
+    so only allocations made during the window are attributed.
+    """
+    if not _on_demand.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    started = not tracemalloc.is_tracing()
+    try:
+        if started:
+            tracemalloc.start(MEMORY_TRACE_FRAMES)
+        before = tracemalloc.take_snapshot()
+        time.sleep(_clamp(seconds))
+        after = tracemalloc.take_snapshot()
+        traced, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+        _on_demand.release()
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(ignore).compare_to(
+        before.filter_traces(ignore), "lineno"
+    )
+    return {
+        "seconds": _clamp(seconds),
+        "traced_bytes": traced,
+        "peak_bytes": peak,
+        "top": [
+            {
+                "location": f"{stat.traceback[0].filename}"
+                f":{stat.traceback[0].lineno}",
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in diff[:limit]
+            if stat.size_diff > 0
+        ],
+    }
+
+
+@dataclass
+class Operation:
+    kind: str
+    name: str
+    started: float
+    started_at: datetime
+    thread_ids: Set[int] = field(default_factory=set)
+    stacks: Counter = field(default_factory=Counter)
+    parked_seconds: float = 0.0
+    parked_since: Optional[float] = None
+
+
+# Operation tracked in the current task or thread, for SlowCapture.parked()
+_current_operation: ContextVar[Optional[Operation]] = ContextVar(
+    "slow_capture_operation", default=None
+)
+
+
+class SlowCapture:
+    """Profiles of requests and activities slower than a threshold.
+
+    One sampler thread runs while operations are in flight and records the
+    stack of each thread they run on. Async code shares the event loop
+    thread, so its samples show whatever the loop was running, which for a
+    blocked loop is the culprit. Fast operations' samples are dropped when
+    they finish; slow ones go to a ring buffer of the last `size`.
+    """
+
+    def __init__(
+        self,
+        threshold_seconds: float = PROFILE_SLOW_THRESHOLD_SECONDS,
+        interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS,
+        size: int = PROFILE_SLOW_CAPTURES,
+    ):
+        self.threshold = threshold_seconds
+        self.interval = max(interval_ms, 1) / 1000
+        self.captures: deque = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._in_flight: Dict[int, Operation] = {}
+        self._cond = threading.Condition()
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    @contextmanager
+    def track(
+        self, kind: str, name: str, current_thread: bool = True
+    ) -> Iterator[Optional[Operation]]:
+        """Sample the operation while it runs; `name` may be updated inside"""
+        if not self.enabled:
+            yield None
+            return
+
+        operation = Operation(
+            kind, name, time.monotonic(), datetime.now(timezone.utc)
+        )
+        if current_thread:
+            operation.thread_ids.add(threading.get_ident())
+        with self._cond:
+            self._in_flight[id(operation)] = operation
+            self._ensure_sampler()
+            self._cond.notify()
+        token = _current_operation.set(operation)
+        try:
+            yield operation
+        finally:
+            _current_operation.reset(token)
+            duration = time.monotonic() - operation.started - operation.parked_seconds
+            with self._cond:
+                del self._in_flight[id(operation)]
+                if duration >= self.threshold and operation.stacks:
+                    self._keep(operation, duration)
+
+    @contextmanager
+    def attach(self, operation: Optional[Operation]) -> Iterator[None]:
+        """Also sample the calling thread, e.g. an executor thread"""
+        if operation is None:
+            yield
+            return
+        thread_id = threading.get_ident()
+        with self._cond:
+            operation.thread_ids.add(thread_id)
+        try:
+            yield
+        finally:
+            with self._cond:
+                operation.thread_ids.discard(thread_id)
+
+    @contextmanager
+    def parked(self) -> Iterator[None]:
+        """Idle waiting inside the current operation: not sampled, and left
+        out of its duration"""
+        operation = _current_operation.get()
+        if operation is None:
+            yield
+            return
+        operation.parked_since = time.monotonic()
+        try:
+            yield
+        finally:
+            operation.parked_seconds += time.monotonic() - operation.parked_since
+            operation.parked_since = None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [
+                {k: v for k, v in capture.items() if k != "stacks"}
+                for capture in reversed(self.captures)
+            ]
+
+    def get(self, capture_id: int) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            for capture in self.captures:
+                if capture["id"] == capture_id:
+                    return capture
+        return None
+
+    def _keep(self, operation: Operation, duration: float):
+        self.captures.append(
+            {
+                "id": next(self._ids),
+                "kind": operation.kind,
+                "name": operation.name,
+                "started_at": operation.started_at.isoformat(),
+                "duration_seconds": round(duration, 3),
+                "parked_seconds": round(operation.parked_seconds, 3),
+                "samples": sum(operation.stacks.values()),
+                "stacks": operation.stacks,
+            }
+        )
+        logger.info(
+            f"Captured profile of slow {operation.kind} {operation.name} "
+            f"({duration:.2f}s)"
+        )
+
+    def _ensure_sampler(self):
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(
+                target=self._sample, name="slow-capture-sampler", daemon=True
+            )
+            self._sampler.start()
+
+    def _sample(self):
+        while True:
+            with self._cond:
+                while not self._in_flight:
+                    self._cond.wait()
+                frames = sys._current_frames()
+                # Collapse each thread once, however many operations share it
+                collapsed_by_thread: Dict[int, str] = {}
+                for operation in self._in_flight.values():
+                    if operation.parked_since is not None:
+                        continue
+                    for thread_id in operation.thread_ids:
+                        frame = frames.get(thread_id)
+                        if frame is None:
+                            continue
+                        if thread_id not in collapsed_by_thread:
+                            collapsed_by_thread[thread_id] = _collapse(frame)
+                        operation.stacks[collapsed_by_thread[thread_id]] += 1
+                del frames
+            time.sleep(self.interval)
+
+
+SLOW_CAPTURE = SlowCapture()
+
+
+class _ProfilingHandler(BaseHTTPRequestHandler):
+    """The API's /api/admin/profiling routes, for processes without FastAPI"""
+
+    def do_GET(self):
+        if not token_valid(self.headers.get(TOKEN_HEADER)):
+            self._send(403, "application/json", {"detail": "Invalid profiling token"})
+            return
+
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            if parts == ["cpu"]:
+                stacks = sample_stacks(
+                    float(query.get("seconds", 10)),
+                    float(query.get("interval_ms", PROFILE_SAMPLE_INTERVAL_MS)),
+                )
+                self._send(200, COLLAPSED_MEDIA_TYPE, collapsed(stacks))
+            elif parts == ["memory"]:
+                self._send(
+                    200,
+                    "application/json",
+                    memory_snapshot(
+                        float(query.get("seconds", 10)), int(query.get("limit", 25))
+                    ),
+                )
+            elif parts == ["slow"]:
+                self._send(200, "application/json", SLOW_CAPTURE.list())
+            elif len(parts) == 2 and parts[0] == "slow" and parts[1].isdigit():
+                capture = SLOW_CAPTURE.get(int(parts[1]))
+                if capture is None:
+                    self._send(404, "application/json", {"detail": "Capture evicted"})
+                else:
+                    self._send(200, COLLAPSED_MEDIA_TYPE, collapsed(capture["stacks"]))
+            else:
+                self._send(404, "application/json", {"detail": "Not found"})
+        except ProfilerBusy as e:
+            self._send(409, "application/json", {"detail": str(e)})
+        except ValueError as e:
+            self._send(400, "application/json", {"detail": str(e)})
+
+    def _send(self, status: int, content_type: str, body: Any):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.info(f"Profiling request: {format % args}")
+
+
+def serve_profiling(port: int) -> Optional[ThreadingHTTPServer]:
+    """Serve the profiling routes on a side port; off without PROFILING_TOKEN"""
+    if not PROFILING_TOKEN:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", port), _ProfilingHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="profiling-server", daemon=True
+    ).start()
+    logger.info(f"Profiling endpoints served on port {port}")
+    return server
@@ -0,0 +1,209 @@
+"""
+Text extraction from uploaded resume files (PDF, DOCX, plain text).
+
+Extraction is CPU-bound and can take seconds for a large PDF, so the API
+runs it in a ProcessPoolExecutor of RESUME_PARSE_PROCESSES spawned workers,
+off the event loop and outside the GIL. At most RESUME_PARSE_MAX_PENDING
+parses are queued or running per API process, and identical files uploaded
+concurrently share one parse. A parse that runs past
+RESUME_PARSE_TIMEOUT_SECONDS has its pool's processes stopped, so hostile
+files cannot hold on to them.
+
+This module is what the spawned workers import: keep it free of API,
+database and LLM imports. pypdf is imported on first PDF only.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, Optional
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+RESUME_UPLOAD_MAX_BYTES = int(os.getenv("RESUME_UPLOAD_MAX_BYTES", str(5 * 2**20)))
+RESUME_PARSE_PROCESSES = int(os.getenv("RESUME_PARSE_PROCESSES", "2"))
+RESUME_PARSE_MAX_PENDING = int(
+    os.getenv("RESUME_PARSE_MAX_PENDING", str(RESUME_PARSE_PROCESSES * 4))
+)
+RESUME_PARSE_TIMEOUT_SECONDS = float(os.getenv("RESUME_PARSE_TIMEOUT_SECONDS", "30"))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+# Uncompressed size limit of a DOCX's word/document.xml (zip bombs)
+RESUME_DOCX_MAX_XML_BYTES = int(
+    os.getenv("RESUME_DOCX_MAX_XML_BYTES", str(16 * 2**20))
+)
+
+PDF = "pdf"
+DOCX = "docx"
+TEXT = "text"
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class UnsupportedResume(ValueError):
+    """Not a PDF, DOCX or UTF-8/Latin-1 text file"""
+
+
+class ParserBusy(Exception):
+    """RESUME_PARSE_MAX_PENDING parses are already queued or running"""
+
+
+def detect_kind(filename: Optional[str], data: bytes) -> str:
+    """File type from its leading bytes, falling back to the extension"""
+    if data.startswith(b"%PDF-"):
+        return PDF
+    if data.startswith(b"PK\x03\x04"):
+        return DOCX
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in ("", ".txt", ".md", ".text") and b"\x00" not in data[:4096]:
+        return TEXT
+    raise UnsupportedResume(f"Unsupported resume file type {extension or '?'}")
+
+
+def normalize_text(text: str) -> str:
+    """Trimmed lines, single spaces, at most one blank line in a row"""
+    lines = [" ".join(line.split()) for line in text.replace("\x00", "").splitlines()]
+    text = "\n".join(lines).strip()
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def _pdf_text(data: bytes) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(BytesIO(data))
+    return "\n\n".join(
+        page.extract_text() or "" for page in reader.pages[:RESUME_MAX_PAGES]
+    )
+
+
+def _docx_text(data: bytes) -> str:
+    """Paragraph text of word/document.xml; no python-docx needed"""
+    try:
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            # Reads stop at the declared size, so checking it bounds memory
+            size = archive.getinfo("word/document.xml").file_size
+            if size > RESUME_DOCX_MAX_XML_BYTES:
+                raise UnsupportedResume(
+                    f"DOCX document is {size} bytes uncompressed, over the "
+                    f"{RESUME_DOCX_MAX_XML_BYTES}-byte limit"
+                )
+            document = ElementTree.fromstring(archive.read("word/document.xml"))
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise UnsupportedResume(f"Not a DOCX file: {e}")
+    paragraphs = []
+    for paragraph in document.iter(f"{WORD_NAMESPACE}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{WORD_NAMESPACE}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{WORD_NAMESPACE}tab":
+                parts.append("\t")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _plain_text(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+EXTRACTORS = {PDF: _pdf_text, DOCX: _docx_text, TEXT: _plain_text}
+
+
+def extract_text(data: bytes, kind: str) -> str:
+    """Normalized text of a resume file; runs in a pool worker"""
+    return normalize_text(EXTRACTORS[kind](data))
+
+
+class ResumeParser:
+    """Bounded process pool plus coalescing of identical in-flight files"""
+
+    def __init__(
+        self,
+        processes: int = RESUME_PARSE_PROCESSES,
+        max_pending: int = RESUME_PARSE_MAX_PENDING,
+    ):
+        self.processes = processes
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # Parses submitted to a pool and not finished there, including ones
+        # whose request already timed out; updated from pool threads
+        self._outstanding = 0
+        self._outstanding_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned rather than forked: the API process runs threads
+            self._pool = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def parse(self, file_hash: str, data: bytes, kind: str) -> str:
+        """Text of the file hashing to `file_hash`, parsed once however many
+        requests upload it at the same time"""
+        future = self._in_flight.get(file_hash)
+        if future is None:
+            if self._outstanding >= self.max_pending:
+                raise ParserBusy("Too many resumes being parsed, retry later")
+            future = asyncio.ensure_future(self._run(data, kind))
+            self._in_flight[file_hash] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(file_hash, None))
+        # Shielded so one client disconnecting does not cancel the others' parse
+        return await asyncio.shield(future)
+
+    async def _run(self, data: bytes, kind: str) -> str:
+        # Once more if the pool broke under this parse, e.g. stopped because
+        # another parse timed out
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                future = pool.submit(extract_text, data, kind)
+                self._track(future)
+                return await asyncio.wait_for(
+                    asyncio.wrap_future(future), RESUME_PARSE_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                self._recycle(pool)
+                raise
+            except BrokenProcessPool:
+                self._recycle(pool)
+                if attempt:
+                    raise
+
+    def _track(self, future: Future):
+        with self._outstanding_lock:
+            self._outstanding += 1
+        future.add_done_callback(self._untrack)
+
+    def _untrack(self, _: Future):
+        with self._outstanding_lock:
+            self._outstanding -= 1
+
+    def _recycle(self, pool: ProcessPoolExecutor):
+        """Replace `pool` and stop its processes.
+
+        shutdown() alone leaves a process stuck on a hostile file running.
+        Other parses on the pool fail with BrokenProcessPool and are retried.
+        """
+        if self._pool is pool:
+            self._pool = None
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        # Queued parses are not cancelled: they fail as broken and are retried
+        pool.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._recycle(self._pool)
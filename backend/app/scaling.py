@@ -0,0 +1,138 @@
+"""
+Task-queue backlog and a worker replica recommendation for autoscaling.
+
+Backlog comes from DescribeTaskQueue in enhanced mode (Temporal server 1.25+
+or a current `temporal server start-dev`). The recommendation follows the
+usual queue-length rule: enough replicas that each holds at most
+SCALING_BACKLOG_PER_WORKER queued tasks, one more when the oldest task has
+waited longer than SCALING_MAX_BACKLOG_AGE_SECONDS, within the min/max bounds.
+Scale-down smoothing is left to the autoscaler.
+
+With FAIR_SCHEDULING, generations wait at GenerationSchedulerWorkflow rather
+than on the task queue, and the scheduler's capacity grows with the worker
+replicas, so its queued generations count as backlog too.
+"""
+
+import math
+import os
+from datetime import timedelta
+from typing import Dict, Optional
+
+from temporalio.api.enums.v1 import DescribeTaskQueueMode, TaskQueueType
+from temporalio.api.taskqueue.v1 import TaskQueue, TaskQueueVersionSelection
+from temporalio.api.workflowservice.v1 import DescribeTaskQueueRequest
+from temporalio.client import Client
+
+from app.workflows.generation_scheduler import (
+    GenerationSchedulerWorkflow,
+    GENERATION_SCHEDULER_ID,
+)
+
+TASK_QUEUE = "job-applications"
+
+# Threads (and concurrent activity slots) per worker replica
+ACTIVITY_THREADS = int(os.getenv("WORKER_ACTIVITY_THREADS", "10"))
+
+SCALING_BACKLOG_PER_WORKER = int(os.getenv("SCALING_BACKLOG_PER_WORKER", "20"))
+SCALING_MAX_BACKLOG_AGE_SECONDS = float(
+    os.getenv("SCALING_MAX_BACKLOG_AGE_SECONDS", "30")
+)
+SCALING_MIN_REPLICAS = int(os.getenv("SCALING_MIN_REPLICAS", "1"))
+SCALING_MAX_REPLICAS = int(os.getenv("SCALING_MAX_REPLICAS", "10"))
+
+TASK_QUEUE_TYPES = {
+    "workflow": TaskQueueType.TASK_QUEUE_TYPE_WORKFLOW,
+    "activity": TaskQueueType.TASK_QUEUE_TYPE_ACTIVITY,
+}
+
+
+async def describe_task_queue(
+    client: Client, timeout: timedelta = timedelta(seconds=5)
+) -> Dict[str, dict]:
+    """Backlog, rates and live pollers per task queue type (unversioned workers)"""
+    response = await client.workflow_service.describe_task_queue(
+        DescribeTaskQueueRequest(
+            namespace=client.namespace,
+            task_queue=TaskQueue(name=TASK_QUEUE),
+            api_mode=DescribeTaskQueueMode.DESCRIBE_TASK_QUEUE_MODE_ENHANCED,
+            versions=TaskQueueVersionSelection(unversioned=True),
+            task_queue_types=list(TASK_QUEUE_TYPES.values()),
+            report_stats=True,
+            report_pollers=True,
+        ),
+        timeout=timeout,
+    )
+
+    queues = {}
+    for name, queue_type in TASK_QUEUE_TYPES.items():
+        backlog, backlog_age, add_rate, dispatch_rate = 0, 0.0, 0.0, 0.0
+        pollers = set()
+        for version in response.versions_info.values():
+            info = version.types_info.get(queue_type)
+            if info is None:
+                continue
+            stats = info.stats
+            backlog += stats.approximate_backlog_count
+            backlog_age = max(
+                backlog_age,
+                stats.approximate_backlog_age.ToTimedelta().total_seconds(),
+            )
+            add_rate += stats.tasks_add_rate
+            dispatch_rate += stats.tasks_dispatch_rate
+            pollers.update(poller.identity for poller in info.pollers)
+        queues[name] = {
+            "backlog": backlog,
+            "backlog_age_seconds": round(backlog_age, 3),
+            "tasks_add_rate": round(add_rate, 3),
+            "tasks_dispatch_rate": round(dispatch_rate, 3),
+            "pollers": len(pollers),
+        }
+    return queues
+
+
+async def describe_generation_queue(
+    client: Client, timeout: timedelta = timedelta(seconds=5)
+) -> dict:
+    """Generations queued at the fair scheduler and the longest wait among them"""
+    snapshot = await client.get_workflow_handle(GENERATION_SCHEDULER_ID).query(
+        GenerationSchedulerWorkflow.snapshot, rpc_timeout=timeout
+    )
+    return {
+        "queued": sum(snapshot["queued"].values()),
+        "oldest_wait_seconds": max(
+            (user["oldest_wait_seconds"] for user in snapshot["users"].values()),
+            default=0.0,
+        ),
+        "capacity": snapshot["capacity"],
+    }
+
+
+def recommend_replicas(
+    queues: Dict[str, dict], generations: Optional[dict] = None
+) -> dict:
+    """Desired worker replicas for the current backlog, including generations
+    waiting at the fair scheduler when `generations` is given"""
+    current = max(queue["pollers"] for queue in queues.values())
+    backlog = sum(queue["backlog"] for queue in queues.values())
+    oldest = max(queue["backlog_age_seconds"] for queue in queues.values())
+    queued_generations = 0
+    if generations is not None:
+        queued_generations = generations["queued"]
+        backlog += queued_generations
+        oldest = max(oldest, generations["oldest_wait_seconds"])
+
+    desired = math.ceil(backlog / SCALING_BACKLOG_PER_WORKER)
+    if oldest > SCALING_MAX_BACKLOG_AGE_SECONDS:
+        desired = max(desired, current + 1)
+
+    return {
+        "current_replicas": current,
+        "desired_replicas": min(
+            SCALING_MAX_REPLICAS, max(SCALING_MIN_REPLICAS, desired)
+        ),
+        "backlog": backlog,
+        "queued_generations": queued_generations,
+        "oldest_backlog_seconds": oldest,
+        "backlog_per_worker": SCALING_BACKLOG_PER_WORKER,
+        "activity_slots_per_worker": ACTIVITY_THREADS,
+    }
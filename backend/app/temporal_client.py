@@ -0,0 +1,31 @@
+import os
+from temporalio.client import Client, TLSConfig
+
+from app.observability import temporal_interceptors
+from app.serialization import data_converter
+
+
+async def connect_temporal() -> Client:
+    """Connect to Temporal Cloud (API key) or a local Temporal server"""
+    temporal_address = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
+    temporal_namespace = os.getenv("TEMPORAL_NAMESPACE", "default")
+    temporal_api_key = os.getenv("TEMPORAL_API_KEY")
+
+    if temporal_api_key:
+        # Temporal Cloud connection with API key via rpc_metadata
+        return await Client.connect(
+            temporal_address,
+            namespace=temporal_namespace,
+            tls=TLSConfig(),
+            rpc_metadata={"authorization": f"Bearer {temporal_api_key}"},
+            interceptors=temporal_interceptors(),
+            data_converter=data_converter(),
+        )
+
+    # Local Temporal connection
+    return await Client.connect(
+        temporal_address,
+        namespace=temporal_namespace,
+        interceptors=temporal_interceptors(),
+        data_converter=data_converter(),
+    )
@@ -1,55 +1,284 @@
 import asyncio
 import os
+import time
 import logging
-from temporalio.client import Client
+from datetime import timedelta
+from prometheus_client import start_http_server
+from temporalio.client import (
+    Client,
+    Schedule,
+    ScheduleActionStartWorkflow,
+    ScheduleAlreadyRunningError,
+    ScheduleIntervalSpec,
+    ScheduleSpec,
+)
 from temporalio.worker import Worker
 
 from app.workflows.job_application import JobApplicationWorkflow
-from app.activities.llm_activities import generate_cover_letter
-from app.activities.notification_activities import send_reminder_notification
+from app.workflows.cover_letter import CoverLetterWorkflow
+from app.workflows.reminder_digest import (
+    ReminderDigestWorkflow,
+    DIGEST_SCHEDULE_ID,
+    DIGEST_WORKFLOW_ID,
+)
+from app.workflows.application_archive import (
+    ApplicationArchiveWorkflow,
+    ARCHIVE_SCHEDULE_ID,
+    ARCHIVE_WORKFLOW_ID,
+)
+from app.workflows.deadline_scheduler import (
+    DeadlineSchedulerWorkflow,
+    DEADLINE_SCHEDULE_ID,
+    DEADLINE_WORKFLOW_ID,
+)
+from app.workflows.generation_scheduler import (
+    GenerationSchedulerWorkflow,
+    GENERATION_SCHEDULER_ID,
+    WORKER_REGISTRATION_INTERVAL,
+)
+from app.activities.llm_activities import (
+    generate_cover_letter,
+    generate_cover_letter_candidates,
+    prewarm_llm_stack,
+    release_prompt_cache,
+)
+from app.activities.notification_activities import (
+    send_reminder_notification,
+    queue_reminder_notification,
+    send_reminder_digests,
+)
+from app.activities.profile_activities import extract_resume_profile
+from app.activities.application_activities import (
+    sync_application_state,
+    archive_applications,
+    store_cover_letters,
+    hand_off_deadline,
+    process_due_deadlines,
+)
 from app.models.database import init_db
+from app.observability import (
+    ActivityMetricsInterceptor,
+    InstrumentedThreadPoolExecutor,
+    WORKER_STARTUP_SECONDS,
+    setup_tracing,
+)
+from app.profiling import serve_profiling
+from app.scaling import ACTIVITY_THREADS, TASK_QUEUE
+from app.temporal_client import connect_temporal
 
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
+# Upper bound on how long pre-warming may delay polling for tasks
+PREWARM_TIMEOUT_SECONDS = float(os.getenv("WORKER_PREWARM_TIMEOUT_SECONDS", "30"))
+
+FAIR_SCHEDULING = os.getenv("FAIR_SCHEDULING", "false").lower() == "true"
+# Generations each worker replica adds to the scheduler's capacity
+GENERATION_SLOTS_PER_WORKER = int(
+    os.getenv("GENERATION_SLOTS_PER_WORKER") or ACTIVITY_THREADS
+)
+# Optional cap on generations at once across all replicas (e.g. an LLM quota)
+GENERATION_SLOTS = int(os.getenv("GENERATION_SLOTS") or 0)
+GENERATION_SLOT_LEASE_MINUTES = int(os.getenv("GENERATION_SLOT_LEASE_MINUTES", "20"))
+# Interactive grants in a row before a waiting bulk generation gets one
+GENERATION_INTERACTIVE_WEIGHT = int(os.getenv("GENERATION_INTERACTIVE_WEIGHT", "4"))
+
+
+async def ensure_schedule(
+    client: Client, schedule_id: str, workflow_run, workflow_id: str, every: timedelta
+):
+    """Create a periodic workflow schedule if it does not exist yet"""
+    try:
+        await client.create_schedule(
+            schedule_id,
+            Schedule(
+                action=ScheduleActionStartWorkflow(
+                    workflow_run,
+                    id=workflow_id,
+                    task_queue=TASK_QUEUE,
+                ),
+                spec=ScheduleSpec(intervals=[ScheduleIntervalSpec(every=every)]),
+            ),
+        )
+        logger.info(f"Created {schedule_id} schedule (every {every})")
+    except ScheduleAlreadyRunningError:
+        pass
+
+
+async def ensure_generation_scheduler(client: Client):
+    """Start GenerationSchedulerWorkflow if needed and push the current config"""
+    await client.start_workflow(
+        GenerationSchedulerWorkflow.run,
+        None,
+        id=GENERATION_SCHEDULER_ID,
+        task_queue=TASK_QUEUE,
+        start_signal="configure",
+        start_signal_args=[
+            {
+                "max_capacity": GENERATION_SLOTS or None,
+                "lease_seconds": GENERATION_SLOT_LEASE_MINUTES * 60,
+                "interactive_weight": GENERATION_INTERACTIVE_WEIGHT,
+            }
+        ],
+    )
+    logger.info(
+        f"Generation scheduler configured with {GENERATION_SLOTS_PER_WORKER} "
+        f"slots per worker (cap {GENERATION_SLOTS or 'none'})"
+    )
+
+
+async def register_generation_worker(client: Client):
+    """Keep this replica's slots counted in the scheduler's capacity"""
+    handle = client.get_workflow_handle(GENERATION_SCHEDULER_ID)
+    registration = {"identity": client.identity, "slots": GENERATION_SLOTS_PER_WORKER}
+    try:
+        while True:
+            try:
+                await handle.signal(
+                    GenerationSchedulerWorkflow.register_worker, registration
+                )
+            except Exception as e:
+                logger.warning(f"Generation worker registration failed: {e}")
+            await asyncio.sleep(WORKER_REGISTRATION_INTERVAL.total_seconds())
+    finally:
+        try:
+            await handle.signal(
+                GenerationSchedulerWorkflow.unregister_worker, client.identity
+            )
+        except Exception:
+            pass  # Dropped after WORKER_REGISTRATION_TTL instead
+
+
+class StartupTimer:
+    """Records how long each startup phase takes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+
+    def phase(self, name: str):
+        now = time.perf_counter()
+        WORKER_STARTUP_SECONDS.labels(name).set(now - self.last)
+        logger.info(f"Startup phase {name} took {now - self.last:.2f}s")
+        self.last = now
+
+    def ready(self) -> float:
+        total = time.perf_counter() - self.started
+        WORKER_STARTUP_SECONDS.labels("total").set(total)
+        return total
+
+
+async def prewarm(executor):
+    """Load the LLM stack before polling, bounded by PREWARM_TIMEOUT_SECONDS.
+
+    On timeout the worker starts anyway; warm-up keeps running on its thread
+    and the first LLM activity waits for it to finish.
+    """
+    future = asyncio.get_running_loop().run_in_executor(executor, prewarm_llm_stack)
+    try:
+        await asyncio.wait_for(asyncio.shield(future), PREWARM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Pre-warm still running after {PREWARM_TIMEOUT_SECONDS}s, "
+            "starting worker anyway"
+        )
+    except Exception as e:
+        logger.warning(f"Pre-warm failed, loading lazily on first use: {e}")
+
 
 async def main():
     """Start Temporal worker"""
+    timer = StartupTimer()
+
     # Initialize database
     init_db()
+    timer.phase("init_db")
 
-    # Connect to Temporal
-    from temporalio.client import TLSConfig
-
-    temporal_address = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
-    temporal_namespace = os.getenv("TEMPORAL_NAMESPACE", "default")
-    temporal_api_key = os.getenv("TEMPORAL_API_KEY")
+    # Metrics are scraped from a side port since the worker serves no HTTP
+    setup_tracing("cover-letter-worker")
+    start_http_server(int(os.getenv("WORKER_METRICS_PORT", "9100")))
+    serve_profiling(int(os.getenv("WORKER_PROFILING_PORT", "9101")))
 
-    if temporal_api_key:
-        # Temporal Cloud connection with API key via rpc_metadata
-        client = await Client.connect(
-            temporal_address,
-            namespace=temporal_namespace,
-            tls=TLSConfig(),
-            rpc_metadata={"authorization": f"Bearer {temporal_api_key}"},
-        )
-    else:
-        # Local Temporal connection
-        client = await Client.connect(temporal_address, namespace=temporal_namespace)
+    # Connect to Temporal (tracing interceptor is inherited by the worker)
+    client = await connect_temporal()
+    timer.phase("connect_temporal")
+    await ensure_schedule(
+        client,
+        DIGEST_SCHEDULE_ID,
+        ReminderDigestWorkflow.run,
+        DIGEST_WORKFLOW_ID,
+        timedelta(minutes=int(os.getenv("DIGEST_INTERVAL_MINUTES", "60"))),
+    )
+    await ensure_schedule(
+        client,
+        ARCHIVE_SCHEDULE_ID,
+        ApplicationArchiveWorkflow.run,
+        ARCHIVE_WORKFLOW_ID,
+        timedelta(hours=int(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))),
+    )
+    await ensure_schedule(
+        client,
+        DEADLINE_SCHEDULE_ID,
+        DeadlineSchedulerWorkflow.run,
+        DEADLINE_WORKFLOW_ID,
+        timedelta(minutes=int(os.getenv("DEADLINE_INTERVAL_MINUTES", "5"))),
+    )
+    if FAIR_SCHEDULING:
+        await ensure_generation_scheduler(client)
 
     # Create worker with activity executor for sync activities
-    import concurrent.futures
+    activity_executor = InstrumentedThreadPoolExecutor(ACTIVITY_THREADS)
+    timer.phase("schedules")
+
+    # Import the LLM stack and ready DSPy now rather than in the first task
+    await prewarm(activity_executor)
+    timer.phase("prewarm")
 
     worker = Worker(
         client,
-        task_queue="job-applications",
-        workflows=[JobApplicationWorkflow],
-        activities=[generate_cover_letter, send_reminder_notification],
-        activity_executor=concurrent.futures.ThreadPoolExecutor(max_workers=10),
+        task_queue=TASK_QUEUE,
+        workflows=[
+            JobApplicationWorkflow,
+            CoverLetterWorkflow,
+            ReminderDigestWorkflow,
+            ApplicationArchiveWorkflow,
+            DeadlineSchedulerWorkflow,
+            GenerationSchedulerWorkflow,
+        ],
+        activities=[
+            generate_cover_letter,
+            generate_cover_letter_candidates,
+            send_reminder_notification,
+            queue_reminder_notification,
+            send_reminder_digests,
+            extract_resume_profile,
+            sync_application_state,
+            archive_applications,
+            store_cover_letters,
+            hand_off_deadline,
+            process_due_deadlines,
+        ],
+        activity_executor=activity_executor,
+        # One slot per thread: extra slots would only queue tasks locally,
+        # hiding them from the task-queue backlog and from other replicas
+        max_concurrent_activities=ACTIVITY_THREADS,
+        interceptors=[ActivityMetricsInterceptor()],
+    )
+
+    registration = (
+        asyncio.create_task(register_generation_worker(client))
+        if FAIR_SCHEDULING
+        else None
     )
 
-    logger.info("Starting Temporal worker...")
-    await worker.run()
+    logger.info(f"Starting Temporal worker (ready in {timer.ready():.2f}s)...")
+    try:
+        await worker.run()
+    finally:
+        if registration is not None:
+            registration.cancel()
+            await asyncio.gather(registration, return_exceptions=True)
+        await asyncio.get_running_loop().run_in_executor(None, release_prompt_cache)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEDULE_ID = "application-archive"
+ARCHIVE_WORKFLOW_ID = "application-archive-run"
+
+
+@workflow.defn
+class ApplicationArchiveWorkflow:
+    """Periodic run (via a Temporal schedule) that keeps partitions ahead and
+    moves ARCHIVED application blobs to the compressed archive table"""
+
+    @workflow.run
+    async def run(self) -> dict:
+        result = await workflow.execute_activity(
+            "archive_applications",
+            start_to_close_timeout=timedelta(minutes=30),
+            heartbeat_timeout=timedelta(minutes=2),
+            retry_policy=RetryPolicy(
+                maximum_attempts=3,
+                initial_interval=timedelta(seconds=30),
+                backoff_coefficient=2.0,
+            ),
+        )
+        logger.info(f"Application archive run finished: {result}")
+        return result
@@ -0,0 +1,135 @@
+import asyncio
+from datetime import timedelta
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
+from typing import Callable, Dict, Any, Optional
+import logging
+
+from app.workflows.generation_scheduler import (
+    GENERATION_SLOT_TIMEOUT,
+    release_generation_slot,
+    request_generation_slot,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def attach_resume_profile(application_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach the precomputed resume profile, falling back to the raw resume"""
+    try:
+        profile = await workflow.execute_activity(
+            "extract_resume_profile",
+            application_data,
+            start_to_close_timeout=timedelta(minutes=2),
+            retry_policy=RetryPolicy(
+                maximum_attempts=3,
+                initial_interval=timedelta(seconds=2),
+                backoff_coefficient=2.0,
+            ),
+        )
+    except ActivityError as e:
+        logger.warning(f"Resume profile unavailable, using raw resume: {e}")
+        return application_data
+
+    return {**application_data, "resume_profile": profile}
+
+
+async def generate_candidates(application_data: Dict[str, Any]) -> dict:
+    """Best-of-N generation: {"cover_letter", "score", "alternates"}"""
+    return await workflow.execute_activity(
+        "generate_cover_letter_candidates",
+        application_data,
+        start_to_close_timeout=timedelta(minutes=5),
+        retry_policy=RetryPolicy(
+            maximum_attempts=3,
+            initial_interval=timedelta(seconds=2),
+            backoff_coefficient=2.0,
+        ),
+    )
+
+
+async def generate_candidates_fairly(
+    application_data: Dict[str, Any], granted_lane: Callable[[], Optional[str]]
+) -> dict:
+    """generate_candidates once GenerationSchedulerWorkflow grants a slot
+
+    `granted_lane` reads the lane from the workflow's generation_slot signal.
+    """
+    queued_at = workflow.now()
+    queued = await request_generation_slot(application_data)
+    if queued:
+        try:
+            await workflow.wait_condition(
+                lambda: granted_lane() is not None, timeout=GENERATION_SLOT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning("No generation slot granted in time, generating anyway")
+
+    try:
+        return await generate_candidates(
+            {
+                **application_data,
+                "generation_lane": granted_lane()
+                or application_data["generation_lane"],
+                "queued_at": queued_at.isoformat(),
+            }
+        )
+    finally:
+        if queued:
+            await release_generation_slot()
+
+
+async def store_cover_letters(application_id: str, result: dict, source: str) -> int:
+    """Persist the best candidate as the current version, alternates after it"""
+    info = workflow.info()
+    return await workflow.execute_activity(
+        "store_cover_letters",
+        {
+            "application_id": application_id,
+            "candidates": [
+                {"cover_letter": result["cover_letter"], "score": result["score"]},
+                *result["alternates"],
+            ],
+            "source": source,
+            "run_key": f"{info.workflow_id}:{info.run_id}",
+        },
+        start_to_close_timeout=timedelta(seconds=30),
+        retry_policy=RetryPolicy(maximum_attempts=5),
+    )
+
+
+@workflow.defn
+class CoverLetterWorkflow:
+    """Lightweight regeneration of an application's cover letter.
+
+    Runs independently of JobApplicationWorkflow, so it also works after
+    that workflow has closed; letters are read from the cover_letters table.
+    """
+
+    def __init__(self):
+        self.generation_lane: Optional[str] = None
+
+    @workflow.run
+    async def run(self, application_data: Dict[str, Any]) -> dict:
+        application_data = await attach_resume_profile(application_data)
+        if application_data.get("generation_lane"):
+            result = await generate_candidates_fairly(
+                application_data, lambda: self.generation_lane
+            )
+        else:
+            result = await generate_candidates(application_data)
+        version = await store_cover_letters(
+            application_data["id"], result, "regenerated"
+        )
+        return {
+            "application_id": application_data["id"],
+            "version": version,
+            "score": result["score"],
+            "candidates": 1 + len(result["alternates"]),
+        }
+
+    @workflow.signal
+    def generation_slot(self, lane: str):
+        """Sent by GenerationSchedulerWorkflow when generation may start"""
+        self.generation_lane = lane
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_SCHEDULE_ID = "deadline-scheduler"
+DEADLINE_WORKFLOW_ID = "deadline-scheduler-run"
+
+
+@workflow.defn
+class DeadlineSchedulerWorkflow:
+    """Periodic run (via a Temporal schedule) that sends due reminders and
+    auto-archives for applications whose workflows handed off their deadline"""
+
+    @workflow.run
+    async def run(self) -> dict:
+        result = await workflow.execute_activity(
+            "process_due_deadlines",
+            start_to_close_timeout=timedelta(minutes=10),
+            heartbeat_timeout=timedelta(minutes=2),
+            retry_policy=RetryPolicy(
+                maximum_attempts=3,
+                initial_interval=timedelta(seconds=10),
+                backoff_coefficient=2.0,
+            ),
+        )
+        logger.info(f"Deadline scheduler run finished: {result}")
+        return result
@@ -0,0 +1,308 @@
+"""
+Fair scheduling of cover letter generation across users.
+
+Generation workflows ask GenerationSchedulerWorkflow for a slot before
+running the LLM activity and hand it back afterwards, so at most `capacity`
+generations sit on the job-applications task queue at once and the order
+they reach it is decided here rather than by FIFO submission time.
+
+Capacity follows the live worker replicas: each worker signals
+`register_worker` with its slot count every WORKER_REGISTRATION_INTERVAL,
+and capacity is the sum over workers heard from within
+WORKER_REGISTRATION_TTL, optionally capped by `max_capacity`. The lanes:
+
+- interactive lane: a submission from a user with nothing else queued or
+  running. Served first, up to `interactive_weight` grants in a row while
+  bulk work waits.
+- bulk lane: everything else, one queue per user served round-robin, so a
+  user importing 300 applications gets one slot per turn like everyone else.
+
+Slots are leased: a requester that never releases its slot (terminated,
+timed out) loses it after `lease_seconds`.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from temporalio import workflow
+from temporalio.exceptions import FailureError
+
+logger = logging.getLogger(__name__)
+
+GENERATION_SCHEDULER_ID = "generation-scheduler"
+
+INTERACTIVE_LANE = "interactive"
+BULK_LANE = "bulk"
+
+# How long a requester waits for a slot before generating anyway
+GENERATION_SLOT_TIMEOUT = timedelta(minutes=30)
+
+# Workers re-register this often; one not heard from for the TTL is gone
+WORKER_REGISTRATION_INTERVAL = timedelta(seconds=30)
+WORKER_REGISTRATION_TTL = timedelta(seconds=90)
+
+
+@workflow.defn
+class GenerationSchedulerWorkflow:
+    """Long-running slot dispatcher; started (and configured) by the worker"""
+
+    def __init__(self):
+        self.max_capacity: Optional[int] = None
+        # identity -> {"slots", "seen_at"} of live worker replicas
+        self.workers: Dict[str, Dict[str, Any]] = {}
+        self.lease = timedelta(minutes=20)
+        self.interactive_weight = 4
+        self.interactive: List[Dict[str, Any]] = []
+        # Insertion order is the round-robin order: a served user moves last
+        self.bulk: Dict[str, List[Dict[str, Any]]] = {}
+        self.active: Dict[str, Dict[str, Any]] = {}
+        self.interactive_streak = 0
+        self.changed = False
+
+    @workflow.run
+    async def run(self, state: Optional[Dict[str, Any]] = None) -> None:
+        if state:
+            self._restore(state)
+
+        while True:
+            self.changed = False
+            await self._grant()
+            try:
+                await workflow.wait_condition(
+                    lambda: self.changed
+                    or workflow.info().is_continue_as_new_suggested(),
+                    timeout=self._next_expiry(),
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._expire_leases()
+            self._expire_workers()
+
+            if workflow.info().is_continue_as_new_suggested():
+                await workflow.wait_condition(workflow.all_handlers_finished)
+                workflow.continue_as_new(self._state())
+
+    @property
+    def capacity(self) -> int:
+        slots = sum(worker["slots"] for worker in self.workers.values())
+        if self.max_capacity:
+            return min(slots, self.max_capacity)
+        return slots
+
+    @workflow.signal
+    def configure(self, config: Dict[str, Any]):
+        """Capacity cap and lane settings, sent by every worker on startup"""
+        self.max_capacity = config.get("max_capacity")
+        self.lease = timedelta(seconds=config["lease_seconds"])
+        self.interactive_weight = config["interactive_weight"]
+        self.changed = True
+
+    @workflow.signal
+    def register_worker(self, registration: Dict[str, Any]):
+        """A live worker replica and its generation slots: {"identity", "slots"}"""
+        self.workers[registration["identity"]] = {
+            "slots": registration["slots"],
+            "seen_at": workflow.now().isoformat(),
+        }
+        self.changed = True
+
+    @workflow.signal
+    def unregister_worker(self, identity: str):
+        """A worker shutting down; its slots go before the TTL would drop them"""
+        self.workers.pop(identity, None)
+        self.changed = True
+
+    @workflow.signal
+    def request(self, request: Dict[str, Any]):
+        """Queue a generation: {"workflow_id", "user", "lane"}"""
+        workflow_id = request["workflow_id"]
+        if workflow_id in self.active or self._find(workflow_id) is not None:
+            return
+
+        user = request["user"]
+        busy = user in self.bulk or any(
+            entry["user"] == user
+            for entry in self.interactive + list(self.active.values())
+        )
+        lane = (
+            INTERACTIVE_LANE
+            if request.get("lane") == INTERACTIVE_LANE and not busy
+            else BULK_LANE
+        )
+        entry = {
+            "workflow_id": workflow_id,
+            "user": user,
+            "lane": lane,
+            "queued_at": workflow.now().isoformat(),
+        }
+        if lane == INTERACTIVE_LANE:
+            self.interactive.append(entry)
+        else:
+            self.bulk.setdefault(user, []).append(entry)
+        self.changed = True
+
+    @workflow.signal
+    def release(self, workflow_id: str):
+        """Free the requester's slot, or drop it from the queue if not granted"""
+        if self.active.pop(workflow_id, None) is None:
+            entry = self._find(workflow_id)
+            if entry is not None:
+                self._remove(entry)
+        self.changed = True
+
+    @workflow.query
+    def snapshot(self) -> Dict[str, Any]:
+        """Slots in use and, per user, queued and running generations"""
+        now = workflow.now()
+        users: Dict[str, Dict[str, Any]] = {}
+        queued = self.interactive + [e for q in self.bulk.values() for e in q]
+        for entry in queued + list(self.active.values()):
+            stats = users.setdefault(
+                entry["user"], {"queued": 0, "running": 0, "oldest_wait_seconds": 0}
+            )
+            if entry.get("granted_at"):
+                stats["running"] += 1
+                continue
+            stats["queued"] += 1
+            waited = (now - datetime.fromisoformat(entry["queued_at"])).total_seconds()
+            stats["oldest_wait_seconds"] = max(stats["oldest_wait_seconds"], waited)
+        return {
+            "capacity": self.capacity,
+            "workers": len(self.workers),
+            "running": len(self.active),
+            "queued": {
+                INTERACTIVE_LANE: len(self.interactive),
+                BULK_LANE: sum(len(q) for q in self.bulk.values()),
+            },
+            "users": users,
+        }
+
+    def _next_request(self) -> Optional[Dict[str, Any]]:
+        if self.interactive and (
+            not self.bulk or self.interactive_streak < self.interactive_weight
+        ):
+            self.interactive_streak += 1
+            return self.interactive.pop(0)
+        if not self.bulk:
+            return None
+
+        self.interactive_streak = 0
+        user = next(iter(self.bulk))
+        queue = self.bulk.pop(user)
+        entry = queue.pop(0)
+        if queue:
+            self.bulk[user] = queue
+        return entry
+
+    async def _grant(self):
+        granted = []
+        while len(self.active) < self.capacity:
+            entry = self._next_request()
+            if entry is None:
+                break
+            entry["granted_at"] = workflow.now().isoformat()
+            self.active[entry["workflow_id"]] = entry
+            granted.append(entry)
+        await asyncio.gather(*(self._notify(entry) for entry in granted))
+
+    async def _notify(self, entry: Dict[str, Any]):
+        try:
+            await workflow.get_external_workflow_handle(entry["workflow_id"]).signal(
+                "generation_slot", entry["lane"]
+            )
+        except FailureError as e:
+            # The requester has closed; give the slot to someone else
+            logger.warning(f"Generation slot for {entry['workflow_id']} unused: {e}")
+            self.active.pop(entry["workflow_id"], None)
+            self.changed = True
+
+    def _next_expiry(self) -> Optional[timedelta]:
+        expiries = [
+            datetime.fromisoformat(entry["granted_at"]) + self.lease
+            for entry in self.active.values()
+        ] + [
+            datetime.fromisoformat(worker["seen_at"]) + WORKER_REGISTRATION_TTL
+            for worker in self.workers.values()
+        ]
+        if not expiries:
+            return None
+        return max(timedelta(0), min(expiries) - workflow.now())
+
+    def _expire_leases(self):
+        now = workflow.now()
+        for workflow_id, entry in list(self.active.items()):
+            if datetime.fromisoformat(entry["granted_at"]) + self.lease <= now:
+                logger.warning(f"Generation slot lease expired for {workflow_id}")
+                del self.active[workflow_id]
+
+    def _expire_workers(self):
+        now = workflow.now()
+        for identity, worker in list(self.workers.items()):
+            seen_at = datetime.fromisoformat(worker["seen_at"])
+            if seen_at + WORKER_REGISTRATION_TTL <= now:
+                logger.warning(f"Generation worker {identity} stopped registering")
+                del self.workers[identity]
+
+    def _find(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        for entry in self.interactive + [e for q in self.bulk.values() for e in q]:
+            if entry["workflow_id"] == workflow_id:
+                return entry
+        return None
+
+    def _remove(self, entry: Dict[str, Any]):
+        if entry["lane"] == INTERACTIVE_LANE:
+            self.interactive.remove(entry)
+            return
+        queue = self.bulk[entry["user"]]
+        queue.remove(entry)
+        if not queue:
+            del self.bulk[entry["user"]]
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "max_capacity": self.max_capacity,
+            "workers": self.workers,
+            "lease_seconds": self.lease.total_seconds(),
+            "interactive_weight": self.interactive_weight,
+            "interactive": self.interactive,
+            "bulk": self.bulk,
+            "active": self.active,
+            "interactive_streak": self.interactive_streak,
+        }
+
+    def _restore(self, state: Dict[str, Any]):
+        self.configure(state)
+        self.workers = state["workers"]
+        self.interactive = state["interactive"]
+        self.bulk = state["bulk"]
+        self.active = state["active"]
+        self.interactive_streak = state["interactive_streak"]
+
+
+async def request_generation_slot(application_data: Dict[str, Any]) -> bool:
+    """Queue this workflow's generation; False when the scheduler is not running"""
+    try:
+        await workflow.get_external_workflow_handle(GENERATION_SCHEDULER_ID).signal(
+            GenerationSchedulerWorkflow.request,
+            {
+                "workflow_id": workflow.info().workflow_id,
+                "user": application_data["user_email"],
+                "lane": application_data.get("generation_lane"),
+            },
+        )
+    except FailureError as e:
+        logger.warning(f"Generation scheduler unavailable, not queueing: {e}")
+        return False
+    return True
+
+
+async def release_generation_slot():
+    try:
+        await workflow.get_external_workflow_handle(GENERATION_SCHEDULER_ID).signal(
+            GenerationSchedulerWorkflow.release, workflow.info().workflow_id
+        )
+    except FailureError as e:
+        # The lease expires on its own
+        logger.warning(f"Generation slot not released: {e}")
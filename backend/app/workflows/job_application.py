@@ -1,36 +1,87 @@
 from datetime import timedelta
 from temporalio import workflow
 from temporalio.common import RetryPolicy
-from typing import Optional, Dict, Any
+from temporalio.exceptions import ActivityError
+from typing import Optional, Dict, Any, List
 import logging
 
 from app.models.application import ApplicationStatus
+from app.workflows.cover_letter import (
+    attach_resume_profile,
+    generate_candidates,
+    generate_candidates_fairly,
+    store_cover_letters,
+)
 
 logger = logging.getLogger(__name__)
 
+# Time after the deadline reminder before an untouched application is archived
+ARCHIVE_GRACE_PERIOD = timedelta(days=7)
+
 
 @workflow.defn
 class JobApplicationWorkflow:
     def __init__(self):
         self.status = ApplicationStatus.SUBMITTED
         self.cover_letter: Optional[str] = None
+        self.cover_letter_score: Optional[float] = None
+        self.alternates: List[Dict[str, Any]] = []
         self.reminder_sent = False
         self.updates_received = 0
+        self.application_id: Optional[str] = None
+        self.state_version = 0
+        self.generation_lane: Optional[str] = None
 
     @workflow.run
     async def run(self, application_data: Dict[str, Any]) -> dict:
         """Main workflow execution"""
-        # Step 1: Generate cover letter
-        self.cover_letter = await workflow.execute_activity(
-            "generate_cover_letter",
-            application_data,
-            start_to_close_timeout=timedelta(minutes=5),
-            retry_policy=RetryPolicy(
-                maximum_attempts=3,
-                initial_interval=timedelta(seconds=2),
-                backoff_coefficient=2.0,
-            ),
-        )
+        self.application_id = application_data["id"]
+
+        # Step 0: Reuse (or extract once) the compact profile for this resume
+        if workflow.patched("resume-profile"):
+            application_data = await self._attach_resume_profile(application_data)
+
+        # Step 1: Generate cover letter (best of N candidates from one call,
+        # the rest kept as alternates the user can switch to)
+        if workflow.patched("best-of-n"):
+            # Applications started with a generation_lane wait their turn
+            # with GenerationSchedulerWorkflow
+            if application_data.get("generation_lane"):
+                result = await generate_candidates_fairly(
+                    application_data, lambda: self.generation_lane
+                )
+            else:
+                result = await generate_candidates(application_data)
+            self.cover_letter = result["cover_letter"]
+            self.cover_letter_score = result["score"]
+            self.alternates = result["alternates"]
+
+            # Letters are served from the cover_letters table; the workflow
+            # state stays the fallback if storing fails
+            if workflow.patched("cover-letter-store"):
+                try:
+                    await store_cover_letters(self.application_id, result, "generated")
+                except ActivityError as e:
+                    logger.warning(f"Cover letters not stored: {e}")
+        else:
+            self.cover_letter = await workflow.execute_activity(
+                "generate_cover_letter",
+                application_data,
+                start_to_close_timeout=timedelta(minutes=5),
+                retry_policy=RetryPolicy(
+                    maximum_attempts=3,
+                    initial_interval=timedelta(seconds=2),
+                    backoff_coefficient=2.0,
+                ),
+            )
+        await self._sync_state()
+
+        # Applications started with scheduled_deadline leave the reminder and
+        # auto-archive to DeadlineSchedulerWorkflow, so this workflow only
+        # stays open while the letter is generated
+        if application_data.get("scheduled_deadline"):
+            await self._hand_off_deadline()
+            return self._result(application_data)
 
         # Step 2: Wait for deadline with periodic checks
         deadline_reached = await self._wait_for_deadline_or_update(application_data)
@@ -38,13 +89,14 @@ class JobApplicationWorkflow:
         # Step 3: Handle deadline reached
         if deadline_reached and self.status == ApplicationStatus.SUBMITTED:
             await self._handle_deadline_reached(application_data)
+            await self._sync_state()
 
         # Step 4: Grace period before auto-archive
         if self.status in [
             ApplicationStatus.SUBMITTED,
             ApplicationStatus.REMINDER_SENT,
         ]:
-            await workflow.sleep(timedelta(days=7))  # Grace period
+            await workflow.sleep(ARCHIVE_GRACE_PERIOD)
             if self.status not in [
                 ApplicationStatus.INTERVIEW,
                 ApplicationStatus.OFFER,
@@ -52,7 +104,11 @@ class JobApplicationWorkflow:
             ]:
                 self.status = ApplicationStatus.ARCHIVED
                 logger.info(f"Auto-archived application {application_data['id']}")
+                await self._sync_state()
+
+        return self._result(application_data)
 
+    def _result(self, application_data: Dict[str, Any]) -> dict:
         return {
             "application_id": application_data["id"],
             "final_status": self.status.value,
@@ -60,6 +116,46 @@ class JobApplicationWorkflow:
             "updates_received": self.updates_received,
         }
 
+    async def _hand_off_deadline(self):
+        """Record the due dates in Postgres for DeadlineSchedulerWorkflow"""
+        await workflow.execute_activity(
+            "hand_off_deadline",
+            {
+                "application_id": self.application_id,
+                "grace_period_seconds": int(ARCHIVE_GRACE_PERIOD.total_seconds()),
+            },
+            start_to_close_timeout=timedelta(seconds=30),
+            retry_policy=RetryPolicy(maximum_attempts=5),
+        )
+        # Let signal handlers still syncing state finish before closing; later
+        # status updates go straight to the database
+        await workflow.wait_condition(workflow.all_handlers_finished)
+
+    async def _sync_state(self):
+        """Push a versioned state snapshot to the database for cheap API reads"""
+        if not self.application_id or not workflow.patched("state-sync"):
+            return
+
+        self.state_version += 1
+        await workflow.execute_activity(
+            "sync_application_state",
+            {
+                "application_id": self.application_id,
+                "status": self.status.value,
+                "cover_letter_available": bool(self.cover_letter),
+                "reminder_sent": self.reminder_sent,
+                "state_version": self.state_version,
+            },
+            start_to_close_timeout=timedelta(seconds=30),
+            retry_policy=RetryPolicy(maximum_attempts=5),
+        )
+
+    async def _attach_resume_profile(
+        self, application_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Attach the precomputed resume profile, falling back to the raw resume"""
+        return await attach_resume_profile(application_data)
+
     async def _wait_for_deadline_or_update(
         self, application_data: Dict[str, Any]
     ) -> bool:
@@ -78,8 +174,14 @@ class JobApplicationWorkflow:
         self.status = ApplicationStatus.REMINDER_SENT
         self.reminder_sent = True
 
+        # Reminders are queued and delivered as one digest per user
+        activity_name = (
+            "queue_reminder_notification"
+            if workflow.patched("reminder-digest")
+            else "send_reminder_notification"
+        )
         await workflow.execute_activity(
-            "send_reminder_notification",
+            activity_name,
             {
                 "user_email": application_data["user_email"],
                 "company": application_data["company"],
@@ -114,6 +216,29 @@ class JobApplicationWorkflow:
 
         self.updates_received += 1
         logger.info(f"Status updated to {self.status.value}")
+        await self._sync_state()
+
+    @workflow.signal
+    async def select_alternate(self, index: int):
+        """Swap the current cover letter with one of the stored alternates"""
+        if not 0 <= index < len(self.alternates):
+            logger.warning(f"Ignoring selection of missing alternate {index}")
+            return
+
+        selected = self.alternates[index]
+        self.alternates[index] = {
+            "cover_letter": self.cover_letter,
+            "score": self.cover_letter_score,
+        }
+        self.cover_letter = selected["cover_letter"]
+        self.cover_letter_score = selected["score"]
+        logger.info(f"Switched to alternate cover letter {index}")
+        await self._sync_state()
+
+    @workflow.signal
+    def generation_slot(self, lane: str):
+        """Sent by GenerationSchedulerWorkflow when generation may start"""
+        self.generation_lane = lane
 
     @workflow.query
     def get_current_status(self) -> dict:
@@ -123,9 +248,19 @@ class JobApplicationWorkflow:
             "cover_letter_available": bool(self.cover_letter),
             "reminder_sent": self.reminder_sent,
             "updates_received": self.updates_received,
+            "state_version": self.state_version,
         }
 
     @workflow.query
     def get_cover_letter(self) -> Optional[str]:
         """Query generated cover letter"""
         return self.cover_letter
+
+    @workflow.query
+    def get_cover_letter_candidates(self) -> dict:
+        """Query the current cover letter, its score and the alternates"""
+        return {
+            "cover_letter": self.cover_letter,
+            "score": self.cover_letter_score,
+            "alternates": self.alternates,
+        }
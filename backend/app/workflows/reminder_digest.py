@@ -0,0 +1,29 @@
+from datetime import timedelta
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SCHEDULE_ID = "reminder-digest"
+DIGEST_WORKFLOW_ID = "reminder-digest-run"
+
+
+@workflow.defn
+class ReminderDigestWorkflow:
+    """Periodic run (via a Temporal schedule) that emails grouped reminders"""
+
+    @workflow.run
+    async def run(self) -> dict:
+        result = await workflow.execute_activity(
+            "send_reminder_digests",
+            start_to_close_timeout=timedelta(minutes=10),
+            heartbeat_timeout=timedelta(minutes=2),
+            retry_policy=RetryPolicy(
+                maximum_attempts=3,
+                initial_interval=timedelta(seconds=10),
+                backoff_coefficient=2.0,
+            ),
+        )
+        logger.info(f"Reminder digest run finished: {result}")
+        return result
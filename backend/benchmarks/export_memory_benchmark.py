@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the streaming export against the fetchall() listing query.
+
+Reads the applications already in DATABASE_URL, for each --limits value, in
+three ways: get_all_applications (every row materialized as a model), and
+export_chunks as NDJSON and as CSV (one batch of EXPORT_BATCH_SIZE rows at a
+time). Reports the peak Python allocation of each, traced with tracemalloc.
+The export's peak should stay flat as the row count grows.
+
+    DATABASE_URL=postgresql://... python benchmarks/export_memory_benchmark.py \\
+        --limits 100,10000,100000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+sys.path.append(".")
+
+
+def measure(fn) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limits", default="100,1000,10000")
+    parser.add_argument("--include-cover-letters", action="store_true")
+    args = parser.parse_args()
+
+    from app.export import EXPORT_BATCH_SIZE, export_chunks
+    from app.models.application import ApplicationFilters
+    from app.models.database import get_all_applications, get_db, init_db
+
+    init_db()
+    db = get_db()
+
+    def listing(filters):
+        return len(get_all_applications(db, filters))
+
+    def export(filters, format):
+        # Only the chunk count is kept, as a client would send chunks on
+        return sum(
+            1 for _ in export_chunks(format, filters, args.include_cover_letters)
+        )
+
+    print(f"export batch size {EXPORT_BATCH_SIZE}\n")
+    print(f"{'limit':>9} {'rows':>9} {'path':<12} {'peak MiB':>9} {'seconds':>8}")
+    for limit in (int(value) for value in args.limits.split(",")):
+        filters = ApplicationFilters(limit=limit)
+        rows, peak, elapsed = measure(lambda: listing(filters))
+        print(
+            f"{limit:>9} {rows:>9} {'fetchall':<12} {peak / 2**20:>9.1f} "
+            f"{elapsed:>8.2f}"
+        )
+        for format in ("ndjson", "csv"):
+            _, peak, elapsed = measure(lambda: export(filters, format))
+            print(
+                f"{'':>9} {'':>9} {'export ' + format:<12} {peak / 2**20:>9.1f} "
+                f"{elapsed:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measure cold import time of the API and worker entry points with -X importtime.
+
+Each module is imported in fresh interpreters; the median total and the
+slowest top-level packages are reported. The run fails if the API pulls in
+the LLM stack, or if --budget-ms is exceeded, so it can gate CI.
+
+    python benchmarks/import_time_benchmark.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Modules the API process must never import
+API_FORBIDDEN = ("dspy", "litellm", "google.generativeai", "numpy")
+
+
+def import_profile(module: str) -> dict:
+    """{module name: (self us, cumulative us, depth)} for one fresh import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for match in LINE.finditer(result.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        profile[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return profile
+
+
+def top_level_costs(profile: dict) -> dict:
+    """Self time summed per top-level package"""
+    costs = defaultdict(int)
+    for name, (self_us, _, _) in profile.items():
+        costs[name.split(".")[0]] += self_us
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", default="app.main,app.worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--budget-ms", type=float, help="Fail above this median")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules.split(","):
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        totals = [profile[module][1] / 1000 for profile in profiles]
+        median = statistics.median(totals)
+        print(
+            f"{module}: median {median:.0f} ms "
+            f"(min {min(totals):.0f}, max {max(totals):.0f}, {args.runs} runs)"
+        )
+
+        costs = top_level_costs(profiles[-1])
+        for package, self_us in sorted(costs.items(), key=lambda c: -c[1])[: args.top]:
+            print(f"    {package:<28} {self_us / 1000:8.1f} ms")
+
+        if module == "app.main":
+            leaked = [
+                name
+                for name in API_FORBIDDEN
+                if any(loaded == name for loaded in profiles[-1])
+            ]
+            if leaked:
+                print(f"  FAIL: API imports the LLM stack: {', '.join(leaked)}")
+                failed = True
+
+        if args.budget_ms and median > args.budget_ms:
+            print(f"  FAIL: over budget of {args.budget_ms:.0f} ms")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Compare stock and FAST_JSON serialization for API listings and Temporal payloads.
+
+API: the application listing through FastAPI's response_model path
+(validate, serialize, render) with the stock and orjson response classes,
+against the TypeAdapter fast path that skips re-validation.
+Temporal: encode/decode of workflow inputs and cover letter candidates with
+the default payload converter and the orjson one. Every fast result is
+checked against the stock path before timing.
+
+    python benchmarks/json_serialization_benchmark.py --items 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from temporalio.converter import DefaultPayloadConverter  # noqa: E402
+
+from app.models.application import (  # noqa: E402
+    ApplicationResponse,
+    ApplicationStatus,
+    ApplicationWorkflowInput,
+    JobApplication,
+)
+from app.serialization import (  # noqa: E402
+    FastJSONResponse,
+    FastPayloadConverter,
+    json_response,
+)
+
+LETTER = "Dear Hiring Manager,\n\n" + "I am excited to apply. " * 60
+
+
+def application_responses(count: int) -> List[ApplicationResponse]:
+    return [
+        ApplicationResponse(
+            id=f"app-{i}",
+            workflow_id=f"job-app-app-{i}",
+            status=ApplicationStatus.SUBMITTED,
+            company=f"Company {i}",
+            role="Senior Engineer",
+            cover_letter_available=i % 2 == 0,
+            created_at=datetime(2024, 1, 1) + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def workflow_input() -> ApplicationWorkflowInput:
+    return ApplicationWorkflowInput.from_application(
+        JobApplication(
+            id="app-1",
+            company="Acme",
+            role="Senior Engineer",
+            job_description="Build things. " * 200,
+            resume="Built things. " * 300,
+            user_email="user@example.com",
+            deadline_duration=timedelta(weeks=4),
+        )
+    )
+
+
+def candidates_result(count: int) -> dict:
+    return {
+        "cover_letter": LETTER,
+        "score": 0.91,
+        "alternates": [{"cover_letter": LETTER, "score": 0.8} for _ in range(count)],
+    }
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def benchmark_api(items: int, number: int):
+    responses = application_responses(items)
+    field = create_response_field("Response", List[ApplicationResponse])
+    run = asyncio.new_event_loop().run_until_complete
+
+    def response_model_path(response_class):
+        async def render():
+            content = await serialize_response(field=field, response_content=responses)
+            return response_class(content).body
+
+        return lambda: run(render())
+
+    paths = {
+        "response_model + json": response_model_path(JSONResponse),
+        "response_model + orjson": response_model_path(FastJSONResponse),
+        "TypeAdapter fast path": lambda: json_response(
+            responses, List[ApplicationResponse]
+        ).body,
+    }
+    expected = json.loads(paths["response_model + json"]())
+
+    print(f"API listing ({items} applications):")
+    baseline = None
+    for name, path in paths.items():
+        assert json.loads(path()) == expected, name
+        us = per_call_us(path, number)
+        baseline = baseline or us
+        print(f"    {name:<28} {us:10.0f} us  ({baseline / us:.1f}x)")
+
+
+def benchmark_temporal(alternates: int, number: int):
+    stock, fast = DefaultPayloadConverter(), FastPayloadConverter()
+    values = {
+        "workflow input (dict)": vars(workflow_input()),
+        "workflow input (dataclass)": workflow_input(),
+        f"candidates (1 + {alternates})": candidates_result(alternates),
+    }
+
+    print("Temporal payloads (encode + decode):")
+    for name, value in values.items():
+        # Either side decodes what the other encodes (dataclass key order differs)
+        payloads = fast.to_payloads([value])
+        assert stock.from_payloads(payloads) == fast.from_payloads(payloads)
+        assert fast.from_payloads(stock.to_payloads([value])) == fast.from_payloads(
+            payloads
+        )
+
+        def round_trip(converter):
+            return lambda: converter.from_payloads(converter.to_payloads([value]))
+
+        stock_us = per_call_us(round_trip(stock), number)
+        fast_us = per_call_us(round_trip(fast), number)
+        print(
+            f"    {name:<28} stock {stock_us:7.1f} us  fast {fast_us:7.1f} us  "
+            f"({stock_us / fast_us:.1f}x)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--alternates", type=int, default=2)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    benchmark_api(args.items, args.number)
+    benchmark_temporal(args.alternates, args.number * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+HTTP load generator replaying the frontend's traffic patterns against the API.
+
+Scenarios (virtual users run concurrently for --duration seconds):
+  dashboard  GET /api/applications/ every 30 s, like ApplicationList.tsx
+  detail     GET /api/applications/{id} every 5 s, and the cover letter once
+             it is available, like ApplicationDetail.tsx
+  submit     bursts of concurrent POST /api/applications/
+  upload     POST /api/resumes/ of a freshly generated multi-page PDF, so
+             every upload misses the parse cache
+
+Users start staggered across their polling interval, as real browsers would.
+Run the API and the worker locally with LLM_STUB=true so generation costs
+nothing. Install the benchmark dependencies, then run, for example:
+
+    pip install -r requirements-dev.txt
+    python benchmarks/load_test.py --mix mixed --duration 120
+    python benchmarks/load_test.py --dashboards 200 --details 0 --conditional \\
+        --compare load_results/<previous run>.json
+
+The overload mix submits faster than the worker generates. Run it with
+ADMISSION_CONTROL=true on the API, and with --track-completion to time
+accepted applications from submission to cover letter, split by admission
+decision:
+
+    python benchmarks/load_test.py --mix overload --track-completion
+
+The uploads mix keeps resume parsing busy next to dashboard and detail
+polling. Compare their latency with a --mix polling run:
+
+    python benchmarks/load_test.py --mix uploads --duration 120
+
+Reports throughput, latency percentiles, error rate and shed (429) rate per
+route, and saves the results as JSON under --out-dir so runs can be compared
+over time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+# Users per scenario; each can be overridden on the command line
+MIXES = {
+    "polling": {"dashboards": 50, "details": 200, "bursts": 0},
+    "burst": {"dashboards": 5, "details": 20, "bursts": 1},
+    "mixed": {"dashboards": 50, "details": 200, "bursts": 1},
+    "uploads": {"dashboards": 50, "details": 200, "bursts": 0, "uploaders": 10},
+    "overload": {
+        "dashboards": 5,
+        "details": 20,
+        "bursts": 4,
+        "burst_size": 50,
+        "burst_interval": 5,
+    },
+}
+SCENARIO_DEFAULTS = {"burst_size": 20, "burst_interval": 30, "uploaders": 0}
+
+LIST_ROUTE = "GET /api/applications/"
+DETAIL_ROUTE = "GET /api/applications/{id}"
+COVER_LETTER_ROUTE = "GET /api/applications/{id}/cover-letter"
+CREATE_ROUTE = "POST /api/applications/"
+UPLOAD_ROUTE = "POST /api/resumes/"
+# Submission to cover_letter_available, per X-Admission decision
+COMPLETION_ROUTE = "E2E cover letter ({admission})"
+
+
+def sample_resume_pdf(pages: int) -> bytes:
+    """A text PDF of `pages` pages with a random marker, unique per call"""
+    marker = uuid.uuid4().hex
+    line = "Python engineer building APIs, data pipelines and Postgres schemas"
+    # Objects 1-3: catalog, page tree, font; then a page and its content each
+    kids = " ".join(f"{4 + 2 * page} 0 R" for page in range(pages))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page in range(pages):
+        text = "".join(f"({line} {marker} {page}.{row}) Tj T* " for row in range(45))
+        stream = f"BT /F1 10 Tf 12 TL 50 760 Td {text}ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {5 + 2 * page} 0 R >>".encode()
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(pdf)
+
+
+class Recorder:
+    """Latency samples and outcomes per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        route: str,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response = None
+            status = type(e).__name__
+        self.record(route, status, time.perf_counter() - start)
+        return response
+
+    def record(self, route: str, status: str, seconds: float):
+        self.latencies[route].append(seconds)
+        self.statuses[route][status] += 1
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.recorder = Recorder()
+        self.application_ids: List[str] = []
+        self.completions: List[asyncio.Task] = []
+        self.deadline = 0.0
+
+    def running(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(max(0.0, min(seconds, self.deadline - time.monotonic())))
+
+    async def create_application(self, client: httpx.AsyncClient):
+        suffix = uuid.uuid4().hex[:8]
+        submitted = time.perf_counter()
+        response = await self.recorder.request(
+            client,
+            CREATE_ROUTE,
+            "POST",
+            "/api/applications/",
+            json={
+                "company": f"LoadTest {suffix}",
+                "role": "Software Engineer",
+                "job_description": "Build and operate Python services. " * 20,
+                "resume": "Python engineer with API and database experience. " * 20,
+                "user_email": f"load-{suffix}@example.com",
+                "deadline_weeks": 4,
+            },
+        )
+        if response is not None and response.status_code == 200:
+            application_id = response.json()["id"]
+            self.application_ids.append(application_id)
+            if self.args.track_completion and self.deadline:
+                admission = response.headers.get("x-admission", "admit")
+                self.completions.append(
+                    asyncio.create_task(
+                        self.track_completion(
+                            client, application_id, admission, submitted
+                        )
+                    )
+                )
+
+    async def track_completion(
+        self,
+        client: httpx.AsyncClient,
+        application_id: str,
+        admission: str,
+        submitted: float,
+    ):
+        """Poll until the cover letter is available, up to --completion-timeout"""
+        route = COMPLETION_ROUTE.format(admission=admission)
+        give_up = submitted + self.args.completion_timeout
+        while time.perf_counter() < give_up:
+            await asyncio.sleep(self.args.completion_poll)
+            try:
+                response = await client.get(f"/api/applications/{application_id}")
+            except httpx.HTTPError:
+                continue
+            if (
+                response.status_code == 200
+                and response.json().get("cover_letter_available")
+            ):
+                self.recorder.record(route, "200", time.perf_counter() - submitted)
+                return
+        self.recorder.record(route, "timeout", time.perf_counter() - submitted)
+
+    async def dashboard_user(self, client: httpx.AsyncClient):
+        interval = self.args.dashboard_interval
+        etag = None
+        await self.sleep(random.uniform(0, interval))
+        while self.running():
+            headers = {}
+            if etag and self.args.conditional:
+                headers["If-None-Match"] = etag
+            response = await self.recorder.request(
+                client, LIST_ROUTE, "GET", "/api/applications/", headers=headers
+            )
+            if response is not None:
+                etag = response.headers.get("etag", etag)
+            await self.sleep(interval)
+
+    async def detail_user(self, client: httpx.AsyncClient):
+        interval = self.args.detail_interval
+        await self.sleep(random.uniform(0, interval))
+        if not self.application_ids:
+            return
+        application_id = random.choice(self.application_ids)
+        cover_letter_loaded = False
+        while self.running():
+            response = await self.recorder.request(
+                client, DETAIL_ROUTE, "GET", f"/api/applications/{application_id}"
+            )
+            if (
+                response is not None
+                and response.status_code == 200
+                and response.json().get("cover_letter_available")
+                and not cover_letter_loaded
+            ):
+                letter = await self.recorder.request(
+                    client,
+                    COVER_LETTER_ROUTE,
+                    "GET",
+                    f"/api/applications/{application_id}/cover-letter",
+                )
+                cover_letter_loaded = letter is not None and letter.status_code == 200
+            await self.sleep(interval)
+
+    async def submit_bursts(self, client: httpx.AsyncClient):
+        while self.running():
+            await asyncio.gather(
+                *(
+                    self.create_application(client)
+                    for _ in range(self.args.burst_size)
+                )
+            )
+            await self.sleep(self.args.burst_interval)
+
+    async def uploader(self, client: httpx.AsyncClient):
+        await self.sleep(random.uniform(0, self.args.upload_interval))
+        while self.running():
+            pdf = sample_resume_pdf(self.args.upload_pages)
+            await self.recorder.request(
+                client,
+                UPLOAD_ROUTE,
+                "POST",
+                "/api/resumes/",
+                files={"file": ("resume.pdf", pdf, "application/pdf")},
+            )
+            await self.sleep(self.args.upload_interval)
+
+    async def run(self) -> float:
+        limits = httpx.Limits(max_connections=self.args.max_connections)
+        async with httpx.AsyncClient(
+            base_url=self.args.base_url,
+            limits=limits,
+            timeout=self.args.timeout,
+        ) as client:
+            # Detail pages need existing applications; seeding is not measured
+            await asyncio.gather(
+                *(self.create_application(client) for _ in range(self.args.seed))
+            )
+            self.recorder = Recorder()
+
+            started = time.monotonic()
+            self.deadline = started + self.args.duration
+            users = (
+                [self.dashboard_user(client) for _ in range(self.args.dashboards)]
+                + [self.detail_user(client) for _ in range(self.args.details)]
+                + [self.submit_bursts(client) for _ in range(self.args.bursts)]
+                + [self.uploader(client) for _ in range(self.args.uploaders)]
+            )
+            await asyncio.gather(*users)
+            elapsed = time.monotonic() - started
+            await asyncio.gather(*self.completions)
+            return elapsed
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = round(fraction * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    routes = {}
+    for route, samples in sorted(recorder.latencies.items()):
+        samples = sorted(samples)
+        statuses = dict(recorder.statuses[route])
+        shed = statuses.get("429", 0)
+        errors = sum(
+            count
+            for status, count in statuses.items()
+            if not status.isdigit() or int(status) >= 400
+        )
+        routes[route] = {
+            "requests": len(samples),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "error_rate": round((errors - shed) / len(samples), 4),
+            "shed_rate": round(shed / len(samples), 4),
+            "statuses": statuses,
+            **{
+                f"p{int(q * 100)}_ms": round(percentile(samples, q) * 1000, 1)
+                for q in (0.5, 0.9, 0.95, 0.99)
+            },
+            "max_ms": round(samples[-1] * 1000, 1),
+        }
+    return routes
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(routes: Dict[str, dict], previous: Optional[dict]):
+    print(
+        f"{'route':<42} {'req':>7} {'rps':>8} {'err%':>6} {'shed%':>6} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8}"
+    )
+    for route, stats in routes.items():
+        print(
+            f"{route:<42} {stats['requests']:>7} {stats['throughput_rps']:>8.2f} "
+            f"{stats['error_rate'] * 100:>6.2f} "
+            f"{stats.get('shed_rate', 0) * 100:>6.2f} {stats['p50_ms']:>8.1f} "
+            f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+        before = (previous or {}).get("routes", {}).get(route)
+        if before:
+            print(
+                f"{'  vs ' + previous.get('git_commit', 'previous'):<42} "
+                f"{'':>7} {stats['throughput_rps'] - before['throughput_rps']:>+8.2f} "
+                f"{(stats['error_rate'] - before['error_rate']) * 100:>+6.2f} "
+                f"{'':>6} "
+                f"{stats['p50_ms'] - before['p50_ms']:>+8.1f} "
+                f"{stats['p95_ms'] - before['p95_ms']:>+8.1f} "
+                f"{stats['p99_ms'] - before['p99_ms']:>+8.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--base-url", default=os.getenv("API_BASE_URL", "http://localhost:8000")
+    )
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--dashboards", type=int, help="Dashboard users")
+    parser.add_argument("--details", type=int, help="Detail page users")
+    parser.add_argument("--bursts", type=int, help="Concurrent submit loops")
+    parser.add_argument("--burst-size", type=int, help="Default 20")
+    parser.add_argument("--burst-interval", type=float, help="Default 30 s")
+    parser.add_argument("--uploaders", type=int, help="Resume upload loops")
+    parser.add_argument("--upload-interval", type=float, default=1)
+    parser.add_argument("--upload-pages", type=int, default=10)
+    parser.add_argument("--dashboard-interval", type=float, default=30)
+    parser.add_argument("--detail-interval", type=float, default=5)
+    parser.add_argument(
+        "--conditional", action="store_true", help="Send If-None-Match"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=20, help="Applications created first"
+    )
+    parser.add_argument(
+        "--track-completion",
+        action="store_true",
+        help="Time submissions to cover letter, by admission decision",
+    )
+    parser.add_argument("--completion-poll", type=float, default=2)
+    parser.add_argument("--completion-timeout", type=float, default=600)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--out-dir", default="load_results")
+    parser.add_argument("--compare", help="Earlier results JSON to diff against")
+    parser.add_argument("--max-error-rate", type=float, help="Exit 1 above this rate")
+    args = parser.parse_args()
+
+    for name, value in {**SCENARIO_DEFAULTS, **MIXES[args.mix]}.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+
+    test = LoadTest(args)
+    started_at = datetime.utcnow()
+    elapsed = asyncio.run(test.run())
+    routes = summarize(test.recorder, elapsed)
+
+    total_requests = sum(stats["requests"] for stats in routes.values())
+    total_errors = sum(
+        stats["error_rate"] * stats["requests"] for stats in routes.values()
+    )
+    results = {
+        "started_at": started_at.isoformat(),
+        "git_commit": git_commit(),
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 2),
+        "total": {
+            "requests": total_requests,
+            "throughput_rps": round(total_requests / elapsed, 2),
+            "error_rate": (
+                round(total_errors / total_requests, 4) if total_requests else 0
+            ),
+        },
+        "routes": routes,
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(routes, previous)
+    print(
+        f"total: {results['total']['requests']} requests, "
+        f"{results['total']['throughput_rps']} rps, "
+        f"{results['total']['error_rate'] * 100:.2f}% errors in {elapsed:.0f}s"
+    )
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    path = os.path.join(
+        args.out_dir, f"load_test-{started_at:%Y%m%d-%H%M%S}-{args.mix}.json"
+    )
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {path}")
+
+    error_rate = results["total"]["error_rate"]
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
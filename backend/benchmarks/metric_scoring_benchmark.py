@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark cover letter scoring: the original per-letter metric, the
+single-pass cover_letter_quality_metric and the batch scorer.
+
+    python benchmarks/metric_scoring_benchmark.py --letters 5000
+"""
+import argparse
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(".")
+
+import numpy as np
+
+from app.dspy_modules.cover_letter import cover_letter_quality_metric
+from app.dspy_modules.scoring import score_batch
+
+SENTENCES = [
+    "I am excited to apply for the {role} position at {company}.",
+    "My experience building distributed systems maps directly to your needs.",
+    "I have led teams that shipped reliable products on tight deadlines.",
+    "I believe my background in data and infrastructure would help {company}.",
+    "I would bring a pragmatic, collaborative approach to the team.",
+    "Our platform served millions of requests per day with high availability.",
+    "I am passionate about mentoring engineers and improving code quality.",
+    "Thank you for considering my application.",
+]
+
+
+def legacy_metric(example, prediction, trace=None) -> float:
+    """The metric as it was before single-pass matching, kept as the baseline"""
+    if not hasattr(prediction, "cover_letter") or not prediction.cover_letter:
+        return 0.0
+
+    cover_letter = prediction.cover_letter.strip()
+
+    word_count = len(cover_letter.split())
+    if 300 <= word_count <= 400:
+        word_score = 1.0
+    elif word_count < 200:
+        word_score = 0.3
+    elif word_count > 600:
+        word_score = 0.5
+    else:
+        word_score = max(0.6, 1 - abs(350 - word_count) / 200)
+
+    company_mentioned = (
+        example.company.lower() in cover_letter.lower()
+        if hasattr(example, "company")
+        else 0
+    )
+    role_mentioned = (
+        example.role.lower() in cover_letter.lower() if hasattr(example, "role") else 0
+    )
+
+    professional_phrases = [
+        "i am excited", "i am passionate", "i would like to", "i am writing to",
+        "i believe", "my experience", "i have", "i would bring", "thank you",
+    ]
+    professional_score = sum(
+        1 for phrase in professional_phrases if phrase in cover_letter.lower()
+    ) / len(professional_phrases)
+
+    paragraphs = [p.strip() for p in cover_letter.split("\n\n") if p.strip()]
+    structure_score = min(1.0, len(paragraphs) / 3)
+
+    total_score = (
+        word_score * 0.3
+        + company_mentioned * 0.2
+        + role_mentioned * 0.2
+        + professional_score * 0.2
+        + structure_score * 0.1
+    )
+    return min(1.0, total_score)
+
+
+def make_pairs(count: int, seed: int):
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        example = SimpleNamespace(company=f"Company{i % 50}", role="Backend Engineer")
+        paragraphs = [
+            " ".join(
+                rng.choice(SENTENCES).format(
+                    company=example.company if rng.random() < 0.8 else "Other",
+                    role=example.role,
+                )
+                for _ in range(rng.randint(3, 9))
+            )
+            for _ in range(rng.randint(1, 6))
+        ]
+        letter = "\n\n".join(paragraphs) if rng.random() > 0.02 else ""
+        pairs.append((example, SimpleNamespace(cover_letter=letter)))
+    return pairs
+
+
+def timed(label: str, fn, count: int):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed * 1e6 / count:8.2f} us/letter")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--letters", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pairs = make_pairs(args.letters, args.seed)
+    words = sum(len(p.cover_letter.split()) for _, p in pairs) / len(pairs)
+    print(f"{args.letters} letters, {words:.0f} words on average\n")
+
+    legacy = timed(
+        "legacy metric (per letter)",
+        lambda: [legacy_metric(e, p) for e, p in pairs],
+        args.letters,
+    )
+    single = timed(
+        "cover_letter_quality_metric",
+        lambda: [cover_letter_quality_metric(e, p) for e, p in pairs],
+        args.letters,
+    )
+    batch = timed("score_batch", lambda: score_batch(pairs), args.letters)
+
+    assert np.allclose(legacy, single), "single-pass metric diverged from legacy"
+    assert np.allclose(legacy, batch.total), "batch scores diverged from legacy"
+    print("\nAll scorers agree.")
+
+
+if __name__ == "__main__":
+    main()
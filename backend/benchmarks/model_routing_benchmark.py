@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark tiered model routing against single-model generation.
+
+Generation runs against the LLM stub (app/llm_stub.py) with a latency factor
+and quality per model (LLM_STUB_MODELS): a low-quality model more often
+returns generic letters that score under ROUTER_MIN_SCORE. Each
+configuration generates --requests cover letters; a --long-fraction of them
+have job descriptions above ROUTER_COMPLEX_INPUT_CHARS. Reports latency,
+cost from the generation ledger's pricing, best score, per-tier hit rates and
+the escalation rate.
+
+    python benchmarks/model_routing_benchmark.py --requests 200
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.append(".")
+
+DEFAULT_STUB_MODELS = (
+    "gemini-1.5-flash-8b=0.5/0.4,gemini-1.5-flash=1/0.8,gemini-1.5-pro=3/0.95"
+)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[round(fraction * (len(values) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--candidates", type=int, default=3)
+    parser.add_argument("--long-fraction", type=float, default=0.1)
+    parser.add_argument(
+        "--tiers", default="gemini-1.5-flash-8b,gemini-1.5-flash,gemini-1.5-pro"
+    )
+    parser.add_argument("--stub-models", default=DEFAULT_STUB_MODELS)
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Read when the stub is imported
+    os.environ["LLM_STUB"] = "true"
+    os.environ["LLM_STUB_MODELS"] = args.stub_models
+    os.environ["LLM_STUB_LATENCY_SECONDS"] = str(args.stub_latency)
+    logging.basicConfig(level=logging.ERROR)
+
+    from app.activities import generation_ledger
+    from app.activities.llm_activities import generate_ranked
+    from app.activities.model_routing import (
+        ROUTER_COMPLEX_INPUT_CHARS,
+        ROUTER_MIN_SCORE,
+        route,
+    )
+
+    # Collect ledger rows in memory rather than writing them to Postgres
+    runs = []
+    generation_ledger.save_generation_run = lambda db, run: runs.append(run)
+
+    random.seed(7)
+    applications = []
+    for i in range(args.requests):
+        long_input = random.random() < args.long_fraction
+        applications.append(
+            {
+                "id": f"bench-{i}",
+                "company": f"Company {i}",
+                "role": "Platform Engineer",
+                "job_description": "Operate Python services on Kubernetes. "
+                * (ROUTER_COMPLEX_INPUT_CHARS // 20 if long_input else 20),
+                "resume": "Python and Kubernetes engineer, six years. " * 10,
+            }
+        )
+
+    tiers = [tier.strip() for tier in args.tiers.split(",")]
+    configs = {f"only {tier}": [tier] for tier in tiers}
+    configs["routed"] = tiers
+
+    print(
+        f"{args.requests} requests, {args.candidates} candidates, "
+        f"min score {ROUTER_MIN_SCORE}, stub models {args.stub_models}\n"
+    )
+    print(
+        f"{'config':<28} {'p50 ms':>8} {'p95 ms':>8} {'$/1k req':>9} "
+        f"{'score':>6} {'escalated':>10}  served by"
+    )
+    for name, config_tiers in configs.items():
+        runs.clear()
+        latencies, scores, served, escalated = [], [], Counter(), 0
+        for application in applications:
+            start = time.perf_counter()
+            ranked = route(
+                lambda model: generate_ranked(application, args.candidates, model),
+                len(application["job_description"]) + len(application["resume"]),
+                tiers=config_tiers,
+            )
+            latencies.append(time.perf_counter() - start)
+            scores.append(ranked[0]["score"])
+            models = [
+                run.model for run in runs if run.application_id == application["id"]
+            ]
+            served[models[-1]] += 1
+            escalated += len(models) > 1 or models[0] != config_tiers[0]
+
+        cost = sum(run.cost_usd for run in runs) / len(applications) * 1000
+        hit_rates = ", ".join(
+            f"{tier} {served[tier] / len(applications):.0%}"
+            for tier in config_tiers
+            if served[tier]
+        )
+        print(
+            f"{name:<28} {percentile(latencies, 0.5) * 1000:>8.0f} "
+            f"{percentile(latencies, 0.95) * 1000:>8.0f} {cost:>9.4f} "
+            f"{statistics.mean(scores):>6.3f} "
+            f"{escalated / len(applications):>10.0%}  {hit_rates}"
+        )
+
+
+if __name__ == "__main__":
+    main()
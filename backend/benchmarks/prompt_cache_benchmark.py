@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark DSPy cover letter calls with and without prompt-prefix caching.
+
+Runs the CoverLetterGenerator with --demos labeled demos against the LLM
+stub (app/llm_stub.py), which prices and delays cached input tokens at
+LLM_STUB_CACHED_TOKEN_FRACTION of regular ones. Reports per request the
+input tokens sent, billed-equivalent input tokens and cost, time to first
+token (the stub's prefill time) and wall latency.
+
+The stub enforces the model's real caching minimum (32,768 tokens on
+Gemini 1.5), so caching only engages once the demos make the prefix that
+large, as in production:
+
+    python benchmarks/prompt_cache_benchmark.py --requests 20 --demos 110
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(".")
+
+
+def run(lm, program, requests: int) -> dict:
+    from app import llm_stub
+
+    sent, cached, latencies = [], [], []
+    for i in range(requests):
+        start = time.perf_counter()
+        program(
+            company=f"Company {i}",
+            role="Backend Engineer",
+            job_description="Build Python APIs and data pipelines. " * 10,
+            resume_profile="Skills: Python, SQL, AWS\nRoles: Engineer (5 years)",
+            config={"n": 3},
+        )
+        latencies.append(time.perf_counter() - start)
+        usage = lm.history[-1]["response"][0].usage_metadata
+        cached.append(usage.cached_content_token_count)
+        sent.append(usage.prompt_token_count - usage.cached_content_token_count)
+
+    fraction = llm_stub.LLM_STUB_CACHED_TOKEN_FRACTION
+    rate = llm_stub.LLM_STUB_PREFILL_SECONDS_PER_1K_TOKENS
+    billed = [s + c * fraction for s, c in zip(sent, cached)]
+    return {
+        "sent": statistics.mean(sent),
+        "cached": statistics.mean(cached),
+        "billed": statistics.mean(billed),
+        "ttft": statistics.mean(b / 1000 * rate for b in billed),
+        "latency": statistics.mean(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--demos", type=int, default=110, help="Labeled demos")
+    parser.add_argument(
+        "--decode-seconds", type=float, default=0.05, help="Stub time after prefill"
+    )
+    parser.add_argument("--prefill-seconds-per-1k", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Read when the stub is imported
+    os.environ["LLM_STUB"] = "true"
+    os.environ["LLM_STUB_LATENCY_SECONDS"] = str(args.decode_seconds)
+    os.environ["LLM_STUB_PREFILL_SECONDS_PER_1K_TOKENS"] = str(
+        args.prefill_seconds_per_1k
+    )
+
+    import dspy
+
+    from app import llm_stub
+    from app.activities.generation_ledger import estimate_cost
+    from app.dspy_modules.cover_letter import (
+        CoverLetterGenerator,
+        CoverLetterOptimizer,
+        GeminiLM,
+    )
+    from app.dspy_modules.prompt_cache import (
+        cache_model,
+        estimate_tokens,
+        program_version,
+        split_prompt,
+    )
+
+    examples = CoverLetterOptimizer().create_training_examples()
+    program = CoverLetterGenerator()
+    for predictor in program.predictors():
+        predictor.demos = [examples[i % len(examples)] for i in range(args.demos)]
+
+    results = {}
+    for label, prefix_cache in (("full prompt", False), ("prefix cache", True)):
+        lm = GeminiLM(
+            model="gemini-1.5-flash", api_key="stub", prefix_cache=prefix_cache
+        )
+        if lm.prefix_cache is not None:
+            lm.prefix_cache.bind(program_version(program))
+        with dspy.context(lm=lm):
+            results[label] = run(lm, program, args.requests)
+        if lm.prefix_cache is not None:
+            lm.prefix_cache.release()
+        if not prefix_cache:
+            prefix_tokens = estimate_tokens(split_prompt(lm.history[-1]["prompt"])[0])
+    assert not llm_stub.CachedContent.live, "cached content left behind"
+
+    versioned, min_tokens = cache_model("gemini-1.5-flash")
+    min_tokens = llm_stub.LLM_STUB_CACHE_MIN_TOKENS or min_tokens
+    if prefix_tokens < min_tokens:
+        print(
+            f"Prefix of ~{prefix_tokens} tokens is below the {min_tokens}-token "
+            f"caching minimum of {versioned}: caching cannot apply, add demos\n"
+        )
+
+    print(
+        f"{args.requests} requests, {args.demos} demos, cached tokens at "
+        f"{llm_stub.LLM_STUB_CACHED_TOKEN_FRACTION:.0%} of the price\n"
+    )
+    print(
+        f"{'':<14} {'sent':>7} {'cached':>7} {'billed':>8} {'$/1k req':>9} "
+        f"{'ttft ms':>8} {'wall ms':>8}"
+    )
+    for label, r in results.items():
+        cost = estimate_cost("gemini-1.5-flash", r["billed"], 0) * 1000
+        print(
+            f"{label:<14} {r['sent']:>7.0f} {r['cached']:>7.0f} {r['billed']:>8.0f} "
+            f"{cost:>9.4f} {r['ttft'] * 1000:>8.1f} {r['latency'] * 1000:>8.1f}"
+        )
+    full, cached = results["full prompt"], results["prefix cache"]
+    print(
+        f"\nbilled input tokens -{1 - cached['billed'] / full['billed']:.0%}, "
+        f"time to first token -{1 - cached['ttft'] / full['ttft']:.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark reminder digest delivery against a local aiosmtpd server.
+
+Compares one SMTP session per message (the naive approach) with the pooled,
+persistent SMTPPool used by the send_reminder_digests activity.
+
+    pip install -r requirements-dev.txt
+    python benchmarks/smtp_digest_benchmark.py --messages 500 --pool-size 4
+"""
+import argparse
+import smtplib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(".")
+
+from aiosmtpd.controller import Controller
+
+from app.notifications.digest import build_reminder_digest
+from app.notifications.smtp import SMTPPool
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+
+def make_digests(count: int):
+    return [
+        build_reminder_digest(
+            f"user{i}@example.com",
+            [
+                {
+                    "application_id": f"app-{i}-{j}",
+                    "company": f"Company {j}",
+                    "role": "Software Engineer",
+                }
+                for j in range(3)
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def run_naive(host, port, messages):
+    for message in messages:
+        with smtplib.SMTP(host, port) as smtp:
+            smtp.send_message(message)
+
+
+def run_pooled(host, port, messages, pool_size):
+    pool = SMTPPool(host, port, use_tls=False, size=pool_size, max_rate=0)
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        list(executor.map(pool.send, messages))
+    pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=8025)
+    controller.start()
+    try:
+        messages = make_digests(args.messages)
+        for name, run in [
+            ("one session per message", lambda: run_naive("127.0.0.1", 8025, messages)),
+            (
+                f"pooled (size={args.pool_size})",
+                lambda: run_pooled("127.0.0.1", 8025, messages, args.pool_size),
+            ),
+        ]:
+            before = handler.received
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            delivered = handler.received - before
+            print(
+                f"{name:28s} {delivered:5d} delivered  "
+                f"{delivered / elapsed:8.1f} msg/s  ({elapsed:.2f}s)"
+            )
+            if delivered != len(messages):
+                print(f"❌ expected {len(messages)} messages, got {delivered}")
+                sys.exit(1)
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Verify with EXPLAIN that every supported listing filter is served by an index.
+
+The planner runs with its default settings, so a plan only passes if
+Postgres itself prefers the index. To give it realistic statistics the
+applications table is seeded with --rows synthetic rows spread over the last
+year (each filter below matching 1% of them or less) and analyzed, all in one
+transaction that is rolled back at the end. Run it against a development
+database: the seed holds locks on applications until it finishes.
+
+A plan passes when it sequentially scans no partition holding rows. The
+created_at range case may instead be served by partition pruning, scanning
+only the monthly partitions the range overlaps.
+
+    python check_query_plans.py --rows 100000
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(".")
+
+from app.models.application import ApplicationFilters, ApplicationStatus
+from app.models.database import (
+    APPLICATION_COLUMNS,
+    build_application_query,
+    get_db,
+    init_db,
+)
+
+FILTER_CASES = {
+    "user_email": ApplicationFilters(user_email="someone@example.com"),
+    "status": ApplicationFilters(status=ApplicationStatus.INTERVIEW),
+    "company": ApplicationFilters(company="TechCorp"),
+    "created_at range": ApplicationFilters(
+        created_from=datetime.utcnow() - timedelta(days=30),
+        created_to=datetime.utcnow(),
+    ),
+    "full-text search": ApplicationFilters(q="python engineer"),
+    "user_email + status": ApplicationFilters(
+        user_email="someone@example.com", status=ApplicationStatus.SUBMITTED
+    ),
+}
+
+# Cases that pass by pruning partitions rather than by an index
+PRUNED_CASES = {"created_at range"}
+
+# One user in 1000, 1% INTERVIEW, one company in 2000 and 0.5% of job
+# descriptions mentioning the search terms; rows are spread over 365 days
+SEED_APPLICATIONS = """
+    INSERT INTO applications (
+        id, company, role, job_description, resume, user_email,
+        deadline_duration, created_at, status
+    )
+    SELECT
+        'plan-check-' || i,
+        CASE WHEN i %% 2000 = 1 THEN 'TechCorp' ELSE 'Company ' || i %% 2000 END,
+        CASE WHEN i %% 200 = 3 THEN 'Python Engineer' ELSE 'Account Manager' END,
+        CASE WHEN i %% 200 = 3
+            THEN 'Backend python engineer building APIs'
+            ELSE 'Sales operations role ' || i %% 50
+        END,
+        'Seeded resume',
+        CASE WHEN i %% 1000 = 0 THEN 'someone@example.com'
+            ELSE 'user-' || i %% 1000 || '@example.com'
+        END,
+        interval '7 days',
+        NOW() - (i * interval '365 days' / %(rows)s),
+        CASE
+            WHEN (i / 7) %% 100 = 0 THEN 'INTERVIEW'
+            WHEN (i / 7) %% 100 = 1 THEN 'OFFER'
+            WHEN (i / 7) %% 100 < 4 THEN 'WITHDRAWN'
+            WHEN (i / 7) %% 100 < 20 THEN 'REJECTED'
+            ELSE 'SUBMITTED'
+        END
+    FROM generate_series(1, %(rows)s) AS i
+"""
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def seed(cur, rows: int) -> dict:
+    """Seed and analyze applications; rows per partition afterwards"""
+    cur.execute(
+        """
+        SELECT ensure_application_partitions(
+            (NOW() - interval '1 year')::date, (NOW() + interval '3 months')::date
+        )
+        """
+    )
+    cur.execute(SEED_APPLICATIONS, {"rows": rows})
+    cur.execute("ANALYZE applications")
+    cur.execute(
+        """
+        SELECT c.relname, c.reltuples
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'applications'::regclass
+        """
+    )
+    return dict(cur.fetchall())
+
+
+def check_query_plans(rows: int) -> bool:
+    init_db()
+    db = get_db()
+    all_indexed = True
+
+    try:
+        with db.conn.cursor() as cur:
+            partitions = seed(cur, rows)
+            populated = {name for name, tuples in partitions.items() if tuples > 0}
+            print(f"Seeded {rows} rows across {len(populated)} partitions\n")
+
+            for name, filters in FILTER_CASES.items():
+                where, order_by, params = build_application_query(filters)
+                cur.execute(
+                    f"EXPLAIN (FORMAT JSON) SELECT {APPLICATION_COLUMNS} "
+                    f"FROM applications a {where} {order_by}",
+                    params,
+                )
+                plan = cur.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = list(plan_nodes(plan[0]["Plan"]))
+                indexes = sorted(
+                    {node["Index Name"] for node in nodes if "Index Name" in node}
+                )
+                scanned = {
+                    node["Relation Name"] for node in nodes if "Relation Name" in node
+                } & populated
+                # Empty partitions cost nothing to scan whichever path is chosen
+                seq_scans = sorted(
+                    node["Relation Name"]
+                    for node in nodes
+                    if node["Node Type"] == "Seq Scan"
+                    and node["Relation Name"] in populated
+                )
+
+                if indexes and not seq_scans:
+                    print(f"✅ {name}: {', '.join(indexes)}")
+                elif name in PRUNED_CASES and len(scanned) < len(populated):
+                    print(
+                        f"✅ {name}: {len(scanned)} of {len(populated)} "
+                        f"populated partitions scanned"
+                    )
+                else:
+                    all_indexed = False
+                    detail = (
+                        f"sequential scan of {', '.join(seq_scans)}"
+                        if seq_scans
+                        else "no index used"
+                    )
+                    print(f"❌ {name}: {detail}")
+    finally:
+        # Drops the seed, its statistics and any partitions it created
+        db.conn.rollback()
+
+    return all_indexed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    sys.exit(0 if check_query_plans(args.rows) else 1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Print the job-applications task-queue backlog and replica recommendation.
+
+Against a local dev server (`temporal server start-dev`), stop the worker
+and pass --enqueue N to start N no-op deadline scheduler runs. They pile up
+as backlog, so desired_replicas should rise. Runs left over are terminated on
+exit. When GenerationSchedulerWorkflow is running (FAIR_SCHEDULING), the
+generations queued there are counted as backlog too.
+
+    python check_task_queue.py --enqueue 100
+"""
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+
+sys.path.append(".")
+
+from app.scaling import (
+    TASK_QUEUE,
+    describe_generation_queue,
+    describe_task_queue,
+    recommend_replicas,
+)
+from app.temporal_client import connect_temporal
+from app.workflows.deadline_scheduler import DeadlineSchedulerWorkflow
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--enqueue", type=int, default=0)
+    parser.add_argument(
+        "--wait", type=float, default=2, help="Seconds to let stats refresh"
+    )
+    args = parser.parse_args()
+
+    client = await connect_temporal()
+    handles = [
+        await client.start_workflow(
+            DeadlineSchedulerWorkflow.run,
+            id=f"task-queue-check-{uuid.uuid4()}",
+            task_queue=TASK_QUEUE,
+        )
+        for _ in range(args.enqueue)
+    ]
+
+    try:
+        # Backlog stats are approximate and refresh every few seconds
+        await asyncio.sleep(args.wait if handles else 0)
+        queues = await describe_task_queue(client)
+        try:
+            generations = await describe_generation_queue(client)
+        except Exception:
+            generations = None  # No fair scheduler running
+        report = {
+            "queues": queues,
+            "generations": generations,
+            "scaling": recommend_replicas(queues, generations),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        for handle in handles:
+            try:
+                await handle.terminate("task queue check finished")
+            except Exception:
+                pass  # Already picked up and completed by a running worker
+
+
+if __name__ == "__main__":
+    asyncio.run(main())